@@ -0,0 +1,296 @@
+"""HTTP API классификации документов для других систем.
+
+Эндпоинты:
+    GET  /health                 — готовность и версия набора моделей
+    GET  /models                 — доступные модели
+    GET  /metrics                — метрики Prometheus
+    POST /classify?model=...     — один документ (multipart, поле file)
+    POST /classify/batch?model=… — несколько документов (multipart, поля file)
+
+Документы классифицируются тем же конвейером, что и в интерфейсе
+(classify_document), в пуле из API_WORKERS потоков. Набор моделей загружается
+до запуска API_PROCESSES процессов, поэтому они разделяют его память.
+Каждый документ списывает токен лимита RATE_LIMIT_API с клиента (API-ключа
+или адреса). Без API_KEY сервер слушает только loopback-адрес.
+
+Запуск из корня репозитория:
+    python app/api.py
+    curl -H "X-API-Key: $API_KEY" -F file=@order.pdf "http://localhost:8502/classify?model=Наивный Байес"
+"""
+import hashlib
+import hmac
+import ipaddress
+import json
+import logging
+import math
+import os
+import signal
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+from config import Config
+from utils import model_registry, monitoring_utils, rate_limit_utils
+from utils.api_utils import BodyReader, MultipartError, boundary_from, iter_parts
+from utils.metrics_utils import StageTimer
+from utils.ml_utils import MODELS, classify_document, translate_prediction
+
+
+logger = logging.getLogger(__name__)
+
+# Модель, если в запросе не указан параметр model
+DEFAULT_MODEL = "Логистическая регрессия"
+
+# Прежнее значение API_KEY из .env.example: с ним API не запускается
+PLACEHOLDER_API_KEY = "your_api_key_here"
+
+# Пул классификации и лимит документов в работе (создаются в каждом процессе)
+_pool = None
+_pending = None
+
+
+def classify_part(part, model_name):
+    """Результат классификации одного загруженного файла в виде словаря для JSON"""
+    timer = StageTimer()
+    result = {"filename": part.name, "model": model_name, "error": None}
+    try:
+        with model_registry.pinned() as model_set:
+            prediction, confidence, _, word_count, lang = classify_document(
+                part, model_name, model_set.vectorizer, timer
+            )
+        if prediction is None:
+            result["error"] = "документ без текста или ошибка классификации"
+        else:
+            result.update({
+                "prediction": str(prediction),
+                "class": translate_prediction(prediction, model_name),
+                "confidence": round(float(confidence), 4) if confidence is not None else None,
+                "word_count": word_count,
+                "lang": lang,
+            })
+    except Exception as e:
+        logger.exception("Classification of %s failed", part.name)
+        result["error"] = str(e)
+    finally:
+        part.close()
+        _pending.release()
+    result["model_version"] = timer.info.get("model_version")
+    result["timings_ms"] = {name: round(ms, 3) for name, ms in timer.stages.items()}
+    result["total_ms"] = round(timer.total_ms(), 3)
+    return result
+
+
+class ApiError(Exception):
+    def __init__(self, status, message, retry_after=None):
+        super().__init__(message)
+        self.status = status
+        self.retry_after = retry_after
+
+
+def is_loopback(host):
+    if host == "localhost":
+        return True
+    try:
+        return ipaddress.ip_address(host).is_loopback
+    except ValueError:
+        return False
+
+
+class ApiHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def _send_json(self, status, payload, headers=None):
+        body = json.dumps(payload, ensure_ascii=False).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json; charset=utf-8")
+        self.send_header("Content-Length", str(len(body)))
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _authorize(self):
+        if not Config.API_KEY:
+            return
+        token = self.headers.get("X-API-Key") or self.headers.get("Authorization", "").removeprefix("Bearer ")
+        # Сравнение за постоянное время: по задержке ответа ключ не подобрать
+        if not hmac.compare_digest(token.encode("utf-8"), Config.API_KEY.encode("utf-8")):
+            raise ApiError(401, "неверный API-ключ")
+
+    def _client_identity(self):
+        """Ключ лимита: API-ключ, иначе адрес клиента (за доверенными прокси — из заголовков)"""
+        if Config.API_KEY:
+            return "key:" + hashlib.sha256(Config.API_KEY.encode("utf-8")).hexdigest()[:16]
+        trusted_hops = int(Config.RATE_LIMIT_TRUSTED_PROXIES)
+        ip = rate_limit_utils.forwarded_client(self.headers, trusted_hops) if trusted_hops > 0 else None
+        return f"ip:{ip or self.client_address[0]}"
+
+    def _charge(self, identity):
+        """Списывает один документ с лимита клиента или ApiError 429"""
+        allowed, retry_after, _ = rate_limit_utils.try_acquire(identity, rate_limit_utils.API)
+        if not allowed:
+            raise ApiError(429, f"слишком много запросов, повторите через {rate_limit_utils.format_retry(retry_after)}",
+                           retry_after)
+
+    def do_GET(self):
+        path = urlparse(self.path).path
+        if path == "/health":
+            model_set = model_registry.active()
+            self._send_json(200, {"ready": True, "model_version": model_set.version, "pid": os.getpid()})
+        elif path == "/models":
+            self._send_json(200, {"models": list(MODELS), "default": DEFAULT_MODEL})
+        elif path == "/metrics":
+            body = monitoring_utils.REGISTRY.render().encode("utf-8")
+            self.send_response(200)
+            self.send_header("Content-Type", "text/plain; version=0.0.4; charset=utf-8")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+        else:
+            self._send_json(404, {"error": "не найдено"})
+
+    def do_POST(self):
+        url = urlparse(self.path)
+        endpoint = {"/classify": "single", "/classify/batch": "batch"}.get(url.path)
+        started = time.perf_counter()
+        status = 500
+        try:
+            if endpoint is None:
+                raise ApiError(404, "не найдено")
+            self._authorize()
+            identity = self._client_identity()
+            model_name = parse_qs(url.query).get("model", [DEFAULT_MODEL])[0]
+            if model_name not in MODELS:
+                raise ApiError(400, f"неизвестная модель: {model_name}")
+            length = self.headers.get("Content-Length")
+            if length is None:
+                raise ApiError(411, "нужен заголовок Content-Length")
+            boundary = boundary_from(self.headers.get("Content-Type", ""))
+            max_bytes = int(Config.API_MAX_UPLOAD_MB) * 1024 * 1024
+            parts = iter_parts(BodyReader(self.rfile, int(length)), boundary, max_bytes)
+
+            if endpoint == "single":
+                payload = self._classify_single(parts, model_name, identity)
+            else:
+                payload = self._classify_batch(parts, model_name, identity)
+            status = 200
+            self._send_json(status, payload)
+        except ApiError as e:
+            status = e.status
+            # Непрочитанное тело нельзя оставлять в соединении keep-alive
+            self.close_connection = True
+            headers = None
+            if e.status == 503:
+                headers = {"Retry-After": "1"}
+            elif e.retry_after is not None and e.retry_after != math.inf:
+                headers = {"Retry-After": str(math.ceil(e.retry_after))}
+            self._send_json(status, {"error": str(e)}, headers)
+        except MultipartError as e:
+            status = 400
+            self.close_connection = True
+            self._send_json(status, {"error": str(e)})
+        except Exception as e:
+            logger.exception("Request %s failed", self.path)
+            status = 500
+            self.close_connection = True
+            self._send_json(status, {"error": str(e)})
+        finally:
+            monitoring_utils.API_REQUESTS.inc(endpoint=endpoint or "unknown", status=str(status))
+            monitoring_utils.API_SECONDS.observe(time.perf_counter() - started, endpoint=endpoint or "unknown")
+
+    def _classify_single(self, parts, model_name, identity):
+        future = None
+        for field, part in parts:
+            if field != "file" or future is not None:
+                part.close()
+                continue
+            try:
+                self._charge(identity)
+            except ApiError:
+                part.close()
+                raise
+            if not _pending.acquire(blocking=False):
+                part.close()
+                raise ApiError(503, "сервис перегружен, повторите позже")
+            future = _pool.submit(classify_part, part, model_name)
+        if future is None:
+            raise ApiError(400, "нет поля file")
+        return future.result()
+
+    def _classify_batch(self, parts, model_name, identity):
+        futures = []
+        for field, part in parts:
+            if field != "file":
+                part.close()
+                continue
+            if len(futures) >= int(Config.API_MAX_BATCH_FILES):
+                part.close()
+                raise ApiError(413, f"в пакете больше {Config.API_MAX_BATCH_FILES} файлов")
+            try:
+                self._charge(identity)
+            except ApiError:
+                part.close()
+                raise
+            # Пока пул занят, следующая часть не читается: клиент загружает не быстрее обработки
+            if not _pending.acquire(timeout=float(Config.ADMISSION_QUEUE_TIMEOUT)):
+                part.close()
+                raise ApiError(503, "сервис перегружен, повторите позже")
+            # Документ классифицируется, пока загружаются следующие
+            futures.append(_pool.submit(classify_part, part, model_name))
+        if not futures:
+            raise ApiError(400, "нет полей file")
+        return {"results": [future.result() for future in futures]}
+
+    def log_message(self, format, *args):
+        logger.debug("%s - %s", self.address_string(), format % args)
+
+
+def _serve(server):
+    """Запускает пул и наблюдатель за версиями моделей в текущем процессе и обслуживает запросы"""
+    global _pool, _pending
+    workers = int(Config.API_WORKERS)
+    _pool = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="api-worker")
+    _pending = threading.BoundedSemaphore(int(Config.API_MAX_PENDING))
+    model_registry.start_watcher()
+    server.serve_forever()
+
+
+def main():
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(process)d %(levelname)s %(message)s")
+    if Config.API_KEY == PLACEHOLDER_API_KEY:
+        raise SystemExit("API_KEY содержит значение-заглушку из .env.example: задайте собственный ключ")
+    if not Config.API_KEY and not is_loopback(Config.API_HOST):
+        raise SystemExit(f"API_KEY не задан: без ключа API слушает только loopback, а не {Config.API_HOST}")
+    server = ThreadingHTTPServer((Config.API_HOST, int(Config.API_PORT)), ApiHandler)
+    server.daemon_threads = True
+
+    # Модели загружаются до fork: процессы разделяют их память
+    _, errors = model_registry.check_for_update()
+    for error in errors:
+        logger.warning("Model set: %s", error)
+    logger.info("Model set %s loaded, listening on %s:%s", model_registry.active().version,
+                Config.API_HOST, Config.API_PORT)
+
+    children = []
+    processes = int(Config.API_PROCESSES) if hasattr(os, "fork") else 1
+    for _ in range(processes - 1):
+        pid = os.fork()
+        if pid == 0:
+            try:
+                _serve(server)
+            except KeyboardInterrupt:
+                pass
+            os._exit(0)
+        children.append(pid)
+    try:
+        _serve(server)
+    except KeyboardInterrupt:
+        pass
+    finally:
+        for pid in children:
+            os.kill(pid, signal.SIGTERM)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,15 @@
+"""Командные утилиты приложения: пакетная классификация, переклассификация,
+дообучение, сжатие моделей, полнотекстовый индекс и бенчмарки.
+
+Запускаются как модули (python -m app.cli.<утилита>) из каталога, в котором
+работает приложение. Модули приложения импортируются как верхнеуровневые
+(config, utils), как при streamlit run app/main.py, поэтому каталог app/
+добавляется в sys.path; текущий каталог не меняется
+"""
+import sys
+from pathlib import Path
+
+
+APP_DIR = str(Path(__file__).resolve().parent.parent)
+if APP_DIR not in sys.path:
+    sys.path.insert(0, APP_DIR)
@@ -0,0 +1,154 @@
+"""Нагрузочный тест HTTP API классификации (app/api.py).
+
+Отправляет документы синтетического корпуса бенчмарка (или файлы из
+--corpus) на /classify или пакетами на /classify/batch с заданным числом
+одновременных клиентов и печатает задержку (p50/p95/p99), пропускную
+способность в документах в секунду и ошибки для каждого уровня нагрузки.
+
+Сначала запустите API:  python app/api.py
+Запуск из каталога, в котором работает приложение (относительные пути
+Config, например MODELS_DIR, считаются от текущего каталога):
+    python -m app.cli.api_load --concurrency 1,4,16 --requests 200
+    python -m app.cli.api_load --batch-size 20 --concurrency 2,8 --json api_load.json
+"""
+import argparse
+import http.client
+import itertools
+import json
+import statistics
+import threading
+import time
+import uuid
+from pathlib import Path
+from urllib.parse import quote, urlparse
+
+from .cli_utils import FALLBACK_WORDS, MIME_TYPES, generate_corpus, percentile
+
+
+def load_corpus(corpus_dir, per_size, seed):
+    """Список (имя файла, байты)"""
+    if corpus_dir:
+        return [(path.name, path.read_bytes()) for path in sorted(Path(corpus_dir).rglob("*"))
+                if path.suffix.lower().lstrip(".") in MIME_TYPES]
+    return [(name, data) for name, _, _, data in generate_corpus(FALLBACK_WORDS, per_size, seed)]
+
+
+def multipart(files):
+    boundary = uuid.uuid4().hex
+    chunks = []
+    for name, data in files:
+        chunks.append(
+            f'--{boundary}\r\nContent-Disposition: form-data; name="file"; filename="{name}"\r\n'
+            f"Content-Type: application/octet-stream\r\n\r\n".encode("utf-8")
+        )
+        chunks.append(data)
+        chunks.append(b"\r\n")
+    chunks.append(f"--{boundary}--\r\n".encode("ascii"))
+    return b"".join(chunks), f"multipart/form-data; boundary={boundary}"
+
+
+def run_level(url, path, payloads, concurrency, total_requests, headers):
+    """Прогон с concurrency клиентами; каждый держит одно keep-alive соединение"""
+    requests = itertools.islice(itertools.cycle(payloads), total_requests)
+    lock = threading.Lock()
+    latencies, statuses, documents = [], {}, [0]
+
+    def client():
+        connection = http.client.HTTPConnection(url.hostname, url.port or 80, timeout=300)
+        while True:
+            with lock:
+                item = next(requests, None)
+            if item is None:
+                break
+            body, content_type, count = item
+            started = time.perf_counter()
+            try:
+                connection.request("POST", path, body, {**headers, "Content-Type": content_type})
+                response = connection.getresponse()
+                response.read()
+                status = response.status
+            except (OSError, http.client.HTTPException):
+                status = "connection error"
+                connection.close()
+                connection = http.client.HTTPConnection(url.hostname, url.port or 80, timeout=300)
+            elapsed = (time.perf_counter() - started) * 1000
+            with lock:
+                statuses[status] = statuses.get(status, 0) + 1
+                if status == 200:
+                    latencies.append(elapsed)
+                    documents[0] += count
+        connection.close()
+
+    started = time.perf_counter()
+    threads = [threading.Thread(target=client) for _ in range(concurrency)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    wall = time.perf_counter() - started
+
+    row = {
+        "concurrency": concurrency,
+        "requests": sum(statuses.values()),
+        "statuses": {str(k): v for k, v in statuses.items()},
+        "documents_per_second": round(documents[0] / wall, 2) if wall else None,
+        "wall_s": round(wall, 3),
+    }
+    if latencies:
+        row.update({
+            "p50_ms": round(statistics.median(latencies), 2),
+            "p95_ms": round(percentile(latencies, 95), 2),
+            "p99_ms": round(percentile(latencies, 99), 2),
+        })
+    return row
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Нагрузочный тест HTTP API классификации")
+    parser.add_argument("--url", default="http://localhost:8502", help="Адрес API")
+    parser.add_argument("--model", default=None, help="Модель (по умолчанию — модель API по умолчанию)")
+    parser.add_argument("--concurrency", default="1,4,16", help="Уровни одновременных клиентов через запятую")
+    parser.add_argument("--requests", type=int, default=100, help="Запросов на каждом уровне")
+    parser.add_argument("--batch-size", type=int, default=0, help="Документов в запросе /classify/batch (0 — /classify)")
+    parser.add_argument("--corpus", type=Path, default=None, help="Каталог с документами")
+    parser.add_argument("--per-size", type=int, default=3, help="Размер синтетического корпуса")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--api-key", default=None, help="Значение API_KEY сервера")
+    parser.add_argument("--json", type=Path, default=None, help="Сохранить отчет в JSON")
+    args = parser.parse_args()
+
+    url = urlparse(args.url)
+    corpus = load_corpus(args.corpus if args.corpus else None, args.per_size, args.seed)
+    if not corpus:
+        raise SystemExit("Корпус пуст")
+
+    if args.batch_size:
+        path = "/classify/batch"
+        groups = [corpus[i:i + args.batch_size] for i in range(0, len(corpus), args.batch_size)]
+    else:
+        path = "/classify"
+        groups = [[item] for item in corpus]
+    if args.model:
+        path += f"?model={quote(args.model)}"
+    payloads = [(*multipart(group), len(group)) for group in groups]
+    headers = {"X-API-Key": args.api_key} if args.api_key else {}
+
+    print(f"{args.url}{path}: документов в корпусе {len(corpus)}, запросов на уровень {args.requests}")
+    report = []
+    for concurrency in [int(c) for c in args.concurrency.split(",") if c.strip()]:
+        row = run_level(url, path, payloads, concurrency, args.requests, headers)
+        report.append(row)
+        print(
+            f"    клиентов {concurrency:>4} | {row['documents_per_second'] or 0:8.2f} док/с | "
+            f"p50 {row.get('p50_ms', 0):8.1f} мс | p95 {row.get('p95_ms', 0):8.1f} мс | "
+            f"p99 {row.get('p99_ms', 0):8.1f} мс | ответы {row['statuses']}"
+        )
+
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump({"url": args.url, "path": path, "batch_size": args.batch_size, "levels": report},
+                      f, ensure_ascii=False, indent=2)
+
+
+if __name__ == "__main__":
+    main()
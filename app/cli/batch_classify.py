@@ -0,0 +1,275 @@
+"""Пакетная классификация документов без интерфейса (бэкфиллы, массовые задания).
+
+Классифицирует каталоги (рекурсивно), ZIP-архивы и списки файлов тем же
+конвейером, что и приложение (classify_document), в нескольких процессах.
+Результаты пишутся построчно в JSONL или CSV; при --db они сохраняются в БД
+пачками по --db-batch документов от имени --user-id. Выходной файл служит
+контрольной точкой: с --resume уже классифицированные документы пропускаются.
+В конце печатается сводка пропускной способности.
+
+Запуск из каталога, в котором работает приложение (относительные пути
+Config, например MODELS_DIR, считаются от текущего каталога):
+    python -m app.cli.batch_classify /data/backlog --output results.jsonl
+    python -m app.cli.batch_classify archive.zip --files-from list.txt --output results.csv --workers 8
+    python -m app.cli.batch_classify /data/backlog --output results.jsonl --resume --db --user-id 1
+"""
+import argparse
+import csv
+import json
+import multiprocessing
+import os
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+from utils import model_registry, search_utils
+from utils.budget_utils import TextBudget
+from utils.metrics_utils import STAGES, StageTimer
+from utils.ml_utils import MODELS, classify_document, translate_prediction
+from utils.zip_utils import ArchiveRejected, safe_extract
+from .cli_utils import MIME_TYPES
+
+
+CSV_COLUMNS = [
+    "key", "filename", "model", "model_version", "prediction", "class", "confidence",
+    "word_count", "lang", "file_size", "total_ms", "error",
+]
+
+# Состояние процесса-исполнителя (задается в _init_worker)
+_worker = {}
+
+
+def collect_inputs(paths, files_from, tmpdir):
+    """[(ключ, путь на диске, имя файла)]; ключ однозначно определяет документ между запусками"""
+    items = []
+    sources = list(paths)
+    if files_from:
+        with open(files_from, encoding="utf-8") as f:
+            sources += [Path(line.strip()) for line in f if line.strip()]
+
+    for source in sources:
+        if source.is_dir():
+            for path in sorted(source.rglob("*")):
+                if path.suffix.lower().lstrip(".") in MIME_TYPES:
+                    items.append((str(path.resolve()), str(path), path.name))
+        elif source.suffix.lower() == ".zip":
+            dest = Path(tmpdir) / f"{len(items)}_{source.stem}"
+            try:
+                extracted, rejected = safe_extract(str(source), str(dest), [f".{fmt}" for fmt in MIME_TYPES])
+            except ArchiveRejected as e:
+                print(f"Архив {source} отклонен: {e}", file=sys.stderr)
+                continue
+            for name, reason in rejected:
+                print(f"{source}!{name}: отклонен ({reason})", file=sys.stderr)
+            for name, path in extracted:
+                items.append((f"{source.resolve()}!{name}", path, os.path.basename(path)))
+        elif source.suffix.lower().lstrip(".") in MIME_TYPES and source.is_file():
+            items.append((str(source.resolve()), str(source), source.name))
+        else:
+            print(f"Пропущено: {source}", file=sys.stderr)
+    return items
+
+
+def completed_keys(output, fmt):
+    """Ключи документов, успешно классифицированных в предыдущих запусках"""
+    if not output.exists():
+        return set()
+    with open(output, encoding="utf-8", newline="") as f:
+        if fmt == "csv":
+            rows = csv.DictReader(f)
+        else:
+            rows = (json.loads(line) for line in f if line.strip())
+        return {row["key"] for row in rows if not row.get("error")}
+
+
+def _init_worker(model_name, budget_spec):
+    _worker["model"] = model_name
+    _worker["budget"] = TextBudget.parse(budget_spec) if budget_spec else TextBudget.from_config()
+    # При fork набор уже загружен в родителе и разделяется копированием при записи
+    _worker["model_set"] = model_registry.active()
+
+
+def classify_item(item):
+    key, path, filename = item
+    model_name = _worker["model"]
+    record = {"key": key, "filename": filename, "model": model_name, "error": None}
+    timer = StageTimer()
+    try:
+        # Файл читается по пути потоково, формат определяется по содержимому
+        with model_registry.pinned() as model_set:
+            prediction, confidence, _, word_count, lang = classify_document(
+                path, model_name,
+                model_set.vectorizer, timer, _worker["budget"]
+            )
+        if prediction is None:
+            record["error"] = "документ без текста или ошибка классификации"
+        else:
+            record.update({
+                "prediction": str(prediction),
+                "class": translate_prediction(prediction, model_name),
+                "confidence": round(float(confidence), 4) if confidence is not None else None,
+                "word_count": word_count,
+                "lang": lang,
+            })
+    except Exception as e:
+        record["error"] = str(e)
+    record["metrics"] = timer.as_row(model_name, "batch")
+    record["features"] = timer.info.get("features")
+    record["text"] = timer.info.get("text")
+    record["model_version"] = record["metrics"]["model_version"]
+    record["file_size"] = record["metrics"]["file_size"]
+    record["total_ms"] = record["metrics"]["total_ms"]
+    return record
+
+
+class ResultWriter:
+    """Пишет результаты пачками: сначала в БД (если нужно), затем в выходной файл"""
+
+    def __init__(self, output, fmt, db=None, user_id=None, batch_size=500):
+        self.fmt = fmt
+        self.db = db
+        self.user_id = user_id
+        self.batch_size = batch_size
+        self.buffer = []
+        new_file = not output.exists() or output.stat().st_size == 0
+        self.file = open(output, "a", encoding="utf-8", newline="")
+        if fmt == "csv":
+            self.csv = csv.DictWriter(self.file, CSV_COLUMNS, extrasaction="ignore")
+            if new_file:
+                self.csv.writeheader()
+
+    def add(self, record):
+        self.buffer.append(record)
+        if len(self.buffer) >= self.batch_size:
+            self.flush()
+
+    def flush(self):
+        if not self.buffer:
+            return
+        if self.db is not None:
+            ok = [r for r in self.buffer if r["error"] is None]
+            ids, doc_ids = self.db.create_batch_classifications(
+                self.user_id, [(r["filename"], r["model"], r["class"], r["confidence"]) for r in ok],
+                [r["features"] for r in ok]
+            )
+            if ok and not ids:
+                # Пачка не записана: документы останутся незавершенными и повторятся при --resume
+                for r in ok:
+                    r["error"] = "ошибка записи в БД"
+            else:
+                self.db.create_classification_metrics([
+                    {"id_classification": cid, **r["metrics"]} for cid, r in zip(ids, ok)
+                ])
+                if search_utils.enabled():
+                    # Пачка индексируется сразу одним сегментом, без фоновой очереди
+                    search_utils.get_index().add([(doc_id, r["text"]) for doc_id, r in zip(doc_ids, ok)])
+        for record in self.buffer:
+            row = {k: v for k, v in record.items() if k not in ("metrics", "features", "text")}
+            if self.fmt == "csv":
+                self.csv.writerow(row)
+            else:
+                self.file.write(json.dumps(row, ensure_ascii=False) + "\n")
+        self.file.flush()
+        self.buffer = []
+
+    def close(self):
+        self.flush()
+        self.file.close()
+
+
+class Summary:
+    """Счетчики пропускной способности без хранения всех результатов в памяти"""
+
+    def __init__(self):
+        self.documents = 0
+        self.ok = 0
+        self.bytes = 0
+        self.stage_sums = {}
+        self.stage_counts = {}
+
+    def add(self, record):
+        self.documents += 1
+        self.ok += record["error"] is None
+        self.bytes += record.get("file_size") or 0
+        for stage in STAGES + ["total"]:
+            value = record["metrics"].get(f"{stage}_ms")
+            if value is not None:
+                self.stage_sums[stage] = self.stage_sums.get(stage, 0.0) + value
+                self.stage_counts[stage] = self.stage_counts.get(stage, 0) + 1
+
+    def print(self, skipped, elapsed):
+        print(f"\nДокументов: {self.documents} (успешно {self.ok}, ошибок {self.documents - self.ok}), "
+              f"пропущено по контрольной точке: {skipped}")
+        if elapsed > 0:
+            print(f"Время: {elapsed:.1f} с | {self.documents / elapsed:.1f} док/с | "
+                  f"{self.bytes / 1e6 / elapsed:.2f} МБ/с")
+        for stage, total in self.stage_sums.items():
+            print(f"    {stage:<12} среднее {total / self.stage_counts[stage]:9.2f} мс на документ")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Пакетная классификация документов")
+    parser.add_argument("inputs", nargs="*", type=Path, help="Файлы, каталоги и ZIP-архивы")
+    parser.add_argument("--files-from", type=Path, default=None, help="Файл со списком путей (по одному в строке)")
+    parser.add_argument("--model", default="Логистическая регрессия", choices=list(MODELS), help="Модель")
+    parser.add_argument("--output", type=Path, required=True, help="Файл результатов .jsonl или .csv")
+    parser.add_argument("--format", choices=["jsonl", "csv"], default=None, help="Формат (по умолчанию по расширению)")
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1, help="Число процессов")
+    parser.add_argument("--budget", default=None, help="Бюджет текста: head:N или sampled:N (по умолчанию из .env)")
+    parser.add_argument("--resume", action="store_true", help="Пропустить документы, уже записанные в --output")
+    parser.add_argument("--db", action="store_true", help="Сохранять результаты в БД")
+    parser.add_argument("--user-id", type=int, default=None, help="Пользователь, от имени которого пишутся записи")
+    parser.add_argument("--db-batch", type=int, default=500, help="Документов в одной транзакции")
+    args = parser.parse_args()
+
+    if not args.inputs and not args.files_from:
+        parser.error("укажите файлы, каталоги или --files-from")
+    if args.db and args.user_id is None:
+        parser.error("для --db нужен --user-id")
+    output = args.output
+    fmt = args.format or ("csv" if output.suffix.lower() == ".csv" else "jsonl")
+    if output.exists() and output.stat().st_size and not args.resume:
+        sys.exit(f"{output} уже существует: используйте --resume или другой файл")
+
+    db = None
+    if args.db:
+        from database.db_operations import Database
+        db = Database()
+
+    # Набор моделей загружается до запуска процессов, чтобы они разделяли его память
+    model_set = model_registry.active()
+    print(f"Модель: {args.model}, версия набора: {model_set.version}, процессов: {args.workers}")
+
+    with tempfile.TemporaryDirectory() as tmpdir:
+        items = collect_inputs(args.inputs, args.files_from, tmpdir)
+        done = completed_keys(output, fmt) if args.resume else set()
+        pending = [item for item in items if item[0] not in done]
+        print(f"Найдено документов: {len(items)}, к обработке: {len(pending)}")
+
+        writer = ResultWriter(output, fmt, db, args.user_id, args.db_batch if db else 50)
+        summary = Summary()
+        started = time.perf_counter()
+        pool = multiprocessing.Pool(args.workers, _init_worker, (args.model, args.budget))
+        try:
+            for record in pool.imap_unordered(classify_item, pending, chunksize=8):
+                writer.add(record)
+                summary.add(record)
+                if summary.documents % 1000 == 0:
+                    rate = summary.documents / (time.perf_counter() - started)
+                    print(f"    {summary.documents}/{len(pending)} ({rate:.1f} док/с)")
+            pool.close()
+        except KeyboardInterrupt:
+            print("\nОстановлено: обработанные документы сохранены, продолжите с --resume")
+            pool.terminate()
+        except Exception:
+            pool.terminate()
+            raise
+        finally:
+            pool.join()
+            writer.close()
+        summary.print(len(items) - len(pending), time.perf_counter() - started)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,91 @@
+"""Пропускная способность микробатчинга при всплеске одновременных запросов.
+
+Имитирует --sessions сессий, которые одновременно классифицируют по одному
+документу (векторизация и предсказание, как в classify_document), сначала
+каждая сама, затем через диспетчер микробатчинга с разными окнами ожидания.
+Печатает документы в секунду, задержку p50/p95 и процессорное время на документ.
+
+Запуск из каталога, в котором работает приложение (относительные пути
+Config, например MODELS_DIR, считаются от текущего каталога):
+    python -m app.cli.batching_bench --sessions 50 --rounds 5
+    python -m app.cli.batching_bench --model "Наивный Байес" --waits 2,5,10 --max-batch 64
+"""
+import argparse
+import random
+import statistics
+import threading
+import time
+
+from .cli_utils import load_vocabulary, make_text, percentile
+
+from utils.auth_utils import load_vectorizer
+from utils.batching_utils import MicroBatcher
+from utils.ml_utils import MODELS, load_model, predict_with_model
+
+
+def run_burst(texts, score):
+    """Все сессии стартуют одновременно; возвращает (стена, задержки мс, процессорное время)"""
+    barrier = threading.Barrier(len(texts) + 1)
+    latencies = [0.0] * len(texts)
+
+    def session(i):
+        barrier.wait()
+        started = time.perf_counter()
+        score(texts[i])
+        latencies[i] = (time.perf_counter() - started) * 1000
+
+    threads = [threading.Thread(target=session, args=(i,)) for i in range(len(texts))]
+    for thread in threads:
+        thread.start()
+    cpu_started = time.process_time()
+    barrier.wait()
+    started = time.perf_counter()
+    for thread in threads:
+        thread.join()
+    return time.perf_counter() - started, latencies, time.process_time() - cpu_started
+
+
+def measure(name, texts_per_round, score):
+    walls, latencies, cpu = [], [], 0.0
+    for texts in texts_per_round:
+        wall, round_latencies, round_cpu = run_burst(texts, score)
+        walls.append(wall)
+        latencies += round_latencies
+        cpu += round_cpu
+    documents = len(latencies)
+    print(f"    {name:<22} {documents / sum(walls):8.1f} док/с | p50 {statistics.median(latencies):7.1f} мс | "
+          f"p95 {percentile(latencies, 95):7.1f} мс | CPU {cpu / documents * 1000:6.2f} мс/док")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Микробатчинг: всплеск одновременных классификаций")
+    parser.add_argument("--model", default="Логистическая регрессия", choices=list(MODELS))
+    parser.add_argument("--sessions", type=int, default=50, help="Одновременных сессий во всплеске")
+    parser.add_argument("--rounds", type=int, default=5, help="Число всплесков")
+    parser.add_argument("--words", type=int, default=300, help="Слов в документе")
+    parser.add_argument("--waits", default="2,5,10", help="Окна ожидания диспетчера, мс")
+    parser.add_argument("--max-batch", type=int, default=32)
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args()
+
+    vectorizer = load_vectorizer()
+    model = load_model(args.model)
+    if vectorizer is None or model is None:
+        raise SystemExit("Не удалось загрузить векторизатор или модель")
+
+    rng = random.Random(args.seed)
+    vocabulary = load_vocabulary(vectorizer)
+    texts_per_round = [[make_text(rng, vocabulary, args.words) for _ in range(args.sessions)]
+                       for _ in range(args.rounds)]
+
+    print(f"{args.model}: {args.rounds} всплесков по {args.sessions} документов из {args.words} слов")
+    measure("без батчинга", texts_per_round,
+            lambda text: predict_with_model(model, args.model, vectorizer.transform([text])))
+    for wait in [float(w) for w in args.waits.split(",") if w.strip()]:
+        batcher = MicroBatcher(args.max_batch, wait)
+        measure(f"окно {wait:g} мс", texts_per_round,
+                lambda text, batcher=batcher: batcher.score(vectorizer, model, args.model, text))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,222 @@
+"""Бенчмарк конвейера классификации.
+
+Генерирует синтетический корпус txt/pdf/docx разных размеров, замеряет каждый
+этап classify_document (извлечение, langdetect, векторизация, загрузка модели,
+предсказание) для всех моделей из MODELS и пропускную способность обработки
+архива (БД заменена заглушкой). Результаты сохраняются в JSON, а при повторном
+запуске сравниваются с предыдущим прогоном.
+
+Запуск из каталога, в котором работает приложение (относительные пути
+Config, например MODELS_DIR, считаются от текущего каталога):
+    python -m app.cli.benchmark
+    python -m app.cli.benchmark --repeat 5 --threshold 0.15 --fail-on-regression
+"""
+import argparse
+import io
+import json
+import platform
+import statistics
+import sys
+import tempfile
+import time
+import zipfile
+from datetime import datetime
+from pathlib import Path
+
+
+from .cli_utils import MIME_TYPES, UploadedFileStub, generate_corpus, load_vocabulary, percentile
+from utils.auth_utils import load_vectorizer
+from utils.file_utils import extract_text_from_file
+from utils.ml_utils import MODELS, MODELS_ZIP, load_model, predict_with_model, _load_model_from_disk
+from utils.archive_utils import classify_archive
+from langdetect import detect, DetectorFactory
+
+
+DEFAULT_BASELINE = Path(__file__).resolve().parent / "benchmark_baseline.json"
+
+FORMATS = ["txt", "pdf", "docx"]
+
+# Метрики с этим суффиксом — «больше значит лучше»
+HIGHER_IS_BETTER_SUFFIX = "_per_sec"
+
+
+class StubDatabase:
+    """Заглушка Database для прогона архивной логики без MySQL"""
+
+    def __init__(self):
+        self._next_id = 0
+
+    def create_archive_classification(self, **kwargs):
+        self._next_id += 1
+        return self._next_id, self._next_id
+
+    def update_zip_file_count(self, folder_zip_id, new_count):
+        return True
+
+    def create_classification_metrics(self, rows):
+        return True
+
+
+# --- Замеры ---
+
+def timed(func, *args):
+    start = time.perf_counter()
+    result = func(*args)
+    return result, (time.perf_counter() - start) * 1000
+
+
+def summarize(samples):
+    """{имя метрики: [мс]} -> {имя метрики_p50/_p95: мс}"""
+    summary = {}
+    for name, values in sorted(samples.items()):
+        summary[f"{name}/p50_ms"] = round(statistics.median(values), 3)
+        summary[f"{name}/p95_ms"] = round(percentile(values, 95), 3)
+    return summary
+
+
+def bench_stages(corpus, vectorizer, models, repeat):
+    samples = {}
+
+    def add(name, value):
+        samples.setdefault(name, []).append(value)
+
+    for _ in range(repeat):
+        for name, fmt, size_name, data in corpus:
+            text, ms = timed(extract_text_from_file, UploadedFileStub(data, name, MIME_TYPES[fmt]))
+            add(f"extract/{fmt}/{size_name}", ms)
+            if not text:
+                continue
+
+            _, ms = timed(detect, text)
+            add(f"langdetect/{size_name}", ms)
+
+            vector, ms = timed(vectorizer.transform, [text])
+            add(f"vectorize/{size_name}", ms)
+
+            for model_name, model in models.items():
+                _, ms = timed(predict_with_model, model, model_name, vector)
+                add(f"predict/{model_name}/{size_name}", ms)
+
+    # Холодная загрузка с диска (в приложении модели кэшируются на процесс)
+    for model_name in models:
+        for _ in range(repeat):
+            _, ms = timed(_load_model_from_disk, model_name)
+            add(f"load_model/{model_name}", ms)
+
+    return summarize(samples)
+
+
+def bench_archive(corpus, vectorizer, repeat):
+    archive = io.BytesIO()
+    with zipfile.ZipFile(archive, "w", zipfile.ZIP_DEFLATED) as zipf:
+        for name, _, _, data in corpus:
+            zipf.writestr(name, data)
+    archive_bytes = archive.getvalue()
+
+    metrics = {}
+    for model_name in MODELS_ZIP:
+        rates = []
+        for _ in range(repeat):
+            with tempfile.TemporaryDirectory() as tmpdir:
+                start = time.perf_counter()
+                processed, _ = classify_archive(
+                    io.BytesIO(archive_bytes), model_name, vectorizer, StubDatabase(), 0, 0, tmpdir
+                )
+                elapsed = time.perf_counter() - start
+            rates.append(processed / elapsed if elapsed else 0.0)
+        metrics[f"archive/{model_name}/files{HIGHER_IS_BETTER_SUFFIX}"] = round(statistics.median(rates), 3)
+    return metrics
+
+
+# --- Сравнение с предыдущим прогоном ---
+
+def compare(previous, current, threshold, noise_floor_ms):
+    """Возвращает (регрессии, улучшения) как списки строк отчета"""
+    regressions, improvements = [], []
+    for name, value in sorted(current.items()):
+        old = previous.get(name)
+        if not old:
+            continue
+        higher_is_better = name.endswith(HIGHER_IS_BETTER_SUFFIX)
+        change = (value - old) / old
+        if not higher_is_better and abs(value - old) < noise_floor_ms:
+            continue
+        worse = change < -threshold if higher_is_better else change > threshold
+        better = change > threshold if higher_is_better else change < -threshold
+        line = f"{name}: {old} -> {value} ({change:+.1%})"
+        if worse:
+            regressions.append(line)
+        elif better:
+            improvements.append(line)
+    return regressions, improvements
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Бенчмарк конвейера классификации")
+    parser.add_argument("--baseline", type=Path, default=DEFAULT_BASELINE,
+                        help="JSON с результатами предыдущего прогона (перезаписывается)")
+    parser.add_argument("--repeat", type=int, default=3, help="Повторов каждого замера")
+    parser.add_argument("--per-size", type=int, default=3, help="Документов каждого формата на размер")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--threshold", type=float, default=0.2,
+                        help="Допустимое относительное ухудшение (0.2 = 20%%)")
+    parser.add_argument("--noise-floor-ms", type=float, default=1.0,
+                        help="Изменения меньше этого значения не считаются регрессией")
+    parser.add_argument("--no-archive", action="store_true", help="Не замерять обработку архива")
+    parser.add_argument("--no-save", action="store_true", help="Не перезаписывать baseline")
+    parser.add_argument("--fail-on-regression", action="store_true",
+                        help="Код возврата 1 при обнаружении регрессий")
+    args = parser.parse_args()
+
+    # langdetect недетерминирован без фиксированного seed
+    DetectorFactory.seed = args.seed
+
+    vectorizer = load_vectorizer()
+    if vectorizer is None:
+        sys.exit("Не удалось загрузить векторизатор")
+    models = {name: load_model(name) for name in MODELS}
+    models = {name: model for name, model in models.items() if model is not None}
+
+    corpus = generate_corpus(load_vocabulary(vectorizer), args.per_size, args.seed)
+    print(f"Корпус: {len(corpus)} файлов, модели: {', '.join(models)}")
+
+    metrics = bench_stages(corpus, vectorizer, models, args.repeat)
+    if not args.no_archive:
+        metrics.update(bench_archive(corpus, vectorizer, args.repeat))
+
+    for name, value in metrics.items():
+        print(f"{name:<70} {value:>12}")
+
+    previous = {}
+    if args.baseline.exists():
+        with open(args.baseline, encoding="utf-8") as f:
+            previous = json.load(f).get("metrics", {})
+
+    regressions, improvements = compare(previous, metrics, args.threshold, args.noise_floor_ms)
+    if previous:
+        print(f"\nСравнение с {args.baseline}:")
+        for line in improvements:
+            print(f"  ✅ {line}")
+        for line in regressions:
+            print(f"  ❌ {line}")
+        if not regressions and not improvements:
+            print("  Без существенных изменений")
+
+    if not args.no_save:
+        with open(args.baseline, "w", encoding="utf-8") as f:
+            json.dump({
+                "created_at": datetime.now().isoformat(timespec="seconds"),
+                "python": platform.python_version(),
+                "platform": platform.platform(),
+                "seed": args.seed,
+                "repeat": args.repeat,
+                "per_size": args.per_size,
+                "metrics": metrics,
+            }, f, ensure_ascii=False, indent=2)
+
+    if regressions and args.fail_on_regression:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
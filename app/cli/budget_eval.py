@@ -0,0 +1,129 @@
+"""Оценка режима бюджета текста: сколько времени экономит и как меняет предсказания.
+
+Для каждого документа размеченного корпуса и каждого бюджета замеряет извлечение
+текста, векторизацию и предсказание каждой моделью, а затем сравнивает
+предсказания с полным текстом (доля изменившихся) и с разметкой (точность).
+
+Корпус — каталог с подпапками-классами (Приказ/Постановление/Письмо/Общее или
+Order/Ordinance/Letters/Miscellaneous) с файлами txt/pdf/docx. Без --corpus
+используется синтетический корпус бенчмарка (только без точности).
+
+Запуск из каталога, в котором работает приложение (относительные пути
+Config, например MODELS_DIR, считаются от текущего каталога):
+    python -m app.cli.budget_eval --corpus data/labeled --budgets head:2000,head:10000,sampled:10000
+"""
+import argparse
+import json
+import statistics
+import sys
+import time
+from pathlib import Path
+
+from .cli_utils import (
+    MIME_TYPES, UploadedFileStub, generate_corpus, load_labeled_corpus, load_vocabulary, normalize_label,
+)
+
+from utils.auth_utils import load_vectorizer
+from utils.budget_utils import TextBudget
+from utils.file_utils import extract_text_from_file
+from utils.ml_utils import MODELS, load_model, predict_with_model
+
+
+DEFAULT_BUDGETS = "head:2000,head:5000,head:20000,sampled:5000,sampled:20000"
+
+def evaluate(corpus, vectorizer, models, budgets, repeat):
+    """{бюджет: {модель: {"latency_ms": [...], "predictions": [...]}}}"""
+    results = {}
+    for budget in budgets:
+        per_model = {name: {"latency_ms": [], "predictions": []} for name in models}
+        for name, fmt, _, data in corpus:
+            timings = []
+            for _ in range(repeat):
+                start = time.perf_counter()
+                text = extract_text_from_file(UploadedFileStub(data, name, MIME_TYPES[fmt]), None, budget)
+                vector = vectorizer.transform([text or ""])
+                timings.append((time.perf_counter() - start) * 1000)
+            prepare_ms = statistics.median(timings)
+
+            for model_name, model in models.items():
+                start = time.perf_counter()
+                prediction, _ = predict_with_model(model, model_name, vector)
+                predict_ms = (time.perf_counter() - start) * 1000
+                per_model[model_name]["latency_ms"].append(prepare_ms + predict_ms)
+                per_model[model_name]["predictions"].append(normalize_label(prediction))
+        results[str(budget)] = per_model
+    return results
+
+
+def report(results, labels, baseline_key):
+    summary = {}
+    baseline = results[baseline_key]
+    has_labels = all(label is not None for label in labels)
+    for budget_key, per_model in results.items():
+        summary[budget_key] = {}
+        for model_name, data in per_model.items():
+            full = baseline[model_name]
+            mean_ms = statistics.mean(data["latency_ms"])
+            full_ms = statistics.mean(full["latency_ms"])
+            changed = sum(a != b for a, b in zip(data["predictions"], full["predictions"]))
+            row = {
+                "mean_ms": round(mean_ms, 2),
+                "saved_pct": round((1 - mean_ms / full_ms) * 100, 1) if full_ms else 0.0,
+                "changed": changed,
+                "changed_pct": round(changed / len(labels) * 100, 1),
+            }
+            if has_labels:
+                correct = sum(p == label for p, label in zip(data["predictions"], labels))
+                row["accuracy_pct"] = round(correct / len(labels) * 100, 1)
+            summary[budget_key][model_name] = row
+    return summary
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Оценка бюджета текста на размеченном корпусе")
+    parser.add_argument("--corpus", type=Path, default=None, help="Каталог с подпапками-классами")
+    parser.add_argument("--budgets", default=DEFAULT_BUDGETS,
+                        help="Бюджеты через запятую: head:N, sampled:N")
+    parser.add_argument("--repeat", type=int, default=3, help="Повторов извлечения и векторизации")
+    parser.add_argument("--per-size", type=int, default=3, help="Размер синтетического корпуса")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--json", type=Path, default=None, help="Сохранить отчет в JSON")
+    args = parser.parse_args()
+
+    vectorizer = load_vectorizer()
+    if vectorizer is None:
+        sys.exit("Не удалось загрузить векторизатор")
+    models = {name: load_model(name) for name in MODELS}
+    models = {name: model for name, model in models.items() if model is not None}
+
+    if args.corpus:
+        corpus = load_labeled_corpus(args.corpus)
+    else:
+        corpus = [(name, fmt, None, data) for name, fmt, _, data in
+                  generate_corpus(load_vocabulary(vectorizer), args.per_size, args.seed)]
+    if not corpus:
+        sys.exit("Корпус пуст")
+
+    full = TextBudget()
+    budgets = [full] + [TextBudget.parse(spec.strip()) for spec in args.budgets.split(",") if spec.strip()]
+    print(f"Корпус: {len(corpus)} файлов, модели: {', '.join(models)}")
+
+    results = evaluate(corpus, vectorizer, models, budgets, args.repeat)
+    summary = report(results, [label for _, _, label, _ in corpus], str(full))
+
+    for budget_key, per_model in summary.items():
+        print(f"\n{budget_key}")
+        for model_name, row in per_model.items():
+            accuracy = f" | точность {row['accuracy_pct']:5.1f}%" if "accuracy_pct" in row else ""
+            print(
+                f"    {model_name:<45} {row['mean_ms']:9.2f} мс | экономия {row['saved_pct']:5.1f}% | "
+                f"изменилось {row['changed']:4d} ({row['changed_pct']:5.1f}%){accuracy}"
+            )
+
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump(summary, f, ensure_ascii=False, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,153 @@
+"""Общие помощники командных утилит: синтетический и размеченный корпуса,
+заглушка загруженного файла и перцентили замеров
+"""
+import io
+import random
+from pathlib import Path
+
+
+# Размеры документов в словах
+SIZES = {
+    "small": 200,
+    "medium": 2_000,
+    "large": 20_000,
+}
+
+MIME_TYPES = {
+    "txt": "text/plain",
+    "pdf": "application/pdf",
+    "docx": "application/vnd.openxmlformats-officedocument.wordprocessingml.document",
+}
+
+# Запасной словарь, если у векторизатора нет get_feature_names_out
+FALLBACK_WORDS = [
+    "приказ", "постановление", "письмо", "администрация", "муниципального",
+    "района", "утвердить", "положение", "порядок", "исполнение", "контроль",
+    "возложить", "заместителя", "главы", "уважаемый", "сообщаем", "просим",
+    "рассмотреть", "обращение", "документ", "основании", "федерального",
+    "закона", "внести", "изменения", "согласно", "приложению", "срок",
+]
+
+# Транслитерация для PDF: стандартный шрифт Helvetica не содержит кириллицы
+TRANSLIT = dict(zip(
+    "абвгдеёжзийклмнопрстуфхцчшщъыьэюя",
+    ["a", "b", "v", "g", "d", "e", "e", "zh", "z", "i", "y", "k", "l", "m", "n", "o",
+     "p", "r", "s", "t", "u", "f", "h", "ts", "ch", "sh", "sch", "", "y", "", "e", "yu", "ya"]
+))
+
+
+class UploadedFileStub(io.BytesIO):
+    """Аналог streamlit UploadedFile: байты + имя + MIME-тип"""
+
+    def __init__(self, data, name, mime_type):
+        super().__init__(data)
+        self.name = name
+        self.type = mime_type
+
+
+def load_vocabulary(vectorizer):
+    try:
+        words = [w for w in vectorizer.get_feature_names_out() if w.isalpha() and len(w) > 2]
+    except AttributeError:
+        words = []
+    return words or FALLBACK_WORDS
+
+
+def make_text(rng, vocabulary, n_words):
+    lines = []
+    for start in range(0, n_words, 12):
+        lines.append(" ".join(rng.choice(vocabulary) for _ in range(min(12, n_words - start))))
+    return "\n".join(lines)
+
+
+def make_pdf(text, lines_per_page=50):
+    """Минимальный PDF с текстом Helvetica, без внешних зависимостей"""
+    latin = "".join(TRANSLIT.get(ch, ch) for ch in text.lower())
+    lines = [line.encode("latin-1", "replace").decode("latin-1") for line in latin.splitlines()]
+    pages = [lines[i:i + lines_per_page] for i in range(0, len(lines), lines_per_page)] or [[""]]
+
+    objects = {
+        1: b"<< /Type /Catalog /Pages 2 0 R >>",
+        3: b"<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica >>",
+    }
+    kids = []
+    for index, page_lines in enumerate(pages):
+        page_id, content_id = 4 + index * 2, 5 + index * 2
+        kids.append(f"{page_id} 0 R")
+        stream = ["BT /F1 10 Tf 12 TL 40 800 Td"]
+        for line in page_lines:
+            escaped = line.replace("\\", "\\\\").replace("(", "\\(").replace(")", "\\)")
+            stream.append(f"({escaped}) Tj T*")
+        stream.append("ET")
+        data = "\n".join(stream).encode("latin-1")
+        objects[page_id] = (
+            f"<< /Type /Page /Parent 2 0 R /MediaBox [0 0 595 842] "
+            f"/Resources << /Font << /F1 3 0 R >> >> /Contents {content_id} 0 R >>"
+        ).encode()
+        objects[content_id] = b"<< /Length %d >>\nstream\n" % len(data) + data + b"\nendstream"
+    objects[2] = f"<< /Type /Pages /Kids [{' '.join(kids)}] /Count {len(kids)} >>".encode()
+
+    out = io.BytesIO()
+    out.write(b"%PDF-1.4\n")
+    offsets = {}
+    for obj_id in sorted(objects):
+        offsets[obj_id] = out.tell()
+        out.write(b"%d 0 obj\n" % obj_id + objects[obj_id] + b"\nendobj\n")
+    xref = out.tell()
+    out.write(b"xref\n0 %d\n0000000000 65535 f \n" % (len(objects) + 1))
+    for obj_id in sorted(objects):
+        out.write(b"%010d 00000 n \n" % offsets[obj_id])
+    out.write(b"trailer\n<< /Size %d /Root 1 0 R >>\nstartxref\n%d\n%%%%EOF\n" % (len(objects) + 1, xref))
+    return out.getvalue()
+
+
+def make_docx(text):
+    from docx import Document
+    document = Document()
+    for line in text.splitlines():
+        document.add_paragraph(line)
+    buffer = io.BytesIO()
+    document.save(buffer)
+    return buffer.getvalue()
+
+
+def generate_corpus(vocabulary, per_size, seed):
+    """Возвращает список (имя, формат, размер, байты)"""
+    rng = random.Random(seed)
+    corpus = []
+    for size_name, n_words in SIZES.items():
+        for i in range(per_size):
+            text = make_text(rng, vocabulary, n_words)
+            corpus.append((f"{size_name}_{i}.txt", "txt", size_name, text.encode("utf-8")))
+            corpus.append((f"{size_name}_{i}.pdf", "pdf", size_name, make_pdf(text)))
+            corpus.append((f"{size_name}_{i}.docx", "docx", size_name, make_docx(text)))
+    return corpus
+
+
+def percentile(values, pct):
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, max(0, round(pct / 100 * (len(ordered) - 1))))
+    return ordered[index]
+
+
+def normalize_label(label):
+    """Русское название класса для имени папки корпуса или предсказания модели"""
+    from utils.ml_utils import CLASS_NAMES, CLUSTER_NAMES
+
+    if not isinstance(label, str):
+        try:
+            return CLUSTER_NAMES.get(int(label), str(label))
+        except (TypeError, ValueError):
+            return str(label)
+    return CLASS_NAMES.get(label, label)
+
+
+def load_labeled_corpus(root):
+    """Возвращает список (имя, формат, метка, байты) из подпапок-классов"""
+    corpus = []
+    for label_dir in sorted(p for p in Path(root).iterdir() if p.is_dir()):
+        for path in sorted(label_dir.rglob("*")):
+            fmt = path.suffix.lower().lstrip(".")
+            if fmt in MIME_TYPES:
+                corpus.append((path.name, fmt, normalize_label(label_dir.name), path.read_bytes()))
+    return corpus
@@ -0,0 +1,165 @@
+"""Сжатие набора моделей: удаление малозначимых признаков и float32-веса.
+
+Загружает векторизатор и модели из --source, удаляет признаки, вес которых во
+всех моделях ниже --threshold, и сохраняет согласованный набор в --output.
+Затем сравнивает исходный и сжатый наборы: память, размер файлов, время
+загрузки, задержку векторизации и предсказания и долю совпадающих предсказаний
+на тестовом корпусе (--corpus или синтетический корпус).
+
+Чтобы приложение использовало сжатый набор, укажите MODELS_DIR=<output>.
+
+Запуск из каталога, в котором работает приложение (относительные пути
+Config, например MODELS_DIR, считаются от текущего каталога):
+    python -m app.cli.compact_models --threshold 0.01 --output models_compact
+    python -m app.cli.compact_models --threshold 0.05 --corpus data/labeled --json compaction.json
+"""
+import argparse
+import json
+import os
+import statistics
+import sys
+import time
+from pathlib import Path
+
+import joblib
+from utils.compaction_utils import compact_model_set
+from utils.file_utils import extract_text_from_file
+from utils.ml_utils import predict_with_model
+from utils.model_set_utils import VECTORIZER_FILE, load_model_set, model_files, save_model_set
+from utils.monitoring_utils import estimate_nbytes
+from .cli_utils import MIME_TYPES, UploadedFileStub, generate_corpus, load_vocabulary
+
+
+def load_texts(corpus_dir, vectorizer, per_size, seed):
+    if corpus_dir:
+        files = [
+            (path.name, path.suffix.lower().lstrip("."), path.read_bytes())
+            for path in sorted(Path(corpus_dir).rglob("*"))
+            if path.suffix.lower().lstrip(".") in MIME_TYPES
+        ]
+    else:
+        files = [(name, fmt, data) for name, fmt, _, data in
+                 generate_corpus(load_vocabulary(vectorizer), per_size, seed)]
+    texts = [extract_text_from_file(UploadedFileStub(data, name, MIME_TYPES[fmt])) for name, fmt, data in files]
+    return [text for text in texts if text]
+
+
+def measure_load(directory, repeat):
+    """Медиана времени joblib.load по каждому файлу набора, мс"""
+    timings = {}
+    for fname in [VECTORIZER_FILE, *model_files().values()]:
+        samples = []
+        for _ in range(repeat):
+            start = time.perf_counter()
+            joblib.load(os.path.join(directory, fname))
+            samples.append((time.perf_counter() - start) * 1000)
+        timings[fname] = statistics.median(samples)
+    return timings
+
+
+def measure_set(vectorizer, models, texts):
+    """Средняя задержка векторизации и предсказания каждой модели и сами предсказания"""
+    vectorize_ms, vectors = [], []
+    for text in texts:
+        start = time.perf_counter()
+        vectors.append(vectorizer.transform([text]))
+        vectorize_ms.append((time.perf_counter() - start) * 1000)
+
+    per_model = {}
+    for name, model in models.items():
+        predictions, latencies = [], []
+        for vector in vectors:
+            start = time.perf_counter()
+            prediction, _ = predict_with_model(model, name, vector)
+            latencies.append((time.perf_counter() - start) * 1000)
+            predictions.append(str(prediction))
+        per_model[name] = {"predict_ms": statistics.mean(latencies), "predictions": predictions}
+    return statistics.mean(vectorize_ms), per_model
+
+
+def directory_size(directory, files):
+    return sum(os.path.getsize(os.path.join(directory, fname)) for fname in files)
+
+
+def gain(before, after):
+    return round((1 - after / before) * 100, 1) if before else 0.0
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Сжатие словаря и весов моделей")
+    parser.add_argument("--source", default="models", help="Каталог исходного набора")
+    parser.add_argument("--output", default="models_compact", help="Каталог сжатого набора")
+    parser.add_argument("--threshold", type=float, default=0.01,
+                        help="Минимальный относительный вес признака хотя бы в одной модели")
+    parser.add_argument("--no-float32", action="store_true", help="Оставить веса во float64")
+    parser.add_argument("--corpus", type=Path, default=None, help="Каталог с тестовыми документами")
+    parser.add_argument("--per-size", type=int, default=3, help="Размер синтетического корпуса")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--repeat", type=int, default=3, help="Повторов замера загрузки")
+    parser.add_argument("--json", type=Path, default=None, help="Сохранить отчет в JSON")
+    args = parser.parse_args()
+
+    vectorizer, models = load_model_set(args.source)
+    compact_vectorizer, compact_models, keep = compact_model_set(
+        vectorizer, models, args.threshold, float32=not args.no_float32
+    )
+    n_features = len(vectorizer.vocabulary_)
+    save_model_set(args.output, compact_vectorizer, compact_models, {
+        "kind": "compact",
+        "base": args.source,
+        "threshold": args.threshold,
+        "float32": not args.no_float32,
+        "features_before": n_features,
+        "features_after": int(keep.size),
+    })
+    print(f"Признаков: {n_features} -> {keep.size} ({gain(n_features, keep.size)}% удалено), "
+          f"сохранено в {args.output}")
+
+    texts = load_texts(args.corpus, vectorizer, args.per_size, args.seed)
+    if not texts:
+        sys.exit("Тестовый корпус пуст")
+
+    files = [VECTORIZER_FILE, *model_files().values()]
+    load_before, load_after = measure_load(args.source, args.repeat), measure_load(args.output, args.repeat)
+    vectorize_before, before = measure_set(vectorizer, models, texts)
+    vectorize_after, after = measure_set(compact_vectorizer, compact_models, texts)
+
+    report = {
+        "features": {"before": n_features, "after": int(keep.size)},
+        "disk_bytes": {"before": directory_size(args.source, files), "after": directory_size(args.output, files)},
+        "vectorizer": {
+            "memory_bytes": {"before": estimate_nbytes(vectorizer), "after": estimate_nbytes(compact_vectorizer)},
+            "load_ms": {"before": load_before[VECTORIZER_FILE], "after": load_after[VECTORIZER_FILE]},
+            "vectorize_ms": {"before": vectorize_before, "after": vectorize_after},
+        },
+        "models": {},
+    }
+    for name, fname in model_files().items():
+        agree = sum(a == b for a, b in zip(before[name]["predictions"], after[name]["predictions"]))
+        report["models"][name] = {
+            "memory_bytes": {"before": estimate_nbytes(models[name]), "after": estimate_nbytes(compact_models[name])},
+            "load_ms": {"before": load_before[fname], "after": load_after[fname]},
+            "predict_ms": {"before": before[name]["predict_ms"], "after": after[name]["predict_ms"]},
+            "agreement_pct": round(agree / len(texts) * 100, 2),
+        }
+
+    disk = report["disk_bytes"]
+    print(f"Файлы: {disk['before'] / 1e6:.1f} МБ -> {disk['after'] / 1e6:.1f} МБ "
+          f"(-{gain(disk['before'], disk['after'])}%), документов в корпусе: {len(texts)}")
+    for name, row in [("Векторизатор", report["vectorizer"]), *report["models"].items()]:
+        memory, load = row["memory_bytes"], row["load_ms"]
+        latency = row.get("predict_ms") or row["vectorize_ms"]
+        agreement = f" | совпадение {row['agreement_pct']:6.2f}%" if "agreement_pct" in row else ""
+        print(
+            f"    {name:<35} память -{gain(memory['before'], memory['after']):5.1f}% | "
+            f"загрузка {load['before']:8.1f} -> {load['after']:8.1f} мс | "
+            f"задержка {latency['before']:7.3f} -> {latency['after']:7.3f} мс{agreement}"
+        )
+
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump(report, f, ensure_ascii=False, indent=2)
+
+
+if __name__ == "__main__":
+    main()
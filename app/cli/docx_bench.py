@@ -0,0 +1,129 @@
+"""Сравнение потокового извлечения текста DOCX с прежним путем через python-docx.
+
+Для каждого документа замеряет медианное время и пиковую память (tracemalloc)
+извлечения через Document(...).paragraphs и через utils.docx_utils, а также
+полноту текста: долю слов python-docx, найденных потоковым извлечением, и
+сколько слов добавляют таблицы, колонтитулы и сноски. Синтетический корпус
+содержит таблицы и колонтитулы, как договоры; свой корпус — --corpus.
+
+Запуск из каталога, в котором работает приложение (относительные пути
+Config, например MODELS_DIR, считаются от текущего каталога):
+    python -m app.cli.docx_bench
+    python -m app.cli.docx_bench --corpus data/contracts --budget head:20000 --json docx_bench.json
+"""
+import argparse
+import io
+import json
+import random
+import statistics
+import time
+import tracemalloc
+from collections import Counter
+from pathlib import Path
+
+from .cli_utils import FALLBACK_WORDS, SIZES, make_text
+
+from utils.budget_utils import TextBudget
+from utils.docx_utils import extract_docx
+
+
+def make_contract(rng, n_words):
+    """DOCX с абзацами, таблицей реквизитов и колонтитулами"""
+    from docx import Document
+
+    document = Document()
+    section = document.sections[0]
+    section.header.paragraphs[0].text = make_text(rng, FALLBACK_WORDS, 12)
+    section.footer.paragraphs[0].text = make_text(rng, FALLBACK_WORDS, 8)
+    for line in make_text(rng, FALLBACK_WORDS, n_words).splitlines():
+        document.add_paragraph(line)
+    table = document.add_table(rows=max(n_words // 200, 2), cols=3)
+    for row in table.rows:
+        for cell in row.cells:
+            cell.text = make_text(rng, FALLBACK_WORDS, 5)
+    buffer = io.BytesIO()
+    document.save(buffer)
+    return buffer.getvalue()
+
+
+def python_docx_text(data, budget):
+    """Прежняя ветка extract_text_from_file"""
+    from docx import Document
+
+    paragraphs = Document(io.BytesIO(data)).paragraphs
+    if budget.enabled:
+        return budget.apply_pages(lambda i: paragraphs[i].text, len(paragraphs))
+    return "\n".join(para.text for para in paragraphs)
+
+
+def streaming_text(data, budget):
+    return extract_docx(io.BytesIO(data), budget)
+
+
+def measure(extract, data, budget, repeat):
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        text = extract(data, budget)
+        timings.append((time.perf_counter() - start) * 1000)
+    tracemalloc.start()
+    extract(data, budget)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return text, statistics.median(timings), peak
+
+
+def coverage(reference, candidate):
+    """(доля слов reference, найденных в candidate; слов candidate сверх reference)"""
+    ref, cand = Counter(reference.split()), Counter(candidate.split())
+    found = sum(min(count, cand[word]) for word, count in ref.items())
+    total = sum(ref.values())
+    return (found / total if total else 1.0), sum((cand - ref).values())
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Потоковое извлечение DOCX против python-docx")
+    parser.add_argument("--corpus", type=Path, default=None, help="Каталог с .docx")
+    parser.add_argument("--per-size", type=int, default=2, help="Документов каждого размера в синтетическом корпусе")
+    parser.add_argument("--budget", default="full", help="Бюджет текста: full, head:N или sampled:N")
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--json", type=Path, default=None, help="Сохранить отчет в JSON")
+    args = parser.parse_args()
+
+    if args.corpus:
+        corpus = [(path.name, path.read_bytes()) for path in sorted((args.corpus).rglob("*.docx"))]
+    else:
+        rng = random.Random(args.seed)
+        corpus = [(f"{size}_{i}.docx", make_contract(rng, n_words))
+                  for size, n_words in SIZES.items() for i in range(args.per_size)]
+    budget = TextBudget.parse(args.budget)
+
+    rows = []
+    print(f"Документов: {len(corpus)}, бюджет: {budget}")
+    for name, data in corpus:
+        old_text, old_ms, old_peak = measure(python_docx_text, data, budget, args.repeat)
+        new_text, new_ms, new_peak = measure(streaming_text, data, budget, args.repeat)
+        found, extra = coverage(old_text, new_text)
+        rows.append({
+            "file": name, "bytes": len(data),
+            "python_docx_ms": round(old_ms, 2), "streaming_ms": round(new_ms, 2),
+            "python_docx_peak_kb": round(old_peak / 1024), "streaming_peak_kb": round(new_peak / 1024),
+            "python_docx_chars": len(old_text), "streaming_chars": len(new_text),
+            "coverage_pct": round(found * 100, 2), "extra_words": extra,
+        })
+        row = rows[-1]
+        print(f"    {name:<28} {row['python_docx_ms']:8.1f} -> {row['streaming_ms']:7.1f} мс | "
+              f"память {row['python_docx_peak_kb']:7} -> {row['streaming_peak_kb']:6} КБ | "
+              f"покрытие {row['coverage_pct']:6.2f}% | доп. слов {extra}")
+
+    speedup = statistics.median(r["python_docx_ms"] / r["streaming_ms"] for r in rows if r["streaming_ms"])
+    print(f"\nМедианное ускорение: x{speedup:.1f}")
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump({"budget": str(budget), "documents": rows, "median_speedup": speedup},
+                      f, ensure_ascii=False, indent=2)
+
+
+if __name__ == "__main__":
+    main()
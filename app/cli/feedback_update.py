@@ -0,0 +1,155 @@
+"""Дообучение моделей на классификациях, подтвержденных оценками.
+
+Берет из БД классификации с оценкой не ниже --min-rating (по умолчанию только
+оценки аналитиков) и находит тексты документов: сохраненный в БД текст
+(FEATURE_STORE=text) или файл из --documents с тем же хешем текста; документы
+без сохраненного хеша сопоставляются по имени файла, неоднозначные имена
+пропускаются. Затем дообучает модели с partial_fit (наивный Байес, SGD) без полного переобучения.
+Остальные модели переносятся в новый набор без изменений. Результат — новая
+версия набора в Config.MODEL_SETS_DIR и отчет «до/после» на отложенной выборке
+и (если указан) на размеченном корпусе --eval-corpus.
+
+Нужна доступная MySQL с переменными окружения из .env.
+
+Запуск из каталога, в котором работает приложение (относительные пути
+Config, например MODELS_DIR, считаются от текущего каталога):
+    python -m app.cli.feedback_update --documents /data/uploads --min-rating 4
+    python -m app.cli.feedback_update --documents /data/uploads --eval-corpus data/labeled --dry-run
+"""
+import argparse
+import json
+import sys
+import time
+from pathlib import Path
+
+from config import Config
+from database.db_operations import Database
+from utils import feedback_utils
+from utils.budget_utils import TextBudget
+from utils.feature_store_utils import content_hash, decode_text
+from utils.file_utils import extract_text_from_file
+from utils.model_set_utils import load_model_set, new_version, save_model_set, version_dir
+from .cli_utils import MIME_TYPES, UploadedFileStub, load_labeled_corpus
+
+
+def stored_texts(rated):
+    """Хеш текста -> текст, сохраненный в БД вместе с классификацией"""
+    texts = {}
+    for row in rated.itertuples(index=False):
+        if isinstance(row.content_hash, str) and isinstance(row.text_payload, bytes):
+            texts.setdefault(row.content_hash, decode_text(row.text_payload))
+    return texts
+
+
+def index_documents(root, filenames):
+    """Тексты файлов из root, имена которых упоминаются в оценках.
+
+    Возвращает (хеш текста -> текст, имя файла -> текст, одноименные файлы).
+    Текст извлекается с бюджетом из конфигурации, как при классификации,
+    поэтому его хеш совпадает с сохраненным в documents.content_hash
+    """
+    budget = TextBudget.from_config()
+    by_hash, by_name, duplicates = {}, {}, set()
+    for path in Path(root).rglob("*"):
+        if path.name not in filenames:
+            continue
+        fmt = path.suffix.lower().lstrip(".")
+        if fmt not in MIME_TYPES:
+            continue
+        text = extract_text_from_file(UploadedFileStub(path.read_bytes(), path.name, MIME_TYPES[fmt]), budget=budget)
+        if not text:
+            continue
+        by_hash.setdefault(content_hash(text), text)
+        if path.name in by_name:
+            duplicates.add(path.name)
+        by_name[path.name] = text
+    # Одноименные файлы нельзя надежно сопоставить с записью в БД по имени
+    for name in duplicates:
+        by_name.pop(name, None)
+    return by_hash, by_name, duplicates
+
+
+def corpus_samples(corpus_dir):
+    samples = []
+    for name, fmt, label, data in load_labeled_corpus(corpus_dir):
+        text = extract_text_from_file(UploadedFileStub(data, name, MIME_TYPES[fmt]))
+        model_label = feedback_utils.MODEL_LABELS.get(label)
+        if text and model_label:
+            samples.append((text, model_label))
+    return samples
+
+
+def percent(value):
+    return f"{value * 100:6.2f}%" if value is not None else "     —"
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Дообучение моделей по оценкам классификаций")
+    parser.add_argument("--documents", type=Path, required=True, help="Каталог с исходными документами")
+    parser.add_argument("--source", default=Config.MODELS_DIR, help="Исходный набор моделей")
+    parser.add_argument("--min-rating", type=int, default=4, help="Минимальная оценка подтвержденного примера")
+    parser.add_argument("--include-employees", action="store_true", help="Учитывать оценки сотрудников")
+    parser.add_argument("--holdout", type=float, default=0.2, help="Доля примеров для оценки «до/после»")
+    parser.add_argument("--eval-corpus", type=Path, default=None, help="Размеченный корпус для оценки")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--dry-run", action="store_true", help="Только отчет, без сохранения набора")
+    args = parser.parse_args()
+
+    rated = Database().get_rated_classifications(args.min_rating, analysts_only=not args.include_employees)
+    if rated is None or rated.empty:
+        sys.exit("Нет подтвержденных оценками классификаций")
+
+    by_hash, by_name, duplicates = index_documents(args.documents, set(rated["filename"]))
+    by_hash.update(stored_texts(rated))
+    samples, missing, ambiguous = feedback_utils.build_samples(rated, by_hash, by_name)
+    print(f"Оценок: {len(rated)}, примеров: {len(samples)}, без текста: {missing}, "
+          f"пропущено неоднозначных имен: {ambiguous}, одноименных файлов в каталоге: {len(duplicates)}")
+    if not samples:
+        sys.exit("Не найдено ни одного текста для подтвержденных классификаций")
+
+    train, holdout = feedback_utils.split_holdout(samples, args.holdout, args.seed)
+    evaluation = {"отложенная выборка": holdout}
+    if args.eval_corpus:
+        evaluation["корпус"] = corpus_samples(args.eval_corpus)
+
+    vectorizer, models = load_model_set(args.source)
+    start = time.perf_counter()
+    updated, skipped = feedback_utils.update_models(models, vectorizer, train)
+    elapsed = time.perf_counter() - start
+    print(f"Дообучено моделей: {len(updated)} за {elapsed:.2f} с на {len(train)} примерах")
+
+    report = {}
+    for name in models:
+        if name in skipped:
+            print(f"    {name:<35} пропущена: {skipped[name]}")
+            continue
+        report[name] = {}
+        for eval_name, eval_samples in evaluation.items():
+            before = feedback_utils.accuracy(models[name], vectorizer, eval_samples)
+            after = feedback_utils.accuracy(updated[name], vectorizer, eval_samples)
+            report[name][eval_name] = {"before": before, "after": after, "samples": len(eval_samples)}
+            print(f"    {name:<35} {eval_name}: точность {percent(before)} -> {percent(after)} "
+                  f"({len(eval_samples)} док.)")
+
+    if args.dry_run or not updated:
+        return
+
+    version = new_version("feedback")
+    save_model_set(version_dir(version), vectorizer, {**models, **updated}, {
+        "version": version,
+        "base": args.source,
+        "kind": "feedback",
+        "min_rating": args.min_rating,
+        "analysts_only": not args.include_employees,
+        "train_samples": len(train),
+        "updated_models": sorted(updated),
+        "skipped_models": skipped,
+        "update_seconds": round(elapsed, 3),
+        "report": report,
+    })
+    print(f"\nНовая версия набора: {version_dir(version)}")
+    print(json.dumps(report, ensure_ascii=False, indent=2))
+
+
+if __name__ == "__main__":
+    main()
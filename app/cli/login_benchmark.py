@@ -0,0 +1,75 @@
+"""Нагрузочный замер входа: точечный запрос get_emploee против старого пути через DataFrame.
+
+Несколько потоков одновременно выполняют поиск пользователя по логину на общем
+экземпляре Database (как сессии Streamlit в одном процессе) и меряют задержку
+каждого вызова. Нужна доступная MySQL с переменными окружения из .env.
+
+Запуск из каталога, в котором работает приложение (относительные пути
+Config, например MODELS_DIR, считаются от текущего каталога):
+    python -m app.cli.login_benchmark --login some_user --threads 20 --calls 200
+"""
+import argparse
+import statistics
+import sys
+import threading
+import time
+
+from database.db_operations import Database
+
+from .cli_utils import percentile
+
+
+def legacy_get_emploee(db, login):
+    """Прежняя реализация: SELECT * -> DataFrame -> .iloc[0].to_dict()"""
+    result = db.execute_query("SELECT * FROM users WHERE login = %s", (login,))
+    return result.iloc[0].to_dict() if not result.empty else None
+
+
+def run(name, lookup, db, login, threads, calls):
+    latencies = []
+    lock = threading.Lock()
+    barrier = threading.Barrier(threads)
+
+    def worker():
+        local = []
+        barrier.wait()
+        for _ in range(calls):
+            start = time.perf_counter()
+            lookup(db, login)
+            local.append((time.perf_counter() - start) * 1000)
+        with lock:
+            latencies.extend(local)
+
+    workers = [threading.Thread(target=worker) for _ in range(threads)]
+    start = time.perf_counter()
+    for w in workers:
+        w.start()
+    for w in workers:
+        w.join()
+    elapsed = time.perf_counter() - start
+
+    print(
+        f"{name:<12} p50 {statistics.median(latencies):7.2f} мс | "
+        f"p95 {percentile(latencies, 95):7.2f} мс | p99 {percentile(latencies, 99):7.2f} мс | "
+        f"{len(latencies) / elapsed:8.1f} вход/с"
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Задержка входа под конкурентной нагрузкой")
+    parser.add_argument("--login", required=True, help="Существующий логин для поиска")
+    parser.add_argument("--threads", type=int, default=20)
+    parser.add_argument("--calls", type=int, default=100, help="Вызовов на поток")
+    args = parser.parse_args()
+
+    db = Database()
+    if db.get_emploee(args.login) is None:
+        sys.exit(f"Пользователь {args.login} не найден")
+
+    print(f"{args.threads} потоков x {args.calls} вызовов, пул соединений: {db.pool.size}")
+    run("legacy", legacy_get_emploee, db, args.login, args.threads, args.calls)
+    run("get_emploee", Database.get_emploee, db, args.login, args.threads, args.calls)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,162 @@
+"""Переклассификация истории по сохраненным признакам документов.
+
+Читает из БД признаки документов (FEATURE_STORE=text или tfidf), оценивает их
+выбранной моделью указанной версии набора и записывает новые классификации тех
+же документов вместе с метриками (source = reclassify). Строки TF-IDF, снятые
+векторизатором с тем же отпечатком (словарь и idf), что у версии, собираются в
+CSR-матрицу и оцениваются сразу, без векторизации; сохраненный текст
+векторизуется пачкой векторизатором версии.
+Документы без подходящих признаков пропускаются. С --dry-run в БД ничего не
+пишется, печатается только распределение классов.
+
+Нужна доступная MySQL с переменными окружения из .env.
+
+Запуск из каталога, в котором работает приложение (относительные пути
+Config, например MODELS_DIR, считаются от текущего каталога):
+    python -m app.cli.reclassify --model "Логистическая регрессия" --dry-run
+    python -m app.cli.reclassify --model "Наивный Байес" --version 20250601_120000 --since 2025-01-01
+"""
+import argparse
+import sys
+import time
+from collections import Counter
+
+from database.db_operations import Database
+from utils import model_registry
+from utils.feature_store_utils import TEXT, TFIDF, decode_text, stack_vectors, vectorizer_fingerprint
+from utils.ml_utils import MODELS, predict_batch, translate_prediction
+
+
+def load_version(version):
+    """Набор моделей указанной версии (по умолчанию — та, что стала бы активной)"""
+    versions = dict(model_registry.discover_versions())
+    if version is None:
+        version, directory = model_registry.target_version()
+    elif version in versions:
+        directory = versions[version]
+    else:
+        sys.exit(f"Версия {version} не найдена, доступны: {', '.join(versions)}")
+    model_set = model_registry.ModelSet(version, directory)
+    model_set.load_vectorizer()
+    return model_set
+
+
+def split_page(rows, fingerprint):
+    """Разбивает строки признаков на документы с TF-IDF этого векторизатора и документы с текстом"""
+    documents = {}
+    for row in rows:
+        documents.setdefault(row["id_document"], []).append(row)
+    vectors, texts, skipped = [], [], 0
+    for doc_id, features in documents.items():
+        tfidf = [f for f in features if f["kind"] == TFIDF and f["vectorizer_hash"] == fingerprint]
+        text = [f for f in features if f["kind"] == TEXT]
+        if tfidf:
+            vectors.append((doc_id, tfidf[0]))
+        elif text:
+            texts.append((doc_id, text[0]))
+        else:
+            skipped += 1
+    return vectors, texts, skipped
+
+
+class Summary:
+    def __init__(self):
+        self.documents = 0
+        self.from_tfidf = 0
+        self.from_text = 0
+        self.skipped = 0
+        self.classes = Counter()
+        self.vectorize_ms = 0.0
+        self.predict_ms = 0.0
+
+    def print(self, elapsed):
+        print(f"\nДокументов: {self.documents} (по TF-IDF {self.from_tfidf}, по тексту {self.from_text}), "
+              f"пропущено без подходящих признаков: {self.skipped}")
+        if elapsed > 0 and self.documents:
+            print(f"Время: {elapsed:.1f} с | {self.documents / elapsed:.1f} док/с | "
+                  f"векторизация {self.vectorize_ms / self.documents:.3f} мс/док, "
+                  f"предсказание {self.predict_ms / self.documents:.3f} мс/док")
+        for name, count in self.classes.most_common():
+            print(f"    {name:<20} {count:8} ({count / max(self.documents, 1):.1%})")
+
+
+def score_page(rows, model_set, model, model_name, summary):
+    """[(id документа, класс, уверенность, мс векторизации, мс предсказания)] для одной страницы"""
+    vectors, texts, skipped = split_page(rows, vectorizer_fingerprint(model_set.vectorizer))
+    summary.skipped += skipped
+    scored = []
+
+    if vectors:
+        started = time.perf_counter()
+        matrix = stack_vectors([f["payload"] for _, f in vectors], vectors[0][1]["n_features"])
+        stacked = time.perf_counter()
+        results = predict_batch(model, model_name, matrix)
+        predict_ms = (time.perf_counter() - stacked) * 1000 / len(vectors)
+        vectorize_ms = (stacked - started) * 1000 / len(vectors)
+        scored += [(doc_id, label, conf, vectorize_ms, predict_ms)
+                   for (doc_id, _), (label, conf) in zip(vectors, results)]
+        summary.from_tfidf += len(vectors)
+
+    if texts:
+        started = time.perf_counter()
+        matrix = model_set.vectorizer.transform([decode_text(f["payload"]) for _, f in texts])
+        vectorized = time.perf_counter()
+        results = predict_batch(model, model_name, matrix)
+        predict_ms = (time.perf_counter() - vectorized) * 1000 / len(texts)
+        vectorize_ms = (vectorized - started) * 1000 / len(texts)
+        scored += [(doc_id, label, conf, vectorize_ms, predict_ms)
+                   for (doc_id, _), (label, conf) in zip(texts, results)]
+        summary.from_text += len(texts)
+    return scored
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Переклассификация по сохраненным признакам")
+    parser.add_argument("--model", default="Логистическая регрессия", choices=list(MODELS), help="Модель")
+    parser.add_argument("--version", default=None, help="Версия набора моделей (по умолчанию самая новая или MODEL_VERSION)")
+    parser.add_argument("--since", default=None, help="Только документы, загруженные с этой даты (ГГГГ-ММ-ДД)")
+    parser.add_argument("--after-id", type=int, default=0, help="Продолжить с документа после этого id")
+    parser.add_argument("--page", type=int, default=1000, help="Документов в одной пачке")
+    parser.add_argument("--dry-run", action="store_true", help="Не записывать классификации в БД")
+    args = parser.parse_args()
+
+    model_set = load_version(args.version)
+    model = model_set.model(args.model)
+    if model is None:
+        sys.exit(f"Модель {args.model} версии {model_set.version} не загружена")
+    print(f"Модель: {args.model}, версия набора: {model_set.version}" + (" (без записи)" if args.dry_run else ""))
+
+    db = Database()
+    summary = Summary()
+    after_id = args.after_id
+    started = time.perf_counter()
+    try:
+        while rows := db.get_document_features(after_id, args.page, args.since):
+            scored = score_page(rows, model_set, model, args.model, summary)
+            classes = [(doc_id, translate_prediction(label, args.model), conf, vec_ms, pred_ms)
+                       for doc_id, label, conf, vec_ms, pred_ms in scored]
+            if not args.dry_run and classes:
+                ids = db.create_reclassifications([
+                    (doc_id, args.model, name, float(conf) if conf is not None else None)
+                    for doc_id, name, conf, _, _ in classes
+                ])
+                if not ids:
+                    sys.exit(f"Пачка после документа {after_id} не записана, продолжите с --after-id {after_id}")
+                db.create_classification_metrics([{
+                    "id_classification": cid, "model_used": args.model, "source": "reclassify",
+                    "vectorize_ms": round(vec_ms, 3), "predict_ms": round(pred_ms, 3),
+                    "total_ms": round(vec_ms + pred_ms, 3), "model_version": model_set.version,
+                } for cid, (_, _, _, vec_ms, pred_ms) in zip(ids, classes)])
+            summary.documents += len(classes)
+            summary.classes.update(name for _, name, _, _, _ in classes)
+            summary.vectorize_ms += sum(vec_ms for _, _, _, vec_ms, _ in classes)
+            summary.predict_ms += sum(pred_ms for _, _, _, _, pred_ms in classes)
+            after_id = rows[-1]["id_document"]
+            print(f"    до документа {after_id}: {summary.documents} переклассифицировано")
+    except KeyboardInterrupt:
+        print(f"\nОстановлено: продолжите с --after-id {after_id}")
+    summary.print(time.perf_counter() - started)
+
+
+if __name__ == "__main__":
+    main()
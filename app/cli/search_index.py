@@ -0,0 +1,72 @@
+"""Заполнение полнотекстового индекса и замер скорости поиска.
+
+--backfill индексирует документы, для которых в БД сохранен текст
+(FEATURE_STORE=text), пачками по --page документов, одним сегментом на пачку.
+Так в индекс попадает история, классифицированная до его появления. Затем
+печатаются размер индекса и время запросов --query (медиана и p95 по --repeat
+повторам).
+
+Запуск из каталога, в котором работает приложение (относительные пути
+Config, например MODELS_DIR, считаются от текущего каталога):
+    python -m app.cli.search_index --backfill
+    python -m app.cli.search_index --query "приказ" --query '"№ 1234"' --repeat 20
+"""
+import argparse
+import statistics
+import time
+
+from config import Config
+from utils import search_utils
+from utils.feature_store_utils import TEXT, decode_text
+from .cli_utils import percentile
+
+
+def backfill(index, page, after_id):
+    from database.db_operations import Database
+
+    db = Database()
+    documents, started = 0, time.perf_counter()
+    while rows := db.get_document_features(after_id, page):
+        texts = {}
+        for row in rows:
+            if row["kind"] == TEXT:
+                texts[row["id_document"]] = decode_text(row["payload"])
+        index.add(list(texts.items()))
+        documents += len(texts)
+        after_id = rows[-1]["id_document"]
+        print(f"    до документа {after_id}: проиндексировано {documents}")
+    elapsed = time.perf_counter() - started
+    print(f"Проиндексировано документов: {documents} за {elapsed:.1f} с"
+          + (f" ({documents / elapsed:.0f} док/с)" if elapsed > 0 and documents else ""))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Полнотекстовый индекс: заполнение и замер поиска")
+    parser.add_argument("--backfill", action="store_true", help="Проиндексировать сохраненные тексты из БД")
+    parser.add_argument("--after-id", type=int, default=0, help="Начать с документа после этого id")
+    parser.add_argument("--page", type=int, default=1000, help="Документов в одном сегменте")
+    parser.add_argument("--query", action="append", default=[], help="Запрос для замера (можно несколько)")
+    parser.add_argument("--repeat", type=int, default=10)
+    args = parser.parse_args()
+
+    if not search_utils.enabled():
+        raise SystemExit("Поиск выключен: задайте SEARCH_INDEX_DIR")
+    index = search_utils.get_index()
+    if args.backfill:
+        backfill(index, args.page, args.after_id)
+
+    stats = index.stats()
+    print(f"Индекс {Config.SEARCH_INDEX_DIR}: документов {stats['documents']}, терминов {stats['terms']}, "
+          f"сегментов {stats['segments']}, постинги {stats['bytes'] / 1e6:.1f} МБ")
+    for query in args.query:
+        timings = []
+        for _ in range(args.repeat):
+            started = time.perf_counter()
+            hits = index.search(query)
+            timings.append((time.perf_counter() - started) * 1000)
+        print(f"    {query!r:<40} найдено {len(hits):6} | медиана {statistics.median(timings):7.2f} мс | "
+              f"p95 {percentile(timings, 95):7.2f} мс")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,159 @@
+"""Отчет о времени старта приложения.
+
+Для каждого маршрута запускает отдельный интерпретатор с `python -X importtime`,
+импортирует main.py и модуль страницы и показывает, сколько стоит импорт и какие
+пакеты вносят наибольший вклад. С флагом --rerun дополнительно прогоняет
+анонимную главную страницу через streamlit AppTest и замеряет холодный запуск
+и время повторных перезапусков скрипта.
+
+Запуск из каталога, в котором работает приложение (относительные пути
+Config, например MODELS_DIR, считаются от текущего каталога):
+    python -m app.cli.startup_report
+    python -m app.cli.startup_report --top 15 --rerun 10 --budget-ms 800
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import time
+from pathlib import Path
+
+
+APP_DIR = Path(__file__).resolve().parent.parent
+
+# Маршрут -> модуль страницы, который импортирует main.py
+ROUTES = {
+    "Главная (аноним)": "pages.user.home_page",
+    "Вход сотрудника": "pages.emploee.emploee_login",
+    "Регистрация сотрудника": "pages.emploee.emploee_register",
+    "Вход аналитика": "pages.analyst.analyst_login",
+    "Регистрация аналитика": "pages.analyst.analyst_register",
+    "Кабинет сотрудника": "pages.emploee.emploee_dashboard",
+    "Кабинет аналитика": "pages.analyst.analyst_dashboard",
+}
+
+# Config.validate_config требует эти переменные; для замеров подойдут заглушки
+DUMMY_ENV = {
+    "DB_HOST": "localhost",
+    "DB_USER": "user",
+    "DB_PASS": "password",
+    "DB_NAME": "database",
+    "ADMIN_SECRET_KEY": "secret",
+    "METRICS_PORT": "",
+}
+
+
+def child_env():
+    env = dict(os.environ)
+    for key, value in DUMMY_ENV.items():
+        env.setdefault(key, value)
+    env["PYTHONPATH"] = os.pathsep.join(filter(None, [str(APP_DIR), env.get("PYTHONPATH")]))
+    return env
+
+
+def parse_importtime(stderr):
+    """Строки `import time: self | cumulative | name` -> [(глубина, имя, self мкс, cumulative мкс)]"""
+    rows = []
+    for line in stderr.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        self_us, cumulative_us, name = line[len("import time:"):].split("|", 2)
+        name = name[1:] if name.startswith(" ") else name
+        depth = (len(name) - len(name.lstrip(" "))) // 2
+        rows.append((depth, name.strip(), int(self_us), int(cumulative_us)))
+    return rows
+
+
+def measure_imports(modules):
+    code = "; ".join(f"import {module}" for module in modules)
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", code],
+        env=child_env(), capture_output=True, text=True
+    )
+    if result.returncode != 0:
+        raise RuntimeError(f"Импорт {modules} завершился с ошибкой:\n{result.stderr[-2000:]}")
+    return parse_importtime(result.stderr)
+
+
+def summarize_imports(rows, top):
+    """Итог в мс и самые тяжелые пакеты (по cumulative импортов верхнего уровня)"""
+    total_us = sum(self_us for _, _, self_us, _ in rows)
+    packages = {}
+    for depth, name, _, cumulative_us in rows:
+        if depth == 0:
+            root = name.split(".")[0]
+            packages[root] = packages.get(root, 0) + cumulative_us
+    heaviest = sorted(packages.items(), key=lambda item: item[1], reverse=True)[:top]
+    return {
+        "total_ms": round(total_us / 1000, 1),
+        "modules": len(rows),
+        "heaviest_ms": {name: round(us / 1000, 1) for name, us in heaviest},
+    }
+
+
+def measure_reruns(count):
+    """Холодный запуск и повторные перезапуски главной страницы через AppTest"""
+    for key, value in child_env().items():
+        os.environ.setdefault(key, value)
+    from streamlit.testing.v1 import AppTest
+
+    app = AppTest.from_file(str(APP_DIR / "main.py"), default_timeout=300)
+    start = time.perf_counter()
+    app.run()
+    cold_ms = (time.perf_counter() - start) * 1000
+
+    reruns = []
+    for _ in range(count):
+        start = time.perf_counter()
+        app.run()
+        reruns.append((time.perf_counter() - start) * 1000)
+    return {
+        "cold_ms": round(cold_ms, 1),
+        "rerun_p50_ms": round(statistics.median(reruns), 1) if reruns else None,
+        "rerun_max_ms": round(max(reruns), 1) if reruns else None,
+        "exceptions": [str(e.value) for e in app.exception],
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Отчет о времени старта приложения")
+    parser.add_argument("--top", type=int, default=10, help="Сколько самых тяжелых пакетов показать")
+    parser.add_argument("--rerun", type=int, default=0,
+                        help="Замерить N перезапусков главной страницы через AppTest")
+    parser.add_argument("--budget-ms", type=float, default=None,
+                        help="Бюджет на импорт main.py + главной страницы; превышение — код возврата 1")
+    parser.add_argument("--json", type=Path, default=None, help="Сохранить отчет в JSON")
+    args = parser.parse_args()
+
+    report = {"main": summarize_imports(measure_imports(["main"]), args.top), "routes": {}}
+    main_ms = report["main"]["total_ms"]
+    print(f"main.py: {main_ms} мс, модулей: {report['main']['modules']}")
+    for name, ms in report["main"]["heaviest_ms"].items():
+        print(f"    {name:<30} {ms:>8} мс")
+
+    for route, module in ROUTES.items():
+        summary = summarize_imports(measure_imports(["main", module]), args.top)
+        summary["extra_ms"] = round(summary["total_ms"] - main_ms, 1)
+        report["routes"][route] = summary
+        print(f"\n{route} ({module}): +{summary['extra_ms']} мс, всего {summary['total_ms']} мс")
+        for name, ms in summary["heaviest_ms"].items():
+            print(f"    {name:<30} {ms:>8} мс")
+
+    if args.rerun:
+        report["landing_reruns"] = measure_reruns(args.rerun)
+        print(f"\nГлавная страница через AppTest: {report['landing_reruns']}")
+
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump(report, f, ensure_ascii=False, indent=2)
+
+    landing_ms = report["routes"]["Главная (аноним)"]["total_ms"]
+    if args.budget_ms is not None and landing_ms > args.budget_ms:
+        print(f"\n❌ Импорт главной страницы {landing_ms} мс превышает бюджет {args.budget_ms} мс")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
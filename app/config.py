@@ -10,6 +10,105 @@ class Config:
     DB_PASS = os.getenv("DB_PASS")
     DB_NAME = os.getenv("DB_NAME")
     ADMIN_SECRET_KEY = os.getenv("ADMIN_SECRET_KEY")
+
+    # Пул соединений с БД (общий для всех сессий процесса)
+    DB_POOL_SIZE = os.getenv("DB_POOL_SIZE", "10")
+    DB_POOL_TIMEOUT = os.getenv("DB_POOL_TIMEOUT", "10")
+
+    # Каталог с векторизатором и моделями (например, сжатый набор из app/cli/compact_models.py)
+    MODELS_DIR = os.getenv("MODELS_DIR", "models")
+
+    # Каталог версий наборов моделей (дообучение, сжатие)
+    MODEL_SETS_DIR = os.getenv("MODEL_SETS_DIR", "model_sets")
+
+    # Версия набора, которую нужно использовать (пусто — самая новая из MODEL_SETS_DIR)
+    # и период проверки новых версий в секундах (0 — без фоновой проверки)
+    MODEL_VERSION = os.getenv("MODEL_VERSION", "")
+    MODEL_POLL_SECONDS = os.getenv("MODEL_POLL_SECONDS", "30")
+
+    # Теневая оценка: модель-кандидат из MODELS (пусто — выключено) оценивает векторы
+    # основной модели в фоне. SHADOW_VERSION — версия набора с тем же векторизатором,
+    # из которой берется кандидат (пусто — активный набор)
+    SHADOW_MODEL = os.getenv("SHADOW_MODEL", "")
+    SHADOW_VERSION = os.getenv("SHADOW_VERSION", "")
+    SHADOW_QUEUE_SIZE = os.getenv("SHADOW_QUEUE_SIZE", "100")
+
+    # Сколько секунд сессия ждет завершения прогрева моделей
+    WARMUP_TIMEOUT = os.getenv("WARMUP_TIMEOUT", "120")
+
+    # Лимиты классификаций «N/секунд» по ролям и общий лимит анонимного трафика.
+    # Состояние хранится в SQLite-файле, общем для процессов одного узла (у каждого узла свои лимиты)
+    RATE_LIMIT_DB = os.getenv("RATE_LIMIT_DB", "data/rate_limits.sqlite3")
+    RATE_LIMIT_ANONYMOUS = os.getenv("RATE_LIMIT_ANONYMOUS", "3/86400")
+    RATE_LIMIT_ANONYMOUS_GLOBAL = os.getenv("RATE_LIMIT_ANONYMOUS_GLOBAL", "60/60")
+    RATE_LIMIT_EMPLOYEE = os.getenv("RATE_LIMIT_EMPLOYEE", "60/60")
+    RATE_LIMIT_ANALYST = os.getenv("RATE_LIMIT_ANALYST", "120/60")
+    RATE_LIMIT_API = os.getenv("RATE_LIMIT_API", "600/60")
+    # Сколько обратных прокси перед приложением добавляют X-Forwarded-For
+    # (0 — заголовкам не доверять, брать адрес соединения)
+    RATE_LIMIT_TRUSTED_PROXIES = os.getenv("RATE_LIMIT_TRUSTED_PROXIES", "0")
+
+    # Сколько задач каждого типа выполняется одновременно; остальные ждут в очереди
+    ADMISSION_SINGLE_CONCURRENCY = os.getenv("ADMISSION_SINGLE_CONCURRENCY", "4")
+    ADMISSION_ARCHIVE_CONCURRENCY = os.getenv("ADMISSION_ARCHIVE_CONCURRENCY", "2")
+    ADMISSION_MAX_QUEUE = os.getenv("ADMISSION_MAX_QUEUE", "50")
+    ADMISSION_QUEUE_TIMEOUT = os.getenv("ADMISSION_QUEUE_TIMEOUT", "600")
+
+    # Лимиты распаковки архивов (защита от zip-бомб)
+    ARCHIVE_MAX_MEMBERS = os.getenv("ARCHIVE_MAX_MEMBERS", "10000")
+    ARCHIVE_MAX_TOTAL_MB = os.getenv("ARCHIVE_MAX_TOTAL_MB", "1024")
+    ARCHIVE_MAX_FILE_MB = os.getenv("ARCHIVE_MAX_FILE_MB", "50")
+    ARCHIVE_MAX_RATIO = os.getenv("ARCHIVE_MAX_RATIO", "100")
+    ARCHIVE_MAX_DEPTH = os.getenv("ARCHIVE_MAX_DEPTH", "10")
+
+    # Бюджет текста для классификации: full — весь текст, head — первые
+    # TEXT_BUDGET_CHARS символов, sampled — начало, выборка из середины и конец
+    TEXT_BUDGET_MODE = os.getenv("TEXT_BUDGET_MODE", "full")
+    TEXT_BUDGET_CHARS = os.getenv("TEXT_BUDGET_CHARS", "20000")
+
+    # Признаки классифицированных документов для переклассификации без повторной загрузки:
+    # text — сжатый текст, tfidf — сжатая разреженная строка TF-IDF, пусто — не сохранять
+    FEATURE_STORE = os.getenv("FEATURE_STORE", "")
+
+    # Полнотекстовый поиск: каталог индекса (пусто — выключен), после скольких сегментов
+    # они сливаются и сколько документов может ждать индексации (остальные отбрасываются)
+    SEARCH_INDEX_DIR = os.getenv("SEARCH_INDEX_DIR", "data/search_index")
+    SEARCH_MAX_SEGMENTS = os.getenv("SEARCH_MAX_SEGMENTS", "10")
+    SEARCH_QUEUE_SIZE = os.getenv("SEARCH_QUEUE_SIZE", "1000")
+
+    # Почти дубликаты в архивах (MinHash + LSH): файлы со сходством текста не ниже
+    # DEDUP_THRESHOLD получают класс представителя группы (0 — выключено).
+    # DEDUP_NUM_PERM — длина сигнатуры, DEDUP_BANDS — число полос LSH (делитель DEDUP_NUM_PERM)
+    DEDUP_THRESHOLD = os.getenv("DEDUP_THRESHOLD", "0")
+    DEDUP_NUM_PERM = os.getenv("DEDUP_NUM_PERM", "128")
+    DEDUP_BANDS = os.getenv("DEDUP_BANDS", "16")
+
+    # Микробатчинг: одиночные документы из разных сессий ждут до BATCH_MAX_WAIT_MS мс
+    # и оцениваются вместе пакетом до BATCH_MAX_SIZE документов (0 мс — выключено)
+    BATCH_MAX_WAIT_MS = os.getenv("BATCH_MAX_WAIT_MS", "0")
+    BATCH_MAX_SIZE = os.getenv("BATCH_MAX_SIZE", "32")
+
+    # Длинные документы классифицируются окнами по WINDOW_WORDS слов (0 — выключено)
+    WINDOW_WORDS = os.getenv("WINDOW_WORDS", "0")
+
+    # Каталог для профилей cProfile, снятых по запросу аналитика
+    PROFILE_DIR = os.getenv("PROFILE_DIR", "profiles")
+
+    # HTTP API классификации (app/api.py): адрес, процессы и потоки классификации,
+    # лимит документов в работе, размер файла, файлов в пакете и ключ доступа
+    # (пусто — без ключа, тогда API_HOST должен быть loopback-адресом)
+    API_HOST = os.getenv("API_HOST", "127.0.0.1")
+    API_PORT = os.getenv("API_PORT", "8502")
+    API_PROCESSES = os.getenv("API_PROCESSES", "1")
+    API_WORKERS = os.getenv("API_WORKERS", "4")
+    API_MAX_PENDING = os.getenv("API_MAX_PENDING", "64")
+    API_MAX_UPLOAD_MB = os.getenv("API_MAX_UPLOAD_MB", "50")
+    API_MAX_BATCH_FILES = os.getenv("API_MAX_BATCH_FILES", "100")
+    API_KEY = os.getenv("API_KEY", "")
+
+    # Эндпоинт метрик в формате Prometheus (пустой порт — выключен)
+    METRICS_HOST = os.getenv("METRICS_HOST", "0.0.0.0")
+    METRICS_PORT = os.getenv("METRICS_PORT", "9108")
     
     @classmethod
     def validate_config(cls):
@@ -1,41 +1,176 @@
 import pymysql
-import pandas as pd
 from config import Config
 import streamlit as st
-from typing import Optional
+import threading
+import time
+import weakref
+from contextlib import contextmanager
+from typing import Optional, TypedDict
+from utils import monitoring_utils
+
+
+class UserRecord(TypedDict):
+    """Строка users, нужная для входа и проверки роли"""
+    id: int
+    login: str
+    email: str
+    id_role: int
+    password_hash: str
+
+
+class TimedDictCursor(pymysql.cursors.DictCursor):
+    """DictCursor, который учитывает количество и длительность запросов в метриках"""
+
+    def execute(self, query, args=None):
+        parts = query.split(None, 1)
+        operation = parts[0].upper() if parts else "OTHER"
+        status = "ok"
+        start = time.perf_counter()
+        try:
+            return super().execute(query, args)
+        except pymysql.Error:
+            status = "error"
+            raise
+        finally:
+            monitoring_utils.DB_QUERIES.inc(operation=operation, status=status)
+            monitoring_utils.DB_QUERY_SECONDS.observe(time.perf_counter() - start, operation=operation)
+
+
+class ConnectionPool:
+    """Потокобезопасный пул соединений MySQL, соединения создаются по мере надобности"""
+
+    # Соединение, простаивавшее дольше, проверяется ping перед выдачей
+    IDLE_CHECK_SECONDS = 60
+
+    def __init__(self, connect, size, timeout):
+        self._connect = connect
+        self.size = size
+        self.timeout = timeout
+        # Свободные соединения (соединение, время освобождения); последнее освобожденное — в конце
+        self._idle = []
+        self._created = 0
+        self._in_use = 0
+        # Ожидающих будит и возврат соединения, и освобождение места под новое
+        self._available = threading.Condition()
+
+    def acquire(self):
+        conn, released_at = self._take(time.monotonic() + self.timeout)
+        if conn is None:
+            conn = self._open()
+        elif time.monotonic() - released_at > self.IDLE_CHECK_SECONDS:
+            try:
+                conn.ping(reconnect=True)
+            except pymysql.Error:
+                # Соединение не восстановилось: вместо него открывается новое на том же месте
+                try:
+                    conn.close()
+                except pymysql.Error:
+                    pass
+                conn = self._open()
+        with self._available:
+            self._in_use += 1
+        return conn
+
+    def _take(self, deadline):
+        """Свободное соединение или (None, None), если занято место под новое"""
+        with self._available:
+            while True:
+                if self._idle:
+                    return self._idle.pop()
+                if self._created < self.size:
+                    self._created += 1
+                    return None, None
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    raise pymysql.OperationalError(f"Пул соединений исчерпан ({self.size} соединений)")
+                self._available.wait(remaining)
+
+    def _open(self):
+        try:
+            return self._connect()
+        except Exception:
+            self._discard()
+            raise
+
+    def release(self, conn):
+        with self._available:
+            self._in_use -= 1
+            if conn.open:
+                self._idle.append((conn, time.monotonic()))
+            else:
+                self._created -= 1
+            self._available.notify()
+
+    def _discard(self):
+        with self._available:
+            self._created -= 1
+            self._available.notify()
+
+    def prefill(self, count):
+        """Заранее открывает соединения (при прогреве)"""
+        conns = [self.acquire() for _ in range(min(count, self.size))]
+        for conn in conns:
+            self.release(conn)
+
+    def stats(self):
+        with self._available:
+            return {"in_use": self._in_use, "idle": len(self._idle), "max": self.size}
+
+
+# Все экземпляры Database процесса — для метрики соединений пула
+_instances = weakref.WeakSet()
+
+
+def _connection_states():
+    states = {("in_use",): 0, ("idle",): 0, ("max",): 0}
+    for db in list(_instances):
+        for state, value in db.pool.stats().items():
+            states[(state,)] += value
+    return states
+
+
+monitoring_utils.DB_CONNECTIONS.set_callback(_connection_states)
+
 
 class Database:
     def __init__(self):
         self.config = Config()
-        self.connection = None
-        self._connect()
+        self.pool = ConnectionPool(
+            self._connect,
+            size=int(self.config.DB_POOL_SIZE),
+            timeout=float(self.config.DB_POOL_TIMEOUT)
+        )
+        _instances.add(self)
         
 
     def _connect(self):
-        try:
-            self.connection = pymysql.connect(
-                host=self.config.DB_HOST,
-                user=self.config.DB_USER,
-                password=self.config.DB_PASS,
-                database=self.config.DB_NAME,
-                cursorclass=pymysql.cursors.DictCursor,
-                autocommit=True
-            )
-        except pymysql.Error as e:
-            st.error(f"Database connection failed: {e}")
-            st.stop()
+        return pymysql.connect(
+            host=self.config.DB_HOST,
+            user=self.config.DB_USER,
+            password=self.config.DB_PASS,
+            database=self.config.DB_NAME,
+            cursorclass=TimedDictCursor,
+            autocommit=True
+        )
 
 
-    def _ensure_connection(self):
-        if not self.connection or not self.connection.open:
-            self._connect()
+    @contextmanager
+    def _cursor(self):
+        """Курсор на соединении, взятом из пула на время блока"""
+        conn = self.pool.acquire()
+        try:
+            with conn.cursor() as cursor:
+                yield cursor
+        finally:
+            self.pool.release(conn)
 
 
     def execute_query(self, query, params=None, return_result=True):
         """Универсальный метод выполнения запросов"""
-        self._ensure_connection()
+        import pandas as pd
+
         try:
-            with self.connection.cursor() as cursor:
+            with self._cursor() as cursor:
                 cursor.execute(query, params or ())
                 
                 if return_result and query.strip().upper().startswith('SELECT'):
@@ -50,11 +185,21 @@ class Database:
             return None
         
 
+    def fetch_one(self, query, params=None) -> Optional[dict]:
+        """Точечное чтение одной строки без pandas (вход, проверки существования)"""
+        try:
+            with self._cursor() as cursor:
+                cursor.execute(query, params or ())
+                return cursor.fetchone()
+        except pymysql.Error as e:
+            st.error(f"Database error: {e}")
+            return None
+
+
     # Методы для работы с пользователями
-    def get_emploee(self, login):
-        query = "SELECT * FROM users WHERE login = %s"
-        result = self.execute_query(query, (login,))
-        return result.iloc[0].to_dict() if not result.empty else None
+    def get_emploee(self, login) -> Optional[UserRecord]:
+        query = "SELECT id, login, email, id_role, password_hash FROM users WHERE login = %s LIMIT 1"
+        return self.fetch_one(query, (login,))
     
     
     def get_analyst_user(self, login):
@@ -63,28 +208,37 @@ class Database:
         return self.execute_query(query, (login, self.config.ADMIN_ROLE_ID))
     
 
-    def create_emploee(self, login, email, password, role_id=1):
-        """Создание нового пользователя"""
-        # Сначала проверяем, нет ли уже такого пользователя
-        if self.get_emploee(login):
-            st.error("Пользователь с таким логином уже существует")
-            return False
-            
-        query = """
-        INSERT INTO users (login, email, password_hash, id_role, created_at)
-        VALUES (%s, %s, %s, %s, NOW())
+    def create_emploee(self, login, email, password, role_id=1) -> Optional[bool]:
+        """Создание нового пользователя.
+
+        Возвращает True при успехе, False если логин или email заняты, None при ошибке БД
         """
-        affected_rows = self.execute_query(
-            query, 
-            (login, email, self._hash_password(password), role_id),
-            return_result=False
-        )
-        return affected_rows == 1
+        try:
+            with self._cursor() as cursor:
+                # Одна проверка на логин и email вместо emploee_exists + get_emploee
+                cursor.execute(
+                    "SELECT 1 FROM users WHERE login = %s OR email = %s LIMIT 1",
+                    (login, email)
+                )
+                if cursor.fetchone() is not None:
+                    return False
+
+                cursor.execute(
+                    """
+                    INSERT INTO users (login, email, password_hash, id_role, created_at)
+                    VALUES (%s, %s, %s, %s, NOW())
+                    """,
+                    (login, email, self._hash_password(password), role_id)
+                )
+                return True if cursor.rowcount == 1 else None
+        except pymysql.Error as e:
+            st.error(f"Ошибка при создании пользователя: {e}")
+            return None
     
     
     def get_last_classification_id(self, id_user: int) -> Optional[int]:
         try:
-            with self.connection.cursor() as cursor:
+            with self._cursor() as cursor:
                 cursor.execute("""
                     SELECT c.id
                     FROM classifications c
@@ -102,7 +256,7 @@ class Database:
 
     def create_rating(self, classification_id: int, id_user: int, rating: int, comment: str = "") -> bool:
         try:
-            with self.connection.cursor() as cursor:
+            with self._cursor() as cursor:
                 cursor.execute("""
                     INSERT INTO ratings (id_classification, id_user, rating, comment, created_at)
                     VALUES (%s, %s, %s, %s, NOW())
@@ -116,7 +270,7 @@ class Database:
     def create_analyst_user(self, login, email, password):
         """Создание администратора (без проверки ключа)"""
         try:
-            with self.connection.cursor() as cursor:
+            with self._cursor() as cursor:
                 cursor.execute(
                     "INSERT INTO users (login, email, password_hash, id_role, created_at) " \
                     "VALUES (%s, %s, %s, 2, NOW())",
@@ -129,7 +283,7 @@ class Database:
         
     def create_zip_folder(self, id_user: int, foldername: str, count_files: int) -> Optional[int]:
         try:
-            with self.connection.cursor() as cursor:
+            with self._cursor() as cursor:
                 cursor.execute(
                     """
                     INSERT INTO folders_zip (id_user, foldername, count_files, uploaded_at)
@@ -145,44 +299,58 @@ class Database:
         
     # Новый метод для классификации файла из архива
     def create_archive_classification(self, id_user: int, filename: str, model_name: str, 
-                                   predicted_class: str, confidence: float, id_folder_zip: int) -> Optional[int]:
-        """Создает запись о классификации файла из архива"""
+                                   predicted_class: str, confidence: float, id_folder_zip: int,
+                                   features=None) -> tuple:
+        """Создает запись о классификации файла из архива.
+
+        Возвращает (id классификации, id документа) или (None, None) при ошибке
+        """
+        if features:
+            self._ensure_features_table()
         try:
-            with self.connection.cursor() as cursor:
-                # Создаем запись о документе с привязкой к архиву
-                cursor.execute(
-                    """
-                    INSERT INTO documents (id_user, filename, id_folder_zip, uploaded_at)
-                    VALUES (%s, %s, %s, NOW())
-                    """,
-                    (id_user, filename, id_folder_zip)
-                )
-                doc_id = cursor.lastrowid
+            with self._cursor() as cursor:
+                # Документ, признаки и классификация сохраняются вместе или не сохраняются вовсе
+                cursor.connection.begin()
+                try:
+                    # Создаем запись о документе с привязкой к архиву
+                    cursor.execute(
+                        """
+                        INSERT INTO documents (id_user, filename, id_folder_zip, uploaded_at)
+                        VALUES (%s, %s, %s, NOW())
+                        """,
+                        (id_user, filename, id_folder_zip)
+                    )
+                    doc_id = cursor.lastrowid
+                    self._save_features(cursor, doc_id, features)
 
-                # Создаем запись о классификации
-                cursor.execute(
-                    """INSERT INTO classifications 
-                       (id_document, model_used, predicted_class, confidence, created_at)
-                       VALUES (%s, %s, %s, %s, NOW())""",
-                    (doc_id, model_name, predicted_class, confidence)
-                )
-                self.connection.commit()
-                return cursor.lastrowid
+                    # Создаем запись о классификации
+                    cursor.execute(
+                        """INSERT INTO classifications 
+                           (id_document, model_used, predicted_class, confidence, created_at)
+                           VALUES (%s, %s, %s, %s, NOW())""",
+                        (doc_id, model_name, predicted_class, confidence)
+                    )
+                    classification_id = cursor.lastrowid
+                    cursor.connection.commit()
+                except pymysql.Error:
+                    cursor.connection.rollback()
+                    raise
+                return classification_id, doc_id
         except pymysql.Error as e:
             st.error(f"Ошибка при сохранении классификации из архива: {e}")
-            return None
+            return None, None
         
     
     # Новый метод для обновления счетчика файлов в архиве
     def update_zip_file_count(self, folder_zip_id: int, new_count: int) -> bool:
         """Обновляет количество файлов в архиве"""
         try:
-            with self.connection.cursor() as cursor:
+            with self._cursor() as cursor:
                 cursor.execute(
                     "UPDATE folders_zip SET count_files = %s WHERE id = %s",
                     (new_count, folder_zip_id)
                 )
-                self.connection.commit()
+                cursor.connection.commit()
                 return cursor.rowcount > 0
         except pymysql.Error as e:
             st.error(f"Ошибка при обновлении счетчика файлов архива: {e}")
@@ -190,25 +358,122 @@ class Database:
         
 
     # Методы для работы с классификациями
-    def create_classification(self, id_user, filename, model_name, predicted_class, confidence) -> Optional[int]:
+    def create_classification(self, id_user, filename, model_name, predicted_class, confidence,
+                              features=None) -> tuple:
+        """(id классификации, id документа) или (None, None) при ошибке"""
+        if features:
+            self._ensure_features_table()
         try:
-            with self.connection.cursor() as cursor:
-                cursor.execute(
-                    "INSERT INTO documents (id_user, filename, uploaded_at) VALUES (%s, %s, NOW())",
-                    (id_user, filename)
-                )
-                doc_id = cursor.lastrowid
+            with self._cursor() as cursor:
+                cursor.connection.begin()
+                try:
+                    cursor.execute(
+                        "INSERT INTO documents (id_user, filename, uploaded_at) VALUES (%s, %s, NOW())",
+                        (id_user, filename)
+                    )
+                    doc_id = cursor.lastrowid
+                    self._save_features(cursor, doc_id, features)
 
-                cursor.execute(
-                    """INSERT INTO classifications 
-                       (id_document, model_used, predicted_class, confidence, created_at)
-                       VALUES (%s, %s, %s, ROUND(%s, 2), NOW())""",
-                    (doc_id, model_name, predicted_class, confidence)
-                )
-                return cursor.lastrowid
+                    cursor.execute(
+                        """INSERT INTO classifications 
+                           (id_document, model_used, predicted_class, confidence, created_at)
+                           VALUES (%s, %s, %s, ROUND(%s, 2), NOW())""",
+                        (doc_id, model_name, predicted_class, confidence)
+                    )
+                    classification_id = cursor.lastrowid
+                    cursor.connection.commit()
+                except pymysql.Error:
+                    cursor.connection.rollback()
+                    raise
+                return classification_id, doc_id
         except pymysql.Error as e:
             st.error(f"Ошибка при сохранении классификации: {e}")
-            return None
+            return None, None
+        
+
+    def create_classifications(self, id_user, filename, results, features=None) -> tuple:
+        """Сохраняет результаты нескольких моделей для одного документа.
+
+        results — список (модель, класс, уверенность). Одна запись в documents и по
+        записи в classifications на модель в одной транзакции; возвращает
+        (id классификаций, id документа) или ([], None) при ошибке
+        """
+        if features:
+            self._ensure_features_table()
+        try:
+            with self._cursor() as cursor:
+                cursor.connection.begin()
+                try:
+                    cursor.execute(
+                        "INSERT INTO documents (id_user, filename, uploaded_at) VALUES (%s, %s, NOW())",
+                        (id_user, filename)
+                    )
+                    doc_id = cursor.lastrowid
+                    self._save_features(cursor, doc_id, features)
+
+                    classification_ids = []
+                    for model_name, predicted_class, confidence in results:
+                        cursor.execute(
+                            """INSERT INTO classifications 
+                               (id_document, model_used, predicted_class, confidence, created_at)
+                               VALUES (%s, %s, %s, ROUND(%s, 2), NOW())""",
+                            (doc_id, model_name, predicted_class, confidence)
+                        )
+                        classification_ids.append(cursor.lastrowid)
+                    cursor.connection.commit()
+                except pymysql.Error:
+                    cursor.connection.rollback()
+                    raise
+                return classification_ids, doc_id
+        except pymysql.Error as e:
+            st.error(f"Ошибка при сохранении результатов сравнения моделей: {e}")
+            return [], None
+
+
+    def create_batch_classifications(self, id_user, rows, features=None) -> tuple:
+        """Сохраняет пачку документов пакетной классификации одной транзакцией.
+
+        rows — список (имя файла, модель, класс, уверенность); features — признаки
+        документов в том же порядке (None — без признаков). Возвращает (id
+        классификаций, id документов) в том же порядке или ([], []) при ошибке
+        (пачка откатывается целиком)
+        """
+        if not rows:
+            return [], []
+        features = features or [None] * len(rows)
+        if any(features):
+            self._ensure_features_table()
+        try:
+            with self._cursor() as cursor:
+                cursor.connection.begin()
+                try:
+                    # id документов нужны для classifications, поэтому documents вставляются по одной
+                    doc_ids = []
+                    for (filename, _, _, _), doc_features in zip(rows, features):
+                        cursor.execute(
+                            "INSERT INTO documents (id_user, filename, uploaded_at) VALUES (%s, %s, NOW())",
+                            (id_user, filename)
+                        )
+                        doc_ids.append(cursor.lastrowid)
+                        self._save_features(cursor, doc_ids[-1], doc_features)
+
+                    classification_ids = []
+                    for doc_id, (_, model_name, predicted_class, confidence) in zip(doc_ids, rows):
+                        cursor.execute(
+                            """INSERT INTO classifications
+                               (id_document, model_used, predicted_class, confidence, created_at)
+                               VALUES (%s, %s, %s, ROUND(%s, 2), NOW())""",
+                            (doc_id, model_name, predicted_class, confidence)
+                        )
+                        classification_ids.append(cursor.lastrowid)
+                    cursor.connection.commit()
+                except pymysql.Error:
+                    cursor.connection.rollback()
+                    raise
+                return classification_ids, doc_ids
+        except pymysql.Error as e:
+            st.error(f"Ошибка при пакетном сохранении классификаций: {e}")
+            return [], []
         
 
     def get_emploee_history(self, id_user):
@@ -235,6 +500,7 @@ class Database:
         """Получение всех классификаций (для админа)"""
         query = """
         SELECT 
+            d.id AS id_document,
             u.login, 
             d.filename, 
             c.model_used, 
@@ -252,13 +518,226 @@ class Database:
         return self.execute_query(query)
     
 
-    def emploee_exists(self, login, email):
-        with self.connection.cursor() as cursor:
-            cursor.execute(
-                "SELECT 1 FROM users WHERE login = %s OR email = %s LIMIT 1",
-                (login, email)
+    def get_rated_classifications(self, min_rating=4, analysts_only=True):
+        """Классификации с оценкой не ниже min_rating — подтвержденные примеры для дообучения.
+
+        content_hash и text_payload (сжатый текст) заполнены, если признаки документа
+        сохранены (FEATURE_STORE)
+        """
+        self._ensure_features_table()
+        query = """
+        SELECT 
+            c.id AS id_classification,
+            d.id AS id_document,
+            d.filename,
+            d.content_hash,
+            f.payload AS text_payload,
+            c.model_used,
+            c.predicted_class,
+            r.rating,
+            u.id_role AS rater_role,
+            c.created_at
+        FROM ratings r
+        JOIN classifications c ON r.id_classification = c.id
+        JOIN documents d ON c.id_document = d.id
+        JOIN users u ON r.id_user = u.id
+        LEFT JOIN document_features f ON f.content_hash = d.content_hash AND f.kind = 'text'
+        WHERE r.rating >= %s
+        """ + ("AND u.id_role = 2" if analysts_only else "") + """
+        ORDER BY c.created_at
+        """
+        return self.execute_query(query, (min_rating,))
+
+
+    # Методы для работы с сохраненными признаками документов
+    def _ensure_features_table(self):
+        """Создает таблицу признаков и колонку documents.content_hash при первом обращении"""
+        if getattr(self, "_features_table_ready", False):
+            return
+        self.execute_query("""
+        CREATE TABLE IF NOT EXISTS document_features (
+            content_hash CHAR(64) NOT NULL,
+            kind VARCHAR(10) NOT NULL,
+            vectorizer_hash CHAR(64) NOT NULL DEFAULT '',
+            n_features INT NULL,
+            payload LONGBLOB NOT NULL,
+            created_at DATETIME NOT NULL,
+            PRIMARY KEY (content_hash, kind, vectorizer_hash)
+        )
+        """, return_result=False)
+        if not self.fetch_one("""
+            SELECT 1 FROM information_schema.columns
+            WHERE table_schema = DATABASE() AND table_name = 'documents' AND column_name = 'content_hash'
+        """):
+            self.execute_query(
+                "ALTER TABLE documents ADD COLUMN content_hash CHAR(64) NULL, ADD INDEX idx_documents_content_hash (content_hash)",
+                return_result=False
+            )
+        self._features_table_ready = True
+
+
+    def _save_features(self, cursor, doc_id, features):
+        """Привязывает признаки к документу; одинаковый текст хранится один раз"""
+        if not features:
+            return
+        cursor.execute(
+            """INSERT IGNORE INTO document_features
+               (content_hash, kind, vectorizer_hash, n_features, payload, created_at)
+               VALUES (%s, %s, %s, %s, %s, NOW())""",
+            (features["content_hash"], features["kind"], features["vectorizer_hash"],
+             features["n_features"], features["payload"])
+        )
+        cursor.execute("UPDATE documents SET content_hash = %s WHERE id = %s", (features["content_hash"], doc_id))
+
+
+    def get_document_features(self, after_id=0, limit=1000, since=None) -> list:
+        """Признаки документов с id больше after_id (не больше limit документов).
+
+        Строки отсортированы по id документа; у документа может быть по строке
+        на каждый вид признаков и отпечаток векторизатора
+        """
+        self._ensure_features_table()
+        try:
+            with self._cursor() as cursor:
+                cursor.execute(
+                    "SELECT id FROM documents WHERE id > %s AND content_hash IS NOT NULL"
+                    + (" AND uploaded_at >= %s" if since else "")
+                    + " ORDER BY id LIMIT %s",
+                    (after_id, since, limit) if since else (after_id, limit)
+                )
+                ids = [row["id"] for row in cursor.fetchall()]
+                if not ids:
+                    return []
+                cursor.execute(
+                    """SELECT d.id AS id_document, d.filename, f.kind, f.vectorizer_hash, f.n_features, f.payload
+                       FROM documents d
+                       JOIN document_features f ON f.content_hash = d.content_hash
+                       WHERE d.id BETWEEN %s AND %s""" + (" AND d.uploaded_at >= %s" if since else "")
+                    + " ORDER BY d.id",
+                    (ids[0], ids[-1], since) if since else (ids[0], ids[-1])
+                )
+                return cursor.fetchall()
+        except pymysql.Error as e:
+            st.error(f"Ошибка при чтении признаков документов: {e}")
+            return []
+
+
+    def create_reclassifications(self, rows) -> list:
+        """Новые классификации уже сохраненных документов одной транзакцией.
+
+        rows — список (id документа, модель, класс, уверенность); возвращает id
+        классификаций в том же порядке или [] при ошибке
+        """
+        if not rows:
+            return []
+        try:
+            with self._cursor() as cursor:
+                cursor.connection.begin()
+                try:
+                    classification_ids = []
+                    for doc_id, model_name, predicted_class, confidence in rows:
+                        cursor.execute(
+                            """INSERT INTO classifications
+                               (id_document, model_used, predicted_class, confidence, created_at)
+                               VALUES (%s, %s, %s, ROUND(%s, 2), NOW())""",
+                            (doc_id, model_name, predicted_class, confidence)
+                        )
+                        classification_ids.append(cursor.lastrowid)
+                    cursor.connection.commit()
+                except pymysql.Error:
+                    cursor.connection.rollback()
+                    raise
+                return classification_ids
+        except pymysql.Error as e:
+            st.error(f"Ошибка при сохранении переклассификации: {e}")
+            return []
+
+
+    # Методы для работы с метриками производительности
+    METRICS_COLUMNS = [
+        "id_classification", "model_used", "source", "file_type", "file_size", "page_count", "word_count",
+        "extract_ms", "langdetect_ms", "vectorize_ms", "load_model_ms", "predict_ms", "db_ms", "total_ms",
+        "model_version"
+    ]
+
+    def _ensure_metrics_table(self):
+        """Создает таблицу метрик при первом обращении"""
+        if getattr(self, "_metrics_table_ready", False):
+            return
+        self.execute_query("""
+        CREATE TABLE IF NOT EXISTS classification_metrics (
+            id INT AUTO_INCREMENT PRIMARY KEY,
+            id_classification INT NULL,
+            model_used VARCHAR(100) NOT NULL,
+            source VARCHAR(20) NOT NULL,
+            file_type VARCHAR(10) NULL,
+            file_size BIGINT NULL,
+            page_count INT NULL,
+            word_count INT NULL,
+            extract_ms DOUBLE NULL,
+            langdetect_ms DOUBLE NULL,
+            vectorize_ms DOUBLE NULL,
+            load_model_ms DOUBLE NULL,
+            predict_ms DOUBLE NULL,
+            db_ms DOUBLE NULL,
+            total_ms DOUBLE NULL,
+            model_version VARCHAR(64) NULL,
+            created_at DATETIME NOT NULL,
+            INDEX idx_metrics_created_at (created_at),
+            INDEX idx_metrics_classification (id_classification)
+        )
+        """, return_result=False)
+        # Таблицы, созданные до появления версий наборов моделей
+        if not self.fetch_one("""
+            SELECT 1 FROM information_schema.columns
+            WHERE table_schema = DATABASE() AND table_name = 'classification_metrics'
+              AND column_name = 'model_version'
+        """):
+            self.execute_query(
+                "ALTER TABLE classification_metrics ADD COLUMN model_version VARCHAR(64) NULL AFTER total_ms",
+                return_result=False
             )
-            return cursor.fetchone() is not None
+        self._metrics_table_ready = True
+
+
+    def create_classification_metrics(self, rows) -> bool:
+        """Сохраняет длительности этапов для одной или нескольких классификаций одним запросом"""
+        if not rows:
+            return True
+        self._ensure_metrics_table()
+        columns = ", ".join(self.METRICS_COLUMNS)
+        placeholders = ", ".join(["%s"] * len(self.METRICS_COLUMNS))
+        try:
+            with self._cursor() as cursor:
+                cursor.executemany(
+                    f"INSERT INTO classification_metrics ({columns}, created_at) VALUES ({placeholders}, NOW())",
+                    [tuple(row.get(col) for col in self.METRICS_COLUMNS) for row in rows]
+                )
+                return True
+        except pymysql.Error as e:
+            st.error(f"Ошибка при сохранении метрик: {e}")
+            return False
+
+
+    def get_classification_metrics(self):
+        """Получение метрик производительности (для аналитика)"""
+        self._ensure_metrics_table()
+        query = """
+        SELECT 
+            model_used, source, file_type, file_size, page_count, word_count,
+            extract_ms, langdetect_ms, vectorize_ms, load_model_ms, predict_ms, db_ms, total_ms,
+            model_version, created_at
+        FROM classification_metrics
+        ORDER BY created_at DESC
+        """
+        return self.execute_query(query)
+    
+
+    def emploee_exists(self, login, email):
+        return self.fetch_one(
+            "SELECT 1 FROM users WHERE login = %s OR email = %s LIMIT 1",
+            (login, email)
+        ) is not None
 
 
     def _hash_password(self, password: str) -> str:
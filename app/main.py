@@ -1,17 +1,11 @@
 import streamlit as st
-from utils.auth_utils import load_vectorizer
 from utils.ml_utils import MODELS
+from utils import monitoring_utils, resource_utils
 import sys
 from pathlib import Path
 from config import Config
 import os
-from pages.user.home_page import user_page
-from pages.analyst.analyst_dashboard import analyst_page
-from pages.analyst.analyst_register import analyst_register_page
-from pages.analyst.analyst_login import analyst_login_page
-from pages.emploee.emploee_dashboard import emploee_page
-from pages.emploee.emploee_login import emploee_login_page
-from pages.emploee.emploee_register import emploee_register_page
+import uuid
 
 
 # Добавляем корень проекта в PYTHONPATH
@@ -25,6 +19,18 @@ def main():
     except ValueError as e:
         st.error(f"Configuration error: {str(e)}")
         st.stop()
+
+    # Эндпоинт метрик и прогрев моделей запускаются один раз на процесс
+    monitoring_utils.set_readiness_check(resource_utils.READY.is_set)
+    monitoring_utils.start_metrics_server(Config.METRICS_HOST, Config.METRICS_PORT)
+    resource_utils.start_warmup()
+
+    # Пока прогрев не завершен, запросы ждут, а не загружают модели сами
+    if not resource_utils.READY.is_set():
+        with st.spinner("⏳ Загружаем модели, это займет несколько секунд..."):
+            if not resource_utils.wait_until_ready():
+                st.warning("Сервис еще прогревается, попробуйте обновить страницу чуть позже")
+                st.stop()
         
     current_url = st.query_params
 
@@ -34,29 +40,39 @@ def main():
         st.session_state.client = None
     if 'analyst_step' not in st.session_state:
         st.session_state.analyst_step = None
-    if 'vectorizer' not in st.session_state:
-        st.session_state.vectorizer = load_vectorizer()
     if 'route' not in st.session_state:
         st.session_state.route = None
+    if 'session_id' not in st.session_state:
+        st.session_state.session_id = uuid.uuid4().hex
+
+    monitoring_utils.touch_session(st.session_state.session_id)
 
     user = st.session_state.user
-    vectorizer = st.session_state.vectorizer
 
+    # Страницы импортируются только при переходе на соответствующий маршрут:
+    # дашборды тянут plotly и pandas, а анонимному посетителю нужна только user_page
     if st.session_state.route == "login":
+        from pages.emploee.emploee_login import emploee_login_page
         emploee_login_page()
     elif st.session_state.route == "register":
+        from pages.emploee.emploee_register import emploee_register_page
         emploee_register_page()
     elif "analyst_register" in current_url:
+        from pages.analyst.analyst_register import analyst_register_page
         analyst_register_page()
     elif "analyst_login" in current_url:
+        from pages.analyst.analyst_login import analyst_login_page
         analyst_login_page()
     elif user:
         if user.get("id_role") == 2:
+            from pages.analyst.analyst_dashboard import analyst_page
             analyst_page(user)
         else:
-            emploee_page(user, vectorizer)
+            from pages.emploee.emploee_dashboard import emploee_page
+            emploee_page(user)
     else:
-        user_page(vectorizer)
+        from pages.user.home_page import user_page
+        user_page()
 
 
 if __name__ == "__main__":
@@ -1,28 +1,27 @@
 import streamlit as st
-from database.db_operations import Database
-from utils.auth_utils import load_vectorizer
-from utils.ml_utils import MODELS, MODELS_ZIP, classify_document, load_model
-from utils.file_utils import extract_text_from_file
+from config import Config
+from utils.resource_utils import get_database
+from utils.ml_utils import MODELS, MODELS_ZIP, classify_document, compare_models
+from utils.archive_utils import classify_archive
+from utils.zip_utils import ArchiveRejected
+from utils import profiling_utils
+from utils.profiling_utils import profile_run
+from utils import model_registry, rate_limit_utils, search_utils, shadow_utils
+from utils.admission_utils import ARCHIVE, CONTROLLER, SINGLE, AdmissionRejected, admitted, queue_notice
+from utils.metrics_utils import StageTimer, STAGES, STAGE_LABELS
 import pandas as pd
 import plotly.express as px
-import shutil
-import os
-import io
 import tempfile
-import zipfile
 
 
-db = Database()
+db = get_database()
 
 # Окно администратора
-def analyst_page(user, vectorizer=None):
+def analyst_page(user):
     if not user:
         st.error("Пожалуйста, войдите в систему для доступа к этой странице.")
         st.stop()
 
-    if vectorizer is None:
-        vectorizer = load_vectorizer()
-
     # Функция для перевода классов на русский
     def translate_class(pred, model):
         # Для кластеризации
@@ -56,16 +55,36 @@ def analyst_page(user, vectorizer=None):
     model_name = st.selectbox("🧠 Модель", list(MODELS.keys()), key="client_model",
                             on_change=lambda: st.session_state.pop("last_classification_id", None))
     uploaded_file = st.file_uploader("📎 Загрузите файл", type=["txt", "pdf", "docx"], key="client_upload")
+    compare_mode = st.toggle(
+        "⚖️ Сравнить все модели", key="compare_mode",
+        help="Текст извлекается и векторизуется один раз, документ оценивают все модели одновременно"
+    )
+
+    if compare_mode:
+        save_compare = st.checkbox("💾 Сохранить результаты всех моделей в историю", key="compare_save")
+        if uploaded_file and st.button("⚖️ Сравнить модели", key="compare_classify", use_container_width=True):
+            if rate_limit_utils.check_rate_limit(user):
+                model_comparison(user, uploaded_file, translate_class, save_compare)
 
     # Кнопка классификации
-    if uploaded_file and st.button(
+    elif uploaded_file and st.button(
         "🚀 Классифицировать",
         key="client_classify",
         use_container_width=True
     ):
+        if not rate_limit_utils.check_rate_limit(user):
+            return
         with st.spinner("🔍 Анализируем документ..."):
             try:
-                prediction, confidence, preview, wc, lang = classify_document(uploaded_file, model_name, vectorizer)
+                timer = StageTimer()
+                windows = []
+                on_wait = queue_notice(st.empty())
+                with admitted(SINGLE, rate_limit_utils.client_identity(user), on_wait), \
+                        model_registry.pinned() as model_set, \
+                        profile_run("classify", user["id"], uploaded_file, model_name):
+                    prediction, confidence, preview, wc, lang = classify_document(
+                        uploaded_file, model_name, model_set.vectorizer, timer, windows=windows
+                    )
                 
                 if prediction is not None:
                     # Получаем название класса на русском
@@ -83,18 +102,35 @@ def analyst_page(user, vectorizer=None):
                     
                     with st.expander("📄 Просмотреть текст"):
                         st.text(preview[:5000] + "..." if len(preview) > 5000 else preview)
+
+                    # Длинный документ классифицирован по фрагментам
+                    if windows:
+                        with st.expander(f"🧩 Классы фрагментов документа ({len(windows)})"):
+                            st.dataframe(pd.DataFrame([{
+                                "Фрагмент": w["index"] + 1,
+                                "С слова": w["start_word"] + 1,
+                                "Слов": w["words"],
+                                "Класс": translate_class(w["label"], model_name),
+                                "Уверенность": f"{w['confidence']:.2%}" if w["confidence"] is not None else "—",
+                            } for w in windows]), hide_index=True, use_container_width=True)
                         
                     # Сохраняем в БД (русские названия для всех моделей)
-                    classification_id = db.create_classification(
-                        user["id"],
-                        uploaded_file.name,
-                        model_name,
-                        russian_class,
-                        float(confidence) if confidence is not None else None
-                    )
+                    with timer.stage("db"):
+                        classification_id, doc_id = db.create_classification(
+                            user["id"],
+                            uploaded_file.name,
+                            model_name,
+                            russian_class,
+                            float(confidence) if confidence is not None else None,
+                            features=timer.info.get("features")
+                        )
                     
-                    # Сохраняем ID для оценки
+                    # Сохраняем ID для оценки и метрики этапов
                     if classification_id:
+                        db.create_classification_metrics([
+                            {"id_classification": classification_id, **timer.as_row(model_name, "single")}
+                        ])
+                        search_utils.submit(doc_id, timer.info.get("text"))
                         st.session_state.last_classification_id = classification_id
                         st.session_state.show_rating = True
                 else:
@@ -142,150 +178,43 @@ def analyst_page(user, vectorizer=None):
     zip_model = st.selectbox("🧠 Модель для архива", list(MODELS_ZIP.keys()), key="zip_model")
     zip_file = st.file_uploader("📎 Загрузите архив", type=["zip"], key="zip_upload")
 
-    # Функция перевода названий классов
-    def translate_class_name(class_name):
-        translation = {
-            "Order": "Приказ",
-            "Ordinance": "Постановление",
-            "Letters": "Письмо",
-            "Miscellaneous": "Общее"
-        }
-        return translation.get(class_name, class_name)
-
     if zip_file and st.button(
         "📂 Классифицировать архив", 
         key="zip_classify",
         use_container_width=True
     ):
+        if not rate_limit_utils.check_rate_limit(user):
+            return
         with st.spinner("🔍 Обработка архива..."):
             try:
-                # Создаем запись об архиве
-                zip_folder_id = db.create_zip_folder(
-                    user["id"],
-                    zip_file.name,
-                    0
-                )
-                
-                if not zip_folder_id:
-                    st.error("❌ Не удалось создать запись об архиве в БД")
-                    return
-
                 with tempfile.TemporaryDirectory() as tmpdir:
-                    tmp_input = os.path.join(tmpdir, "input")
-                    tmp_output = os.path.join(tmpdir, "output")
-                    os.makedirs(tmp_input, exist_ok=True)
-                    os.makedirs(tmp_output, exist_ok=True)
-
-                    # Распаковка архива
-                    with zipfile.ZipFile(zip_file, "r") as zip_ref:
-                        zip_ref.extractall(tmp_input)
-
-                    # Создаем директории для классов (с русскими названиями)
-                    class_dirs = {
-                        "Письмо": os.path.join(tmp_output, "Письмо"),
-                        "Приказ": os.path.join(tmp_output, "Приказ"),
-                        "Постановление": os.path.join(tmp_output, "Постановление"),
-                        "Общее": os.path.join(tmp_output, "Общее")
-                    }
-                    for path in class_dirs.values():
-                        os.makedirs(path, exist_ok=True)
-
-                    processed_files = 0
-                    
-                    for root, _, files in os.walk(tmp_input):
-                        for fname in files:
-                            file_path = os.path.join(root, fname)
-                            ext = os.path.splitext(fname)[1].lower()
-                            
-                            if ext not in ['.txt', '.pdf', '.docx']:
-                                continue
-                            
-                            try:
-                                # Чтение файла
-                                if ext == '.txt':
-                                    with open(file_path, 'r', encoding='utf-8') as f:
-                                        text = f.read()
-                                else:
-                                    with open(file_path, 'rb') as f:
-                                        file_content = f.read()
-                                    
-                                    class FileLikeObject(io.BytesIO):
-                                        name = fname
-                                        seekable = lambda self: True
-                                        readable = lambda self: True
-                                        writable = lambda self: False
-                                        mode = 'rb'
-                                        
-                                        @property
-                                        def type(self):
-                                            return {
-                                                '.pdf': 'application/pdf',
-                                                '.docx': 'application/vnd.openxmlformats-officedocument.wordprocessingml.document'
-                                            }.get(ext, 'application/octet-stream')
-                                    
-                                    file_obj = FileLikeObject(file_content)
-                                    text = extract_text_from_file(file_obj)
-
-                                if not text or len(text.strip()) < 10:
-                                    st.warning(f"⚠️ Файл `{fname}` не содержит текста или слишком короткий.")
-                                    continue
-                                
-                                # Классификация
-                                vector = vectorizer.transform([text])
-                                model = load_model(zip_model)
-                                pred = model.predict(vector)[0]
-                                confidence = model.predict_proba(vector)[0].max() if hasattr(model, 'predict_proba') else None
-                                
-                                # Определение класса с переводом
-                                if zip_model == "Clustering":
-                                    class_map = {
-                                        0: "Приказ",
-                                        1: "Постановление",
-                                        2: "Письмо",
-                                        3: "Общее"
-                                    }
-                                    russian_class = class_map.get(pred, "Общее")
-                                else:
-                                    english_class = pred if isinstance(pred, str) else "Miscellaneous"
-                                    russian_class = translate_class_name(english_class)
-                                
-                                # Сохраняем в БД
-                                classification_id = db.create_archive_classification(
-                                    id_user=user["id"],
-                                    filename=fname,
-                                    model_name=zip_model,
-                                    predicted_class=russian_class,
-                                    confidence=float(confidence) if confidence is not None else None,
-                                    id_folder_zip=zip_folder_id
-                                )
-                                
-                                if not classification_id:
-                                    continue
-                                
-                                # Копирование файла в соответствующую папку
-                                dst_dir = class_dirs.get(russian_class, class_dirs["Общее"])
-                                shutil.copy2(file_path, dst_dir)
-                                processed_files += 1
-                                
-                            except Exception as e:
-                                st.error(f"❌ Ошибка обработки файла `{fname}`: {str(e)}")
-
-                    # Обновляем счетчик файлов
-                    if processed_files > 0:
-                        db.update_zip_file_count(zip_folder_id, processed_files)
+                    on_wait = queue_notice(st.empty())
+                    with admitted(ARCHIVE, rate_limit_utils.client_identity(user), on_wait) as ticket, \
+                            model_registry.pinned() as model_set, \
+                            profile_run("archive", user["id"], zip_file, zip_model):
+                        # Запись об архиве создается после допуска: отказ очереди не оставляет пустых записей
+                        zip_folder_id = db.create_zip_folder(
+                            user["id"],
+                            zip_file.name,
+                            0
+                        )
 
-                    # Создаем итоговый архив
-                    if processed_files > 0:
-                        result_zip_path = os.path.join(tmpdir, "classified.zip")
-                        with zipfile.ZipFile(result_zip_path, 'w') as zipf:
-                            for class_name, class_dir in class_dirs.items():
-                                if any(os.listdir(class_dir)):
-                                    for root, _, files in os.walk(class_dir):
-                                        for file in files:
-                                            file_path = os.path.join(root, file)
-                                            arcname = os.path.join(class_name, file)
-                                            zipf.write(file_path, arcname)
+                        if not zip_folder_id:
+                            st.error("❌ Не удалось создать запись об архиве в БД")
+                            return
+
+                        processed_files, result_zip_path = classify_archive(
+                            zip_file,
+                            zip_model,
+                            model_set.vectorizer,
+                            db,
+                            user["id"],
+                            zip_folder_id,
+                            tmpdir,
+                            checkpoint=lambda: CONTROLLER.checkpoint(ticket, on_wait)
+                        )
 
+                    if processed_files > 0:
                         with open(result_zip_path, "rb") as f:
                             st.success(f"✅ Обработано файлов: {processed_files}")
                             st.download_button(
@@ -298,10 +227,18 @@ def analyst_page(user, vectorizer=None):
                     else:
                         st.error("⚠️ Ни один файл не был обработан. Проверьте содержимое архива.")
 
+            except ArchiveRejected as e:
+                st.error(f"🚫 Архив отклонен: {e}")
+            except AdmissionRejected as e:
+                # В том числе если после уступки слота архив не дождался очереди
+                st.error(f"⏳ {e}")
             except Exception as e:
                 st.error(f"❌ Критическая ошибка при обработке архива: {str(e)}")
 
     
+    st.markdown("---")
+    profiling_section()
+
     st.markdown("---")
     st.subheader("📊 Аналитика классификаций")
 
@@ -361,6 +298,13 @@ def analyst_page(user, vectorizer=None):
                 placeholder="Введите часть названия файла"
             )
 
+            # Полнотекстовый поиск по содержимому документов (индекс пополняется при классификации)
+            text_query = st.text_input(
+                "📝 Поиск по тексту документов",
+                placeholder='Слова или фраза в кавычках: "приказ № 15"',
+                disabled=not search_utils.enabled()
+            )
+
             # Фильтр по категориям
             selected_categories = st.multiselect(
                 "📂 Категории документов",
@@ -423,8 +367,22 @@ def analyst_page(user, vectorizer=None):
                     filtered_df['user_rating'].between(min_rating, max_rating)
                 ]
 
+        # Полнотекстовый поиск: остаются документы с совпадениями, порядок — по релевантности
+        if text_query:
+            hits, search_ms = search_utils.search(text_query)
+            relevance = pd.Series(dict(hits), dtype=float)
+            filtered_df = filtered_df[filtered_df['id_document'].isin(relevance.index)].copy()
+            filtered_df['relevance'] = filtered_df['id_document'].map(relevance)
+            st.caption(
+                f"🔎 Найдено документов: {len(hits)} за {search_ms:.1f} мс, "
+                f"записей с учетом фильтров: {len(filtered_df)}"
+            )
+
         # Сортировка
-        filtered_df = filtered_df.sort_values(['classification_date', 'russian_category'], ascending=[False, True])
+        if text_query:
+            filtered_df = filtered_df.sort_values(['relevance', 'classification_date'], ascending=[False, False])
+        else:
+            filtered_df = filtered_df.sort_values(['classification_date', 'russian_category'], ascending=[False, True])
 
         # Метрики
         col1, col2, col3, col4 = st.columns(4)
@@ -437,7 +395,7 @@ def analyst_page(user, vectorizer=None):
         col4.metric("Средняя оценка", f"{avg_rating:.1f}" if avg_rating is not None else "—")
 
         # Вкладки
-        tab1, tab2, tab3 = st.tabs(["Данные", "Распределение", "Тренды"])
+        tab1, tab2, tab3, tab4 = st.tabs(["Данные", "Распределение", "Тренды", "Производительность"])
         
         with tab1:
             # Настройки пагинации
@@ -465,6 +423,8 @@ def analyst_page(user, vectorizer=None):
                 'formatted_date', 'username', 'document_name', 'model_used',
                 'russian_category', 'formatted_confidence', 'user_rating', 'user_comment'
             ]
+            if text_query:
+                display_columns.insert(0, 'relevance')
             
             st.dataframe(
                 paginated_df[display_columns],
@@ -476,7 +436,8 @@ def analyst_page(user, vectorizer=None):
                     "russian_category": "Категория",
                     "formatted_confidence": st.column_config.TextColumn("Уверенность"),
                     "user_rating": st.column_config.NumberColumn("Оценка", format="%d"),
-                    "user_comment": "Комментарий"
+                    "user_comment": "Комментарий",
+                    "relevance": st.column_config.NumberColumn("Релевантность", format="%.2f")
                 },
                 hide_index=True,
                 use_container_width=True,
@@ -572,6 +533,283 @@ def analyst_page(user, vectorizer=None):
                         use_container_width=True
                     )
 
+        with tab4:
+            shadow_section()
+            performance_tab(date_range, selected_models)
+
     except Exception as e:
         st.error(f"Ошибка при загрузке данных: {str(e)}")
-        st.error("Попробуйте обновить страницу или обратитесь к администратору")
\ No newline at end of file
+        st.error("Попробуйте обновить страницу или обратитесь к администратору")
+
+
+def model_comparison(user, uploaded_file, translate_class, save):
+    """Оценка одного документа всеми моделями: классы, уверенность, согласие и время"""
+    with st.spinner("🔍 Сравниваем модели..."):
+        try:
+            timer = StageTimer()
+            on_wait = queue_notice(st.empty())
+            with admitted(SINGLE, rate_limit_utils.client_identity(user), on_wait), \
+                    model_registry.pinned() as model_set, \
+                    profile_run("classify", user["id"], uploaded_file, "Все модели"):
+                results, preview, wc, lang = compare_models(uploaded_file, list(MODELS), model_set.vectorizer, timer)
+        except Exception as e:
+            st.error(f"❌ Ошибка сравнения моделей: {str(e)}")
+            return
+
+    scored = [r for r in results if r["error"] is None and r["prediction"] is not None]
+    if not scored:
+        st.error("⚠️ Ни одна модель не смогла классифицировать документ")
+        return
+
+    for r in scored:
+        r["russian_class"] = translate_class(r["prediction"], r["model"])
+    votes = pd.Series([r["russian_class"] for r in scored]).value_counts()
+    majority = votes.index[0]
+
+    st.success(
+        f"✅ Большинство моделей: **{majority}** — согласие {votes.iloc[0]} из {len(scored)} "
+        f"({votes.iloc[0] / len(scored):.0%})"
+    )
+    st.caption(
+        f"🌐 Язык: **{lang}** | 📏 Слов: **{wc}** | "
+        f"⏱ Извлечение {timer.stages.get('extract', 0):.0f} мс, векторизация {timer.stages.get('vectorize', 0):.0f} мс"
+    )
+    st.dataframe(pd.DataFrame([{
+        "Модель": r["model"],
+        "Класс": r.get("russian_class", "—"),
+        "Уверенность": f"{r['confidence']:.2%}" if r["confidence"] is not None else "—",
+        "Время, мс": round(r["latency_ms"], 1),
+        "С большинством": "✅" if r.get("russian_class") == majority else ("⚠️ " + r["error"] if r["error"] else "❌"),
+    } for r in results]), hide_index=True, use_container_width=True)
+
+    with st.expander("📄 Просмотреть текст"):
+        st.text(preview)
+
+    if save:
+        with timer.stage("db"):
+            classification_ids, doc_id = db.create_classifications(user["id"], uploaded_file.name, [
+                (r["model"], r["russian_class"], float(r["confidence"]) if r["confidence"] is not None else None)
+                for r in scored
+            ], features=timer.info.get("features"))
+        if classification_ids:
+            # Общие этапы одинаковы для всех моделей, предсказание — свое у каждой
+            shared = timer.as_row("", "compare")
+            db.create_classification_metrics([
+                {**shared, "id_classification": cid, "model_used": r["model"],
+                 "predict_ms": round(r["latency_ms"], 3),
+                 "total_ms": round(shared["total_ms"] - shared["predict_ms"] + r["latency_ms"], 3)}
+                for cid, r in zip(classification_ids, scored)
+            ])
+            # Все классификации сравнения относятся к одному документу
+            search_utils.submit(doc_id, timer.info.get("text"))
+            st.info(f"💾 Сохранено результатов: {len(classification_ids)}")
+
+
+# Управление захватом профилей cProfile для следующих запусков
+def profiling_section():
+    st.markdown("### 🩺 Профилирование")
+    with st.expander("Захват профилей классификации", expanded=False):
+        state = profiling_utils.status()
+        if state["remaining"] > 0:
+            scope = f"пользователь #{state['id_user']}" if state["id_user"] is not None else "все пользователи"
+            st.warning(
+                f"Профилирование включено: осталось {state['remaining']} запусков "
+                f"({profiling_utils.PROFILE_KINDS[state['kind']]}, {scope})"
+            )
+        else:
+            st.caption("Профилирование выключено")
+
+        col1, col2, col3 = st.columns(3)
+        with col1:
+            count = st.number_input("Следующих запусков", min_value=1, max_value=100, value=5, key="profile_count")
+        with col2:
+            kind = st.selectbox(
+                "Операции",
+                list(profiling_utils.PROFILE_KINDS.keys()),
+                format_func=profiling_utils.PROFILE_KINDS.get,
+                key="profile_kind"
+            )
+        with col3:
+            target_login = st.text_input("Логин (пусто — все)", key="profile_login")
+
+        col1, col2 = st.columns(2)
+        with col1:
+            if st.button("▶️ Включить", key="profile_arm", use_container_width=True):
+                id_user = None
+                if target_login:
+                    target = db.get_emploee(target_login)
+                    if not target:
+                        st.error("Пользователь не найден")
+                        st.stop()
+                    id_user = target["id"]
+                profiling_utils.arm(count, id_user=id_user, kind=kind)
+                st.rerun()
+        with col2:
+            if st.button("⏹ Выключить", key="profile_disarm", use_container_width=True):
+                profiling_utils.disarm()
+                st.rerun()
+
+        profiles = profiling_utils.list_profiles()
+        if not profiles:
+            st.info("📭 Сохраненных профилей нет")
+            return
+
+        st.dataframe(
+            pd.DataFrame(profiles)[["created_at", "kind", "id_user", "model", "file_name", "file_type", "file_size", "duration_s"]],
+            column_config={
+                "created_at": "Дата",
+                "kind": "Операция",
+                "id_user": "Пользователь",
+                "model": "Модель",
+                "file_name": "Файл",
+                "file_type": "Тип",
+                "file_size": st.column_config.NumberColumn("Размер, байт"),
+                "duration_s": st.column_config.NumberColumn("Длительность, с", format="%.3f")
+            },
+            hide_index=True,
+            use_container_width=True
+        )
+
+        selected = st.selectbox("Профиль", [p["id"] for p in profiles], key="profile_selected")
+        sort_by = st.radio("Сортировка", ["cumulative", "tottime", "ncalls"], horizontal=True, key="profile_sort")
+        st.code(profiling_utils.profile_summary(selected, sort_by=sort_by), language="text")
+
+        col1, col2 = st.columns(2)
+        with col1:
+            with open(profiling_utils.profile_path(selected), "rb") as f:
+                st.download_button(
+                    "📥 Скачать .prof",
+                    f,
+                    file_name=f"{selected}.prof",
+                    mime="application/octet-stream",
+                    use_container_width=True
+                )
+        with col2:
+            if st.button("🗑 Удалить профиль", key="profile_delete", use_container_width=True):
+                profiling_utils.delete_profile(selected)
+                st.rerun()
+
+
+def shadow_section():
+    """Теневая оценка кандидата: согласие с основной моделью, сдвиг уверенности и задержка"""
+    if not shadow_utils.enabled():
+        return
+    report = shadow_utils.report()
+    st.markdown(f"#### 🌓 Теневая оценка: {Config.SHADOW_MODEL}")
+    st.caption(
+        f"Версия кандидата: **{Config.SHADOW_VERSION or 'активный набор'}** | "
+        f"в очереди: {report['queued']} | отброшено под нагрузкой: {report['dropped']}"
+    )
+    if not report["models"]:
+        st.info("📭 Кандидат еще не оценил ни одного документа")
+        return
+
+    def ms(value):
+        return round(value, 2) if value is not None else None
+
+    st.dataframe(pd.DataFrame([{
+        "Основная модель": model,
+        "Документов": row["samples"],
+        "Согласие": f"{row['agreement']:.1%}" if row["agreement"] is not None else "—",
+        "Сдвиг уверенности": f"{row['confidence_shift']:+.3f}" if row["confidence_shift"] is not None else "—",
+        "p50 основной, мс": ms(row["primary_p50_ms"]),
+        "p50 кандидата, мс": ms(row["candidate_p50_ms"]),
+        "p95 основной, мс": ms(row["primary_p95_ms"]),
+        "p95 кандидата, мс": ms(row["candidate_p95_ms"]),
+        "Ошибок": row["errors"],
+    } for model, row in report["models"].items()]), hide_index=True, use_container_width=True)
+
+
+# Вкладка с перцентилями длительностей этапов классификации
+def performance_tab(date_range, selected_models):
+    # Загруженные версии наборов моделей: активная и те, что дорабатывают начатые запросы
+    versions = model_registry.status()
+    if versions:
+        st.caption("📦 Наборы моделей: " + " | ".join(
+            f"**{v['version']}** ({'активный' if v['active'] else 'отклонен' if v['kind'] == 'rejected' else 'завершается'}, "
+            f"в работе: {v['in_flight']})"
+            for v in versions
+        ))
+
+    metrics_df = db.get_classification_metrics()
+    if metrics_df is None or metrics_df.empty:
+        st.info("📭 Метрики производительности еще не собраны")
+        return
+
+    metrics_df['created_at'] = pd.to_datetime(metrics_df['created_at'], errors='coerce')
+    metrics_df = metrics_df.dropna(subset=['created_at'])
+
+    # Те же фильтры, что и для остальных вкладок
+    if len(date_range) == 2:
+        start_date, end_date = pd.to_datetime(date_range[0]), pd.to_datetime(date_range[1]) + pd.Timedelta(days=1)
+        metrics_df = metrics_df[(metrics_df['created_at'] >= start_date) & (metrics_df['created_at'] <= end_date)]
+    if selected_models:
+        metrics_df = metrics_df[metrics_df['model_used'].isin(selected_models)]
+    if metrics_df.empty:
+        st.info("📭 Нет метрик для выбранных фильтров")
+        return
+
+    stage_columns = {f"{stage}_ms": STAGE_LABELS[stage] for stage in STAGES}
+    stage_columns["total_ms"] = STAGE_LABELS["total"]
+    for column in stage_columns:
+        metrics_df[column] = pd.to_numeric(metrics_df[column], errors='coerce')
+
+    def percentiles(series):
+        series = series.dropna()
+        if series.empty:
+            return pd.Series({"p50": None, "p95": None, "p99": None, "Замеров": 0})
+        return pd.Series({
+            "p50": series.quantile(0.5),
+            "p95": series.quantile(0.95),
+            "p99": series.quantile(0.99),
+            "Замеров": len(series)
+        })
+
+    # Перцентили по этапам
+    st.markdown("#### ⏱ Длительность этапов, мс")
+    stage_stats = pd.DataFrame({label: percentiles(metrics_df[column]) for column, label in stage_columns.items()}).T
+    st.dataframe(stage_stats.round(1), use_container_width=True)
+
+    # Срезы по модели, типу файла и источнику
+    col1, col2 = st.columns(2)
+    with col1:
+        group_label = st.selectbox("Срез", ["Модель", "Версия моделей", "Тип файла", "Источник"], key="perf_group")
+    with col2:
+        stage_label = st.selectbox("Этап", list(stage_columns.values()), index=len(stage_columns) - 1, key="perf_stage")
+    group_column = {
+        "Модель": "model_used", "Версия моделей": "model_version", "Тип файла": "file_type", "Источник": "source"
+    }[group_label]
+    stage_column = {label: column for column, label in stage_columns.items()}[stage_label]
+
+    grouped = metrics_df.groupby(group_column)[stage_column].apply(percentiles).unstack()
+    st.dataframe(grouped.round(1), use_container_width=True)
+
+    # Динамика перцентилей по дням
+    percentile_label = st.radio("Перцентиль", ["p50", "p95", "p99"], index=1, horizontal=True, key="perf_percentile")
+    quantile = {"p50": 0.5, "p95": 0.95, "p99": 0.99}[percentile_label]
+    daily = (
+        metrics_df.set_index('created_at')
+        .groupby(group_column)[stage_column]
+        .resample('D')
+        .quantile(quantile)
+        .reset_index()
+    )
+    st.plotly_chart(
+        px.line(
+            daily,
+            x='created_at',
+            y=stage_column,
+            color=group_column,
+            title=f"{stage_label}: {percentile_label} по дням",
+            labels={'created_at': 'Дата', stage_column: 'мс', group_column: group_label}
+        ),
+        use_container_width=True
+    )
+
+    # Характеристики обработанных документов
+    sizes = metrics_df[['file_size', 'word_count', 'page_count']].apply(pd.to_numeric, errors='coerce').mean()
+    st.caption(
+        f"Средний размер файла: {sizes['file_size'] / 1024:.1f} КБ | "
+        f"Слов в среднем: {sizes['word_count']:.0f} | "
+        f"Страниц в среднем (PDF): {sizes['page_count']:.1f}"
+    )
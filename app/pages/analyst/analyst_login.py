@@ -1,8 +1,8 @@
 import streamlit as st
-from database.db_operations import Database
+from utils.resource_utils import get_database
 
 
-db = Database()
+db = get_database()
 
 # Авторизация аналитика
 def analyst_login_page():
@@ -1,9 +1,9 @@
 import streamlit as st
-from database.db_operations import Database
+from utils.resource_utils import get_database
 from config import Config
 
 
-db = Database()
+db = get_database()
 
 # Регистрация администратора
 def analyst_register_page():
@@ -1,20 +1,21 @@
 import streamlit as st
-from database.db_operations import Database
-from utils.ml_utils import MODELS, MODELS_ZIP, classify_document, load_model
-from utils.file_utils import extract_text_from_file
+from utils.resource_utils import get_database
+from utils.ml_utils import MODELS, MODELS_ZIP, classify_document
+from utils.archive_utils import classify_archive
+from utils.zip_utils import ArchiveRejected
+from utils.profiling_utils import profile_run
+from utils import model_registry, rate_limit_utils, search_utils
+from utils.admission_utils import ARCHIVE, CONTROLLER, SINGLE, AdmissionRejected, admitted, queue_notice
+from utils.metrics_utils import StageTimer
 import plotly.express as px
 import pandas as pd
-import os
-import io
-import zipfile
 import tempfile
-import shutil
 
 
-db = Database()
+db = get_database()
 
 # Личный кабинет клиента
-def emploee_page(user, vectorizer):
+def emploee_page(user):
     # Проверка авторизации
     if not user:
         st.error("Пожалуйста, войдите в систему для доступа к этой странице.")
@@ -61,9 +62,19 @@ def emploee_page(user, vectorizer):
         key="client_classify",
         use_container_width=True
     ):
+        if not rate_limit_utils.check_rate_limit(user):
+            return
         with st.spinner("🔍 Анализируем документ..."):
             try:
-                prediction, confidence, preview, wc, lang = classify_document(uploaded_file, model_name, vectorizer)
+                timer = StageTimer()
+                windows = []
+                on_wait = queue_notice(st.empty())
+                with admitted(SINGLE, rate_limit_utils.client_identity(user), on_wait), \
+                        model_registry.pinned() as model_set, \
+                        profile_run("classify", user["id"], uploaded_file, model_name):
+                    prediction, confidence, preview, wc, lang = classify_document(
+                        uploaded_file, model_name, model_set.vectorizer, timer, windows=windows
+                    )
                 
                 if prediction is not None:
                     # Получаем название класса на русском
@@ -81,18 +92,35 @@ def emploee_page(user, vectorizer):
                     
                     with st.expander("📄 Просмотреть текст"):
                         st.text(preview[:5000] + "..." if len(preview) > 5000 else preview)
+
+                    # Длинный документ классифицирован по фрагментам
+                    if windows:
+                        with st.expander(f"🧩 Классы фрагментов документа ({len(windows)})"):
+                            st.dataframe(pd.DataFrame([{
+                                "Фрагмент": w["index"] + 1,
+                                "С слова": w["start_word"] + 1,
+                                "Слов": w["words"],
+                                "Класс": translate_class(w["label"], model_name),
+                                "Уверенность": f"{w['confidence']:.2%}" if w["confidence"] is not None else "—",
+                            } for w in windows]), hide_index=True, use_container_width=True)
                         
                     # Сохраняем в БД (русские названия для всех моделей)
-                    classification_id = db.create_classification(
-                        user["id"],
-                        uploaded_file.name,
-                        model_name,
-                        russian_class,
-                        float(confidence) if confidence is not None else None
-                    )
+                    with timer.stage("db"):
+                        classification_id, doc_id = db.create_classification(
+                            user["id"],
+                            uploaded_file.name,
+                            model_name,
+                            russian_class,
+                            float(confidence) if confidence is not None else None,
+                            features=timer.info.get("features")
+                        )
                     
-                    # Сохраняем ID для оценки
+                    # Сохраняем ID для оценки и метрики этапов
                     if classification_id:
+                        db.create_classification_metrics([
+                            {"id_classification": classification_id, **timer.as_row(model_name, "single")}
+                        ])
+                        search_utils.submit(doc_id, timer.info.get("text"))
                         st.session_state.last_classification_id = classification_id
                         st.session_state.show_rating = True
                 else:
@@ -140,150 +168,43 @@ def emploee_page(user, vectorizer):
     zip_model = st.selectbox("🧠 Модель для архива", list(MODELS_ZIP.keys()), key="zip_model")
     zip_file = st.file_uploader("📎 Загрузите архив", type=["zip"], key="zip_upload")
 
-    # Функция перевода названий классов
-    def translate_class_name(class_name):
-        translation = {
-            "Order": "Приказ",
-            "Ordinance": "Постановление",
-            "Letters": "Письмо",
-            "Miscellaneous": "Общее"
-        }
-        return translation.get(class_name, class_name)
-
     if zip_file and st.button(
         "📂 Классифицировать архив", 
         key="zip_classify",
         use_container_width=True
     ):
+        if not rate_limit_utils.check_rate_limit(user):
+            return
         with st.spinner("🔍 Обработка архива..."):
             try:
-                # Создаем запись об архиве
-                zip_folder_id = db.create_zip_folder(
-                    user["id"],
-                    zip_file.name,
-                    0
-                )
-                
-                if not zip_folder_id:
-                    st.error("❌ Не удалось создать запись об архиве в БД")
-                    return
-
                 with tempfile.TemporaryDirectory() as tmpdir:
-                    tmp_input = os.path.join(tmpdir, "input")
-                    tmp_output = os.path.join(tmpdir, "output")
-                    os.makedirs(tmp_input, exist_ok=True)
-                    os.makedirs(tmp_output, exist_ok=True)
-
-                    # Распаковка архива
-                    with zipfile.ZipFile(zip_file, "r") as zip_ref:
-                        zip_ref.extractall(tmp_input)
-
-                    # Создаем директории для классов (с русскими названиями)
-                    class_dirs = {
-                        "Письмо": os.path.join(tmp_output, "Письмо"),
-                        "Приказ": os.path.join(tmp_output, "Приказ"),
-                        "Постановление": os.path.join(tmp_output, "Постановление"),
-                        "Общее": os.path.join(tmp_output, "Общее")
-                    }
-                    for path in class_dirs.values():
-                        os.makedirs(path, exist_ok=True)
-
-                    processed_files = 0
-                    
-                    for root, _, files in os.walk(tmp_input):
-                        for fname in files:
-                            file_path = os.path.join(root, fname)
-                            ext = os.path.splitext(fname)[1].lower()
-                            
-                            if ext not in ['.txt', '.pdf', '.docx']:
-                                continue
-                            
-                            try:
-                                # Чтение файла
-                                if ext == '.txt':
-                                    with open(file_path, 'r', encoding='utf-8') as f:
-                                        text = f.read()
-                                else:
-                                    with open(file_path, 'rb') as f:
-                                        file_content = f.read()
-                                    
-                                    class FileLikeObject(io.BytesIO):
-                                        name = fname
-                                        seekable = lambda self: True
-                                        readable = lambda self: True
-                                        writable = lambda self: False
-                                        mode = 'rb'
-                                        
-                                        @property
-                                        def type(self):
-                                            return {
-                                                '.pdf': 'application/pdf',
-                                                '.docx': 'application/vnd.openxmlformats-officedocument.wordprocessingml.document'
-                                            }.get(ext, 'application/octet-stream')
-                                    
-                                    file_obj = FileLikeObject(file_content)
-                                    text = extract_text_from_file(file_obj)
-
-                                if not text or len(text.strip()) < 10:
-                                    st.warning(f"⚠️ Файл `{fname}` не содержит текста или слишком короткий.")
-                                    continue
-                                
-                                # Классификация
-                                vector = vectorizer.transform([text])
-                                model = load_model(zip_model)
-                                pred = model.predict(vector)[0]
-                                confidence = model.predict_proba(vector)[0].max() if hasattr(model, 'predict_proba') else None
-                                
-                                # Определение класса с переводом
-                                if zip_model == "Clustering":
-                                    class_map = {
-                                        0: "Приказ",
-                                        1: "Постановление",
-                                        2: "Письмо",
-                                        3: "Общее"
-                                    }
-                                    russian_class = class_map.get(pred, "Общее")
-                                else:
-                                    english_class = pred if isinstance(pred, str) else "Miscellaneous"
-                                    russian_class = translate_class_name(english_class)
-                                
-                                # Сохраняем в БД
-                                classification_id = db.create_archive_classification(
-                                    id_user=user["id"],
-                                    filename=fname,
-                                    model_name=zip_model,
-                                    predicted_class=russian_class,
-                                    confidence=float(confidence) if confidence is not None else None,
-                                    id_folder_zip=zip_folder_id
-                                )
-                                
-                                if not classification_id:
-                                    continue
-                                
-                                # Копирование файла в соответствующую папку
-                                dst_dir = class_dirs.get(russian_class, class_dirs["Общее"])
-                                shutil.copy2(file_path, dst_dir)
-                                processed_files += 1
-                                
-                            except Exception as e:
-                                st.error(f"❌ Ошибка обработки файла `{fname}`: {str(e)}")
-
-                    # Обновляем счетчик файлов
-                    if processed_files > 0:
-                        db.update_zip_file_count(zip_folder_id, processed_files)
+                    on_wait = queue_notice(st.empty())
+                    with admitted(ARCHIVE, rate_limit_utils.client_identity(user), on_wait) as ticket, \
+                            model_registry.pinned() as model_set, \
+                            profile_run("archive", user["id"], zip_file, zip_model):
+                        # Запись об архиве создается после допуска: отказ очереди не оставляет пустых записей
+                        zip_folder_id = db.create_zip_folder(
+                            user["id"],
+                            zip_file.name,
+                            0
+                        )
+
+                        if not zip_folder_id:
+                            st.error("❌ Не удалось создать запись об архиве в БД")
+                            return
+
+                        processed_files, result_zip_path = classify_archive(
+                            zip_file,
+                            zip_model,
+                            model_set.vectorizer,
+                            db,
+                            user["id"],
+                            zip_folder_id,
+                            tmpdir,
+                            checkpoint=lambda: CONTROLLER.checkpoint(ticket, on_wait)
+                        )
 
-                    # Создаем итоговый архив
                     if processed_files > 0:
-                        result_zip_path = os.path.join(tmpdir, "classified.zip")
-                        with zipfile.ZipFile(result_zip_path, 'w') as zipf:
-                            for class_name, class_dir in class_dirs.items():
-                                if any(os.listdir(class_dir)):
-                                    for root, _, files in os.walk(class_dir):
-                                        for file in files:
-                                            file_path = os.path.join(root, file)
-                                            arcname = os.path.join(class_name, file)
-                                            zipf.write(file_path, arcname)
-
                         with open(result_zip_path, "rb") as f:
                             st.success(f"✅ Обработано файлов: {processed_files}")
                             st.download_button(
@@ -296,6 +217,11 @@ def emploee_page(user, vectorizer):
                     else:
                         st.error("⚠️ Ни один файл не был обработан. Проверьте содержимое архива.")
 
+            except ArchiveRejected as e:
+                st.error(f"🚫 Архив отклонен: {e}")
+            except AdmissionRejected as e:
+                # В том числе если после уступки слота архив не дождался очереди
+                st.error(f"⏳ {e}")
             except Exception as e:
                 st.error(f"❌ Критическая ошибка при обработке архива: {str(e)}")
 
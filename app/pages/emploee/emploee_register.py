@@ -1,9 +1,9 @@
 import streamlit as st
-from database.db_operations import Database
+from utils.resource_utils import get_database
 import re
 
 
-db = Database()
+db = get_database()
 
 # Регистрация клиента
 def emploee_register_page():
@@ -78,17 +78,18 @@ def emploee_register_page():
                 error = "❌ Пароль должен быть 8-25 символов"
             elif password != confirm:
                 error = "❌ Пароли не совпадают"
-            elif db.emploee_exists(login, email):
-                error = "⚠️ Пользователь с таким логином или email уже существует"
             
             if error:
                 st.error(error, icon="🚨")
             else:
-                # Если все проверки пройдены, создаем пользователя
-                if db.create_emploee(login, email, password):
+                # Если все проверки пройдены, создаем пользователя (проверка занятости внутри)
+                created = db.create_emploee(login, email, password)
+                if created:
                     st.success("🎉 Регистрация успешно завершена!")
                     st.session_state.route = "login"
                     st.rerun()
+                elif created is False:
+                    st.error("⚠️ Пользователь с таким логином или email уже существует", icon="🚨")
                 else:
                     st.error("⚠️ Ошибка при создании пользователя", icon="⛔")
         
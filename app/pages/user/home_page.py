@@ -1,15 +1,13 @@
 import streamlit as st
-from datetime import datetime, timedelta
+import math
 from utils.ml_utils import MODELS, classify_document
-import time
+from utils.profiling_utils import profile_run
+from utils import model_registry, rate_limit_utils
+from utils.admission_utils import SINGLE, admitted, queue_notice
 
 
 # Базовое окно пользователя с ограниченным функционалом
-def user_page(vectorizer):
-    # Константы
-    MAX_FREE_CLASSIFICATIONS = 3
-    SESSION_KEY = "doc_classification_limit"
-    
+def user_page():
     # Инициализация состояния
     if 'classification_result' not in st.session_state:
         st.session_state.classification_result = None
@@ -18,23 +16,12 @@ def user_page(vectorizer):
     if 'show_text' not in st.session_state:
         st.session_state.show_text = False
 
-    # Управление лимитами
-    def get_limit_data():
-        if SESSION_KEY not in st.session_state:
-            reset_time = datetime.now() + timedelta(days=1)
-            st.session_state[SESSION_KEY] = {
-                'used': 0,
-                'reset_time': reset_time.timestamp()
-            }
-        return st.session_state[SESSION_KEY]
-    
-    limit_data = get_limit_data()
-    remaining = MAX_FREE_CLASSIFICATIONS - limit_data['used']
-    
-    # Проверка сброса лимита
-    if time.time() > limit_data['reset_time']:
-        limit_data['used'] = 0
-        limit_data['reset_time'] = (datetime.now() + timedelta(days=1)).timestamp()
+    # Управление лимитами: квота хранится на сервере и привязана к IP клиента,
+    # поэтому новая вкладка или очистка cookies ее не сбрасывают
+    identity = rate_limit_utils.client_identity()
+    role = rate_limit_utils.ANONYMOUS
+    MAX_FREE_CLASSIFICATIONS = int(rate_limit_utils.limit_capacity(role))
+    remaining = math.floor(rate_limit_utils.peek(identity, role))
     
     # --- Интерфейс ---
     
@@ -84,21 +71,24 @@ def user_page(vectorizer):
         key="client_classify",
         use_container_width=True
     ):
-        if limit_data['used'] >= MAX_FREE_CLASSIFICATIONS:
-            st.error("Лимит исчерпан")
+        # Списываем попытку до извлечения текста, чтобы отказ ничего не стоил серверу
+        allowed, retry_after, left = rate_limit_utils.try_acquire(identity, role)
+        if not allowed:
+            st.error(f"Лимит исчерпан. Повторите через {rate_limit_utils.format_retry(retry_after)}")
             st.stop()
         
         with st.spinner("🔍 Анализируем документ..."):
             try:
-                prediction, confidence, preview, wc, lang = classify_document(
-                    uploaded_file, 
-                    model_name, 
-                    vectorizer
-                )
+                with admitted(SINGLE, identity, queue_notice(st.empty())), \
+                        model_registry.pinned() as model_set, \
+                        profile_run("classify", None, uploaded_file, model_name):
+                    prediction, confidence, preview, wc, lang = classify_document(
+                        uploaded_file, 
+                        model_name, 
+                        model_set.vectorizer
+                    )
                 
-                # Увеличиваем счетчик использований сразу
-                limit_data['used'] += 1
-                remaining = MAX_FREE_CLASSIFICATIONS - limit_data['used']
+                remaining = math.floor(left)
                 
                 # Обновляем счетчик в интерфейсе
                 if remaining <= 0:
@@ -0,0 +1,188 @@
+import itertools
+import threading
+import time
+from collections import Counter
+from contextlib import contextmanager
+from config import Config
+from . import monitoring_utils
+
+
+# Типы тяжелой работы: у каждого свой лимит одновременных задач, поэтому
+# архивы не занимают слоты, нужные для одиночных документов
+SINGLE = "single"
+ARCHIVE = "archive"
+
+# Как часто ожидающая сессия обновляет свою позицию в очереди
+WAIT_POLL_SECONDS = 0.5
+
+
+class AdmissionRejected(Exception):
+    """Задача не допущена к выполнению: очередь переполнена или ожидание истекло"""
+
+
+class Ticket:
+    def __init__(self, kind, owner, seq):
+        self.kind = kind
+        self.owner = owner
+        self.seq = seq
+        self.granted = False
+        self.event = threading.Event()
+        self.enqueued_at = time.perf_counter()
+
+
+class AdmissionController:
+    """Ограничивает число одновременных задач каждого типа в процессе.
+
+    Свободный слот получает ожидающий, у владельца которого сейчас меньше всего
+    выполняемых задач, а при равенстве — пришедший раньше. Длинная задача может
+    периодически уступать слот через checkpoint(), если ждут другие пользователи
+    """
+
+    def __init__(self, limits, max_queue, queue_timeout=None):
+        self.limits = dict(limits)
+        self.max_queue = max_queue
+        self.queue_timeout = queue_timeout
+        self._lock = threading.Lock()
+        self._seq = itertools.count()
+        self._running = Counter()
+        self._owner_running = Counter()
+        self._waiting = {kind: [] for kind in self.limits}
+
+    def _priority(self, ticket):
+        return self._owner_running[ticket.owner], ticket.seq
+
+    def _dispatch(self, kind):
+        """Раздает свободные слоты ожидающим (вызывается под блокировкой)"""
+        waiting = self._waiting[kind]
+        while waiting and self._running[kind] < self.limits[kind]:
+            ticket = min(waiting, key=self._priority)
+            waiting.remove(ticket)
+            ticket.granted = True
+            self._running[kind] += 1
+            self._owner_running[ticket.owner] += 1
+            monitoring_utils.ADMISSION_WAIT_SECONDS.observe(time.perf_counter() - ticket.enqueued_at, kind=kind)
+            ticket.event.set()
+
+    def _enqueue(self, ticket):
+        ticket.seq = next(self._seq)
+        ticket.granted = False
+        ticket.event.clear()
+        ticket.enqueued_at = time.perf_counter()
+        self._waiting[ticket.kind].append(ticket)
+        self._dispatch(ticket.kind)
+
+    def enqueue(self, kind, owner) -> Ticket:
+        with self._lock:
+            if len(self._waiting[kind]) >= self.max_queue:
+                monitoring_utils.ADMISSION_REJECTED.inc(kind=kind, reason="queue_full")
+                raise AdmissionRejected("Очередь на обработку переполнена, попробуйте позже")
+            ticket = Ticket(kind, owner, None)
+            self._enqueue(ticket)
+            return ticket
+
+    def position(self, ticket) -> int:
+        """Место в очереди, начиная с 1; 0 — слот уже выделен"""
+        with self._lock:
+            if ticket.granted:
+                return 0
+            key = self._priority(ticket)
+            return 1 + sum(1 for other in self._waiting[ticket.kind] if self._priority(other) < key)
+
+    def release(self, ticket):
+        with self._lock:
+            if ticket.granted:
+                ticket.granted = False
+                self._running[ticket.kind] -= 1
+                self._owner_running[ticket.owner] -= 1
+                if self._owner_running[ticket.owner] <= 0:
+                    del self._owner_running[ticket.owner]
+            elif ticket in self._waiting[ticket.kind]:
+                self._waiting[ticket.kind].remove(ticket)
+            self._dispatch(ticket.kind)
+
+    def wait(self, ticket, on_wait=None, timeout=None):
+        """Блокирует до выделения слота, сообщая позицию в очереди через on_wait"""
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while not ticket.event.wait(WAIT_POLL_SECONDS):
+            if deadline is not None and time.monotonic() > deadline:
+                monitoring_utils.ADMISSION_REJECTED.inc(kind=ticket.kind, reason="timeout")
+                raise AdmissionRejected("Превышено время ожидания в очереди, попробуйте позже")
+            if on_wait:
+                on_wait(self.position(ticket))
+        if on_wait:
+            on_wait(0)
+
+    def checkpoint(self, ticket, on_wait=None):
+        """Уступает слот, если своей очереди ждет задача другого пользователя.
+
+        При переполненной очереди задача продолжает работу без уступки; обратно
+        в очередь она встает с тем же таймаутом, что и новые задачи
+        """
+        with self._lock:
+            waiting = self._waiting[ticket.kind]
+            contended = (
+                self._running[ticket.kind] >= self.limits[ticket.kind]
+                and len(waiting) < self.max_queue
+                and any(other.owner != ticket.owner for other in waiting)
+            )
+            if not contended:
+                return
+            self._running[ticket.kind] -= 1
+            self._owner_running[ticket.owner] -= 1
+            if self._owner_running[ticket.owner] <= 0:
+                del self._owner_running[ticket.owner]
+            self._enqueue(ticket)
+        self.wait(ticket, on_wait, timeout=self.queue_timeout)
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                kind: {
+                    "running": self._running[kind],
+                    "waiting": len(self._waiting[kind]),
+                    "limit": self.limits[kind],
+                }
+                for kind in self.limits
+            }
+
+
+CONTROLLER = AdmissionController(
+    {
+        SINGLE: int(Config.ADMISSION_SINGLE_CONCURRENCY),
+        ARCHIVE: int(Config.ADMISSION_ARCHIVE_CONCURRENCY),
+    },
+    max_queue=int(Config.ADMISSION_MAX_QUEUE),
+    queue_timeout=float(Config.ADMISSION_QUEUE_TIMEOUT),
+)
+
+
+def _admission_states():
+    samples = {}
+    for kind, stats in CONTROLLER.stats().items():
+        for state in ("running", "waiting", "limit"):
+            samples[(kind, state)] = stats[state]
+    return samples
+
+
+monitoring_utils.ADMISSION_TASKS.set_callback(_admission_states)
+
+
+@contextmanager
+def admitted(kind, owner, on_wait=None):
+    """Выполняет блок, когда для задачи освободится слот; отдает Ticket для checkpoint()"""
+    ticket = CONTROLLER.enqueue(kind, owner)
+    try:
+        CONTROLLER.wait(ticket, on_wait, timeout=CONTROLLER.queue_timeout)
+        yield ticket
+    finally:
+        CONTROLLER.release(ticket)
+
+
+def queue_notice(placeholder):
+    """Колбэк on_wait, который показывает позицию в очереди в элементе Streamlit"""
+    def notify(position):
+        if position:
+            placeholder.info(f"⏳ Сервер занят. Ваша позиция в очереди: {position}")
+        else:
+            placeholder.empty()
+    return notify
@@ -0,0 +1,146 @@
+"""Потоковый разбор multipart/form-data для HTTP API.
+
+Тело запроса читается кусками: каждая часть пишется во временный файл
+(в памяти до SPOOL_BYTES, дальше на диск) и отдается вызывающему сразу после
+своей границы, поэтому пакет документов не держится в памяти целиком, а
+классификация первых файлов начинается, пока остальные еще загружаются
+"""
+import os
+import tempfile
+from email.parser import BytesHeaderParser
+
+
+# Размер куска чтения из сокета
+CHUNK_SIZE = 64 * 1024
+
+# Часть до этого размера хранится в памяти, больше — во временном файле
+SPOOL_BYTES = 1024 * 1024
+
+# Максимальный размер заголовков одной части
+MAX_HEADER_BYTES = 16 * 1024
+
+# MIME-тип по расширению: клиенты часто присылают application/octet-stream
+EXTENSION_TYPES = {
+    ".txt": "text/plain",
+    ".pdf": "application/pdf",
+    ".docx": "application/vnd.openxmlformats-officedocument.wordprocessingml.document",
+}
+
+
+class MultipartError(ValueError):
+    """Тело запроса не является корректным multipart/form-data или превышает лимиты"""
+
+
+class BodyReader:
+    """Чтение не более Content-Length байт из потока запроса"""
+
+    def __init__(self, stream, length):
+        self.stream = stream
+        self.remaining = length
+
+    def read(self, size):
+        if self.remaining <= 0:
+            return b""
+        data = self.stream.read(min(size, self.remaining))
+        self.remaining -= len(data)
+        return data
+
+
+class UploadedPart:
+    """Загруженный файл с интерфейсом streamlit UploadedFile (name, type, size, read/seek)"""
+
+    def __init__(self, name, mime_type, file, size):
+        self.name = name
+        self.type = mime_type
+        self.size = size
+        self._file = file
+
+    def __getattr__(self, attr):
+        return getattr(self._file, attr)
+
+    def close(self):
+        self._file.close()
+
+
+def boundary_from(content_type):
+    """Граница из заголовка Content-Type или MultipartError"""
+    message = BytesHeaderParser().parsebytes(f"Content-Type: {content_type}\r\n\r\n".encode("latin-1"))
+    if message.get_content_type() != "multipart/form-data":
+        raise MultipartError("ожидается multipart/form-data")
+    boundary = message.get_param("boundary")
+    if not boundary:
+        raise MultipartError("в Content-Type нет boundary")
+    return boundary.encode("latin-1")
+
+
+def _upload(headers, file, size):
+    filename = os.path.basename(headers.get_param("filename", header="content-disposition") or "")
+    ext = os.path.splitext(filename)[1].lower()
+    mime_type = EXTENSION_TYPES.get(ext) or headers.get_content_type()
+    return UploadedPart(filename, mime_type, file, size)
+
+
+def iter_parts(stream, boundary, max_part_bytes):
+    """Генератор (имя поля, UploadedPart) по мере чтения тела запроса.
+
+    Закрывать части должен вызывающий. MultipartError — при нарушении формата,
+    обрыве тела или части больше max_part_bytes
+    """
+    delimiter = b"\r\n--" + boundary
+    keep = len(delimiter) - 1
+    # Перевод строки в начале позволяет искать первую границу тем же разделителем
+    buffer = b"\r\n"
+    eof = False
+
+    def fill():
+        nonlocal buffer, eof
+        data = stream.read(CHUNK_SIZE)
+        if not data:
+            eof = True
+        buffer += data
+
+    # Преамбула до первой границы
+    while (index := buffer.find(delimiter)) < 0:
+        if eof:
+            raise MultipartError("граница multipart не найдена")
+        buffer = buffer[-keep:]
+        fill()
+    buffer = buffer[index + len(delimiter):]
+
+    while True:
+        while len(buffer) < 2 and not eof:
+            fill()
+        if buffer.startswith(b"--"):
+            return
+        while b"\r\n\r\n" not in buffer:
+            if eof or len(buffer) > MAX_HEADER_BYTES:
+                raise MultipartError("некорректные заголовки части")
+            fill()
+        raw_headers, buffer = buffer.split(b"\r\n\r\n", 1)
+        # После границы идет перевод строки, затем заголовки части
+        headers = BytesHeaderParser().parsebytes(raw_headers.lstrip(b" \t").removeprefix(b"\r\n") + b"\r\n\r\n")
+        field = headers.get_param("name", header="content-disposition")
+
+        file = tempfile.SpooledTemporaryFile(max_size=SPOOL_BYTES)
+        size = 0
+        try:
+            while (index := buffer.find(delimiter)) < 0:
+                if len(buffer) > keep:
+                    file.write(buffer[:-keep])
+                    size += len(buffer) - keep
+                    buffer = buffer[-keep:]
+                if size > max_part_bytes:
+                    raise MultipartError(f"часть «{field}» больше {max_part_bytes // (1024 * 1024)} МБ")
+                if eof:
+                    raise MultipartError("тело запроса оборвано")
+                fill()
+            file.write(buffer[:index])
+            size += index
+            buffer = buffer[index + len(delimiter):]
+            if size > max_part_bytes:
+                raise MultipartError(f"часть «{field}» больше {max_part_bytes // (1024 * 1024)} МБ")
+        except BaseException:
+            file.close()
+            raise
+        file.seek(0)
+        yield field, _upload(headers, file, size)
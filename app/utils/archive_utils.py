@@ -0,0 +1,167 @@
+import streamlit as st
+import os
+import shutil
+import time
+import zipfile
+from .file_utils import extract_text_from_file
+from .ml_utils import current_model_version, load_model, translate_prediction
+from .metrics_utils import StageTimer
+from .zip_utils import safe_extract
+from .budget_utils import TextBudget
+from . import dedup_utils, feature_store_utils, monitoring_utils, search_utils, shadow_utils
+
+
+# Поддерживаемые расширения файлов внутри архива
+SUPPORTED_EXTENSIONS = ['.txt', '.pdf', '.docx']
+
+# Папки-классы итогового архива (с русскими названиями)
+CLASS_FOLDERS = ["Письмо", "Приказ", "Постановление", "Общее"]
+
+
+def classify_archive(zip_file, zip_model, vectorizer, db, id_user, zip_folder_id, tmpdir, checkpoint=None):
+    """Распаковывает архив, классифицирует файлы и собирает итоговый архив по папкам-классам.
+
+    checkpoint вызывается перед каждым файлом — через него длинный архив
+    уступает слот обработки другим пользователям.
+    Возвращает (количество обработанных файлов, путь к итоговому архиву или None)
+    """
+    started = time.perf_counter()
+    tmp_input = os.path.join(tmpdir, "input")
+    tmp_output = os.path.join(tmpdir, "output")
+    os.makedirs(tmp_input, exist_ok=True)
+    os.makedirs(tmp_output, exist_ok=True)
+
+    # Распаковка архива с лимитами на размер, степень сжатия и число файлов
+    extracted, rejected = safe_extract(zip_file, tmp_input, SUPPORTED_EXTENSIONS)
+    if rejected:
+        st.warning(f"⚠️ Отклонено файлов архива: {len(rejected)}")
+        with st.expander("Причины отклонения"):
+            for name, reason in rejected:
+                st.markdown(f"- `{name}`: {reason}")
+
+    # Создаем директории для классов
+    class_dirs = {name: os.path.join(tmp_output, name) for name in CLASS_FOLDERS}
+    for path in class_dirs.values():
+        os.makedirs(path, exist_ok=True)
+
+    processed_files = 0
+    metrics_rows = []
+    budget = TextBudget.from_config()
+    # Почти дубликаты получают класс представителя группы без векторизации и предсказания
+    dedup_index = dedup_utils.from_config()
+    dedup = dedup_utils.DedupStats()
+    representatives = {}
+
+    for _, file_path in extracted:
+        fname = os.path.basename(file_path)
+        ext = os.path.splitext(fname)[1].lower()
+
+        if checkpoint:
+            checkpoint()
+
+        timer = StageTimer()
+        timer.info["file_type"] = ext.lstrip('.')
+        timer.info["file_size"] = os.path.getsize(file_path)
+
+        try:
+            # Чтение файла: формат и кодировка определяются по содержимому, без загрузки в память
+            with timer.stage("extract"):
+                text = extract_text_from_file(file_path, timer, budget)
+
+            if not text or len(text.strip()) < 10:
+                st.warning(f"⚠️ Файл `{fname}` не содержит текста или слишком короткий.")
+                continue
+
+            timer.info["word_count"] = len(text.split())
+
+            representative, vector = None, None
+            if dedup_index is not None:
+                with timer.stage("dedup"):
+                    signature = dedup_index.signature(text)
+                    representative, _ = dedup_index.find(signature)
+                dedup.documents += 1
+                dedup.signature_ms += timer.stages["dedup"]
+
+            if representative is not None:
+                # Класс представителя: для предсказания дубликат не векторизуется.
+                # Строку TF-IDF для FEATURE_STORE capture строит по тексту самого дубликата
+                pred, confidence, classify_ms = representatives[representative]
+                timer.info["model_version"] = current_model_version()
+                dedup.duplicates += 1
+                dedup.saved_ms += classify_ms
+            else:
+                # Классификация
+                with timer.stage("vectorize"):
+                    vector = vectorizer.transform([text])
+                with timer.stage("load_model"):
+                    model = load_model(zip_model)
+                timer.info["model_version"] = current_model_version()
+                with timer.stage("predict"):
+                    pred = model.predict(vector)[0]
+                    confidence = model.predict_proba(vector)[0].max() if hasattr(model, 'predict_proba') else None
+                shadow_utils.submit(zip_model, vector, pred, confidence, timer.stages["predict"], "archive")
+                if dedup_index is not None:
+                    dedup_index.add(file_path, signature)
+                    representatives[file_path] = (pred, confidence, sum(
+                        timer.stages[stage] for stage in ("vectorize", "load_model", "predict")
+                    ))
+
+            # Определение класса с переводом
+            russian_class = translate_prediction(pred, zip_model)
+
+            # Признаки для переклассификации без повторной загрузки (FEATURE_STORE)
+            features = feature_store_utils.capture(text, vector, vectorizer)
+
+            # Сохраняем в БД
+            with timer.stage("db"):
+                classification_id, doc_id = db.create_archive_classification(
+                    id_user=id_user,
+                    filename=fname,
+                    model_name=zip_model,
+                    predicted_class=russian_class,
+                    confidence=float(confidence) if confidence is not None else None,
+                    id_folder_zip=zip_folder_id,
+                    features=features
+                )
+
+            if not classification_id:
+                continue
+            search_utils.submit(doc_id, text)
+
+            metrics_rows.append({"id_classification": classification_id, **timer.as_row(zip_model, "archive")})
+            monitoring_utils.observe_stages(zip_model, "archive", timer.stages)
+
+            # Копирование файла в соответствующую папку
+            dst_dir = class_dirs.get(russian_class, class_dirs["Общее"])
+            shutil.copy2(file_path, dst_dir)
+            processed_files += 1
+
+        except Exception as e:
+            monitoring_utils.observe_stages(zip_model, "archive", timer.stages, "failed")
+            st.error(f"❌ Ошибка обработки файла `{fname}`: {str(e)}")
+
+    # Обновляем счетчик файлов и сохраняем метрики одним запросом
+    if processed_files > 0:
+        db.update_zip_file_count(zip_folder_id, processed_files)
+        db.create_classification_metrics(metrics_rows)
+    monitoring_utils.observe_archive(zip_model, processed_files, time.perf_counter() - started)
+    if dedup.documents:
+        monitoring_utils.ARCHIVE_DUPLICATES.inc(dedup.duplicates, model=zip_model)
+        if dedup.duplicates:
+            st.info(f"♻️ {dedup.summary()}")
+
+    if processed_files == 0:
+        return 0, None
+
+    # Создаем итоговый архив
+    result_zip_path = os.path.join(tmpdir, "classified.zip")
+    with zipfile.ZipFile(result_zip_path, 'w') as zipf:
+        for class_name, class_dir in class_dirs.items():
+            if any(os.listdir(class_dir)):
+                for root, _, files in os.walk(class_dir):
+                    for file in files:
+                        file_path = os.path.join(root, file)
+                        arcname = os.path.join(class_name, file)
+                        zipf.write(file_path, arcname)
+
+    return processed_files, result_zip_path
@@ -1,13 +1,16 @@
-import joblib
 import streamlit as st
 
 
-VECTORIZER_PATH = "models/vectorizer.pkl"
-
-# Функция загрузки векторизатора для обработки документов
+# Функция загрузки векторизатора для обработки документов.
+# Векторизатор берется из набора моделей, закрепленного за запросом (или активного),
+# чтобы его словарь совпадал с версией моделей
 def load_vectorizer():
+    from . import model_registry
     try:
-        return joblib.load(VECTORIZER_PATH)
+        vectorizer = model_registry.current().vectorizer
     except Exception as e:
         st.error(f"Ошибка загрузки векторизатора: {e}")
-        return None
\ No newline at end of file
+        return None
+    if vectorizer is None:
+        st.error("Векторизатор не загружен")
+    return vectorizer
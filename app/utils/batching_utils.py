@@ -0,0 +1,114 @@
+"""Микробатчинг одиночных классификаций из одновременных сессий.
+
+Сессии отдают текст диспетчеру и ждут результат. Диспетчер собирает запросы
+не дольше BATCH_MAX_WAIT_MS миллисекунд (или до BATCH_MAX_SIZE штук),
+векторизует тексты одной моделью одним вызовом transform и оценивает
+получившуюся матрицу одним вызовом predict_proba, после чего раздает каждой
+сессии ее строку результата
+"""
+import queue
+import threading
+import time
+from config import Config
+from . import monitoring_utils
+
+
+class _Request:
+    def __init__(self, vectorizer, model, model_name, text):
+        self.key = (id(vectorizer), id(model), model_name)
+        self.vectorizer = vectorizer
+        self.model = model
+        self.model_name = model_name
+        self.text = text
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+        self.timings = {}
+        self.batch_size = 0
+
+
+class MicroBatcher:
+    """Диспетчер пакетной оценки с одним фоновым потоком на процесс"""
+
+    def __init__(self, max_batch, max_wait_ms):
+        self.max_batch = max(int(max_batch), 1)
+        self.max_wait = max(float(max_wait_ms), 0.0) / 1000
+        self._queue = queue.Queue()
+        self._lock = threading.Lock()
+        self._started = False
+
+    @property
+    def enabled(self):
+        return self.max_wait > 0 and self.max_batch > 1
+
+    def _start(self):
+        with self._lock:
+            if self._started:
+                return
+            self._started = True
+        threading.Thread(target=self._run, name="micro-batcher", daemon=True).start()
+
+    def score(self, vectorizer, model, model_name, text, timer=None):
+        """Классифицирует текст в общем пакете; возвращает (класс, уверенность, вектор)"""
+        self._start()
+        request = _Request(vectorizer, model, model_name, text)
+        self._queue.put(request)
+        request.done.wait()
+        if timer is not None:
+            # Этапы пакета общие для всех его запросов; ожидание пакета входит в total_ms
+            for stage, ms in request.timings.items():
+                timer.stages[stage] = timer.stages.get(stage, 0.0) + ms
+            timer.info["batch_size"] = request.batch_size
+        if request.error is not None:
+            raise request.error
+        return request.result
+
+    def _collect(self):
+        """Первый запрос из очереди и все, что придет за max_wait (не больше max_batch)"""
+        batch = [self._queue.get()]
+        deadline = time.perf_counter() + self.max_wait
+        while len(batch) < self.max_batch:
+            remaining = deadline - time.perf_counter()
+            try:
+                batch.append(self._queue.get(timeout=remaining) if remaining > 0 else self._queue.get_nowait())
+            except queue.Empty:
+                break
+        return batch
+
+    def _run(self):
+        while True:
+            batch = self._collect()
+            groups = {}
+            for request in batch:
+                groups.setdefault(request.key, []).append(request)
+            for group in groups.values():
+                self._score_group(group)
+
+    def _score_group(self, group):
+        from .ml_utils import predict_batch
+
+        first = group[0]
+        try:
+            started = time.perf_counter()
+            matrix = first.vectorizer.transform([request.text for request in group])
+            vectorized = time.perf_counter()
+            results = predict_batch(first.model, first.model_name, matrix)
+            finished = time.perf_counter()
+        except Exception as e:
+            for request in group:
+                request.error = e
+                request.done.set()
+            return
+        timings = {
+            "vectorize": (vectorized - started) * 1000,
+            "predict": (finished - vectorized) * 1000,
+        }
+        monitoring_utils.BATCH_SIZE.observe(len(group), model=first.model_name)
+        for i, (request, (label, confidence)) in enumerate(zip(group, results)):
+            request.result = (label, confidence, matrix[i])
+            request.timings = timings
+            request.batch_size = len(group)
+            request.done.set()
+
+
+DISPATCHER = MicroBatcher(Config.BATCH_MAX_SIZE, Config.BATCH_MAX_WAIT_MS)
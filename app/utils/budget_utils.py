@@ -0,0 +1,139 @@
+from config import Config
+
+
+# Режимы бюджета текста
+FULL = "full"        # весь текст документа
+HEAD = "head"        # первые N символов
+SAMPLED = "sampled"  # начало + выборка из середины + конец
+
+BUDGET_MODES = {
+    FULL: "Весь текст",
+    HEAD: "Начало документа",
+    SAMPLED: "Начало, середина и конец",
+}
+
+# Доли бюджета в режиме SAMPLED: заголовок документа самый информативный
+HEAD_SHARE = 0.5
+TAIL_SHARE = 0.2
+# На сколько фрагментов делится выборка из середины
+MIDDLE_SAMPLES = 5
+
+SEPARATOR = "\n"
+
+
+def _cut(text, limit, from_end=False):
+    """Обрезает текст до limit символов, не разрывая слово на границе"""
+    if len(text) <= limit:
+        return text
+    if from_end:
+        piece = text[-limit:]
+        space = piece.find(" ")
+        return piece[space + 1:] if 0 <= space < limit // 10 else piece
+    piece = text[:limit]
+    space = piece.rfind(" ")
+    return piece[:space] if space > limit - limit // 10 else piece
+
+
+def _sample(text, limit, samples=MIDDLE_SAMPLES):
+    """Равномерно расставленные по тексту фрагменты общей длиной до limit"""
+    if limit <= 0:
+        return ""
+    if len(text) <= limit:
+        return text
+    size = limit // samples
+    step = len(text) / samples
+    return SEPARATOR.join(
+        _cut(text[int(i * step):int(i * step) + size + 1], size) for i in range(samples)
+    )
+
+
+class TextBudget:
+    """Ограничение объема текста, который извлекается и подается в векторизатор"""
+
+    def __init__(self, mode=FULL, chars=0):
+        if mode not in BUDGET_MODES:
+            raise ValueError(f"Неизвестный режим бюджета текста: {mode}")
+        self.mode = mode
+        self.chars = int(chars)
+
+    @classmethod
+    def from_config(cls):
+        return cls(Config.TEXT_BUDGET_MODE, Config.TEXT_BUDGET_CHARS)
+
+    @classmethod
+    def parse(cls, value):
+        """'full', 'head:5000' или 'sampled:20000'"""
+        mode, _, chars = value.partition(":")
+        return cls(mode, chars or 0)
+
+    def __str__(self):
+        return self.mode if not self.enabled else f"{self.mode}:{self.chars}"
+
+    @property
+    def enabled(self) -> bool:
+        return self.mode != FULL and self.chars > 0
+
+    def shares(self):
+        """(символов из начала, из середины, из конца)"""
+        if self.mode == HEAD:
+            return self.chars, 0, 0
+        head = int(self.chars * HEAD_SHARE)
+        tail = int(self.chars * TAIL_SHARE)
+        return head, self.chars - head - tail, tail
+
+    def compose(self, head_text, middle_text="", tail_text=""):
+        """Собирает бюджетный текст из начала, середины и конца документа"""
+        head, middle, tail = self.shares()
+        parts = [_cut(head_text, head)]
+        if self.mode == SAMPLED:
+            parts.append(_sample(middle_text, middle))
+            parts.append(_cut(tail_text, tail, from_end=True))
+        return SEPARATOR.join(part for part in parts if part)
+
+    def apply(self, text):
+        if not text or not self.enabled or len(text) <= self.chars:
+            return text
+        head, _, tail = self.shares()
+        if self.mode == HEAD:
+            return self.compose(text)
+        return self.compose(text[:head], text[head:len(text) - tail], text[len(text) - tail:])
+
+    def apply_pages(self, page_text, page_count):
+        """Бюджет для постраничных документов: извлекаются только нужные страницы.
+
+        page_text(i) возвращает текст i-й страницы
+        """
+        if not self.enabled:
+            return SEPARATOR.join(page_text(i) for i in range(page_count))
+
+        cache = {}
+
+        def get(i):
+            if i not in cache:
+                cache[i] = page_text(i) or ""
+            return cache[i]
+
+        head, middle, tail = self.shares()
+        head_end, size = 0, 0
+        while head_end < page_count and size < head:
+            size += len(get(head_end)) + 1
+            head_end += 1
+        head_text = SEPARATOR.join(get(i) for i in range(head_end))
+        if self.mode == HEAD or head_end == page_count:
+            return self.apply(head_text)
+
+        tail_start, size = page_count, 0
+        while tail_start > head_end and size < tail:
+            tail_start -= 1
+            size += len(get(tail_start)) + 1
+        tail_text = SEPARATOR.join(get(i) for i in range(tail_start, page_count))
+
+        between = tail_start - head_end
+        step = between / MIDDLE_SAMPLES
+        middle_pages = sorted({head_end + int(i * step) for i in range(MIDDLE_SAMPLES)}) if between else []
+        middle_text = SEPARATOR.join(get(i) for i in middle_pages)
+
+        total = sum(len(text) + 1 for text in cache.values())
+        if len(cache) == page_count and total <= self.chars:
+            return SEPARATOR.join(get(i) for i in range(page_count))
+        return self.compose(head_text, middle_text, tail_text)
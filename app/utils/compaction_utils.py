@@ -0,0 +1,155 @@
+"""Сжатие набора моделей: удаление малозначимых признаков и хранение весов во float32.
+
+Признак удаляется, если во всех моделях его вес ниже порога (относительно самого
+весомого признака модели). Словарь векторизатора и матрицы всех моделей
+перенумеровываются согласованно, поэтому сжатый набор загружается приложением
+вместо исходного без изменений кода (см. Config.MODELS_DIR)
+"""
+import copy
+import numpy as np
+
+
+# Типы моделей, которые умеет сжимать compact_model_set
+SUPPORTED_MODELS = "MultinomialNB/ComplementNB, линейные модели (coef_), SVC, RandomForest, KMeans"
+
+
+def _spread(matrix):
+    """Насколько признак различает классы: размах весов по строкам (для одной строки — модуль)"""
+    matrix = np.asarray(matrix.toarray() if hasattr(matrix, "toarray") else matrix, dtype=float)
+    if matrix.ndim == 1 or matrix.shape[0] == 1:
+        return np.abs(matrix.ravel())
+    return matrix.max(axis=0) - matrix.min(axis=0)
+
+
+def _normalized(weights):
+    top = weights.max() if weights.size else 0.0
+    return weights / top if top > 0 else weights
+
+
+def _columns_abs_max(matrix):
+    """Максимальный модуль по каждому столбцу (плотной или разреженной матрицы)"""
+    if hasattr(matrix, "tocsc"):
+        return np.asarray(abs(matrix).max(axis=0).todense()).ravel()
+    return np.abs(matrix).max(axis=0)
+
+
+def _used_tree_features(forest, n_features):
+    used = np.zeros(n_features)
+    for tree in forest.estimators_:
+        features = tree.tree_.feature
+        used[features[features >= 0]] = 1.0
+    return used
+
+
+def feature_weights(model, n_features):
+    """Вес каждого признака в модели от 0 до 1.
+
+    Признаки, на которых модель делает разбиения (деревья), получают вес 1 —
+    их нельзя удалить без изменения модели
+    """
+    if hasattr(model, "estimators_") and hasattr(model.estimators_[0], "tree_"):
+        return _used_tree_features(model, n_features)
+    if hasattr(model, "feature_log_prob_"):
+        # Признак с одинаковой вероятностью во всех классах не влияет на argmax
+        return _normalized(_spread(model.feature_log_prob_))
+    if hasattr(model, "support_vectors_"):
+        return _normalized(_columns_abs_max(model.support_vectors_))
+    if hasattr(model, "coef_"):
+        return _normalized(_spread(model.coef_))
+    if hasattr(model, "cluster_centers_"):
+        return _normalized(_spread(model.cluster_centers_))
+    raise ValueError(f"Сжатие модели {type(model).__name__} не поддерживается ({SUPPORTED_MODELS})")
+
+
+def select_features(models, n_features, threshold):
+    """Индексы признаков, вес которых хотя бы в одной модели не ниже порога"""
+    weights = np.zeros(n_features)
+    for model in models.values():
+        weights = np.maximum(weights, feature_weights(model, n_features))
+    return np.flatnonzero(weights >= threshold)
+
+
+def _remap_tree(tree, remap, n_features):
+    """Пересобирает дерево sklearn с новой нумерацией признаков"""
+    cls, args, state = tree.__reduce__()
+    nodes = state["nodes"].copy()
+    split = nodes["feature"] >= 0
+    nodes["feature"][split] = remap[nodes["feature"][split]]
+    if (nodes["feature"][split] < 0).any():
+        raise ValueError("Дерево использует удаленный признак")
+    new_tree = cls(n_features, *args[1:])
+    new_tree.__setstate__({**state, "nodes": nodes})
+    return new_tree
+
+
+def remap_model(model, keep, dtype=np.float32):
+    """Копия модели, работающая только с признаками keep"""
+    model = copy.deepcopy(model)
+    n_features = len(keep)
+
+    if hasattr(model, "estimators_") and hasattr(model.estimators_[0], "tree_"):
+        remap = np.full(model.n_features_in_, -1, dtype=np.intp)
+        remap[keep] = np.arange(n_features)
+        for estimator in model.estimators_:
+            estimator.tree_ = _remap_tree(estimator.tree_, remap, n_features)
+            estimator.n_features_in_ = n_features
+    elif hasattr(model, "feature_log_prob_"):
+        model.feature_log_prob_ = model.feature_log_prob_[:, keep].astype(dtype)
+        if hasattr(model, "feature_count_"):
+            model.feature_count_ = model.feature_count_[:, keep].astype(dtype)
+        model.class_log_prior_ = model.class_log_prior_.astype(dtype)
+    elif hasattr(model, "support_vectors_"):
+        # libsvm работает только с float64, поэтому у SVC сокращаются лишь столбцы
+        support_vectors = model.support_vectors_[:, keep]
+        if hasattr(support_vectors, "sorted_indices"):
+            model.support_vectors_ = support_vectors.sorted_indices()
+        else:
+            model.support_vectors_ = np.ascontiguousarray(support_vectors)
+        model.shape_fit_ = (model.shape_fit_[0], n_features)
+    elif hasattr(model, "coef_"):
+        model.coef_ = np.ascontiguousarray(model.coef_[:, keep], dtype=dtype)
+        model.intercept_ = np.asarray(model.intercept_, dtype=dtype)
+    elif hasattr(model, "cluster_centers_"):
+        # KMeans требует одинаковый тип у центров и входных векторов
+        model.cluster_centers_ = np.ascontiguousarray(model.cluster_centers_[:, keep], dtype=dtype)
+    else:
+        raise ValueError(f"Сжатие модели {type(model).__name__} не поддерживается ({SUPPORTED_MODELS})")
+
+    model.n_features_in_ = n_features
+    return model
+
+
+def remap_vectorizer(vectorizer, keep, dtype=np.float32):
+    """Копия векторизатора со словарем только из признаков keep"""
+    vectorizer = copy.deepcopy(vectorizer)
+    terms = {index: term for term, index in vectorizer.vocabulary_.items()}
+    idf = vectorizer.idf_ if getattr(vectorizer, "use_idf", False) else None
+
+    # Словарь обновляется раньше idf_: сеттер idf_ сверяет их размеры
+    vectorizer.vocabulary_ = {terms[old]: new for new, old in enumerate(keep)}
+    if idf is not None:
+        vectorizer.idf_ = np.asarray(idf[keep], dtype=dtype)
+    tfidf = getattr(vectorizer, "_tfidf", None)
+    if tfidf is not None and hasattr(tfidf, "n_features_in_"):
+        # Внутренний TfidfTransformer сверяет число столбцов входа (в том числе при use_idf=False)
+        tfidf.n_features_in_ = len(keep)
+    if hasattr(vectorizer, "stop_words_"):
+        # Нужен только для диагностики, а занимает память на весь отброшенный словарь
+        vectorizer.stop_words_ = set()
+    vectorizer.dtype = dtype
+    return vectorizer
+
+
+def compact_model_set(vectorizer, models, threshold, float32=True):
+    """Сжимает векторизатор и все модели согласованно.
+
+    Возвращает (векторизатор, {имя: модель}, индексы сохраненных признаков)
+    """
+    n_features = len(vectorizer.vocabulary_)
+    keep = select_features(models, n_features, threshold)
+    if keep.size == 0:
+        raise ValueError(f"При пороге {threshold} не остается ни одного признака")
+
+    dtype = np.float32 if float32 else np.float64
+    compact_models = {name: remap_model(model, keep, dtype) for name, model in models.items()}
+    return remap_vectorizer(vectorizer, keep, dtype), compact_models, keep
@@ -0,0 +1,90 @@
+"""Потоковое извлечение текста из DOCX без построения дерева python-docx.
+
+Части OOXML-архива (основной текст, колонтитулы, сноски) читаются
+инкрементальным XML-парсером абзац за абзацем; разобранные элементы сразу
+освобождаются. Текст из таблиц, гиперссылок и исправлений попадает в
+результат, в отличие от Document.paragraphs. В режиме бюджета head чтение
+прекращается, как только набрано нужное число символов. Части читаются с
+лимитами распаковки архивов (ARCHIVE_MAX_FILE_MB, ARCHIVE_MAX_RATIO), поэтому
+DOCX-бомба отклоняется, не разворачиваясь в памяти
+"""
+import re
+import zipfile
+from xml.etree.ElementTree import iterparse
+from .budget_utils import HEAD, SEPARATOR
+from .zip_utils import MemberRejected, archive_limits, open_member
+
+
+W = "{http://schemas.openxmlformats.org/wordprocessingml/2006/main}"
+
+MAIN_PART = "word/document.xml"
+# Колонтитулы и сноски идут после основного текста: начало документа важнее для модели
+EXTRA_PARTS = re.compile(r"^word/(header\d*|footer\d*|footnotes|endnotes)\.xml$")
+
+# Элементы, которые в тексте абзаца становятся пробельными символами
+BREAKS = {f"{W}tab": "\t", f"{W}br": "\n", f"{W}cr": "\n"}
+
+
+def docx_parts(archive):
+    """Имена XML-частей с текстом в порядке извлечения"""
+    names = set(archive.namelist())
+    if MAIN_PART not in names:
+        raise ValueError("в архиве нет word/document.xml — это не DOCX")
+    return [MAIN_PART] + sorted(name for name in names if EXTRA_PARTS.match(name))
+
+
+def iter_paragraphs(stream):
+    """Абзацы (включая абзацы ячеек таблиц) одной XML-части в порядке следования"""
+    pieces = []
+    for _, elem in iterparse(stream, events=("end",)):
+        tag = elem.tag
+        if tag == f"{W}t":
+            if elem.text:
+                pieces.append(elem.text)
+        elif tag in BREAKS:
+            pieces.append(BREAKS[tag])
+        elif tag == f"{W}p":
+            yield "".join(pieces)
+            pieces = []
+            elem.clear()
+        elif tag == f"{W}tc":
+            # Ячейки уже разобраны по абзацам, в памяти их держать незачем
+            elem.clear()
+
+
+def iter_docx_paragraphs(file):
+    """Непустые абзацы всех текстовых частей DOCX (file — путь или поток).
+
+    MemberRejected — если часть превышает лимиты распаковки
+    """
+    limits = archive_limits()
+    with zipfile.ZipFile(file) as archive:
+        for name in docx_parts(archive):
+            try:
+                with open_member(archive, name, limits) as stream:
+                    for paragraph in iter_paragraphs(stream):
+                        if paragraph.strip():
+                            yield paragraph
+            except MemberRejected as e:
+                raise MemberRejected(f"{name}: {e}") from e
+
+
+def extract_docx(file, budget=None):
+    """Текст DOCX с учетом бюджета (TextBudget)"""
+    paragraphs = iter_docx_paragraphs(file)
+    if budget is None or not budget.enabled:
+        return SEPARATOR.join(paragraphs)
+
+    if budget.mode == HEAD:
+        collected, size = [], 0
+        for paragraph in paragraphs:
+            collected.append(paragraph)
+            size += len(paragraph) + 1
+            if size >= budget.chars:
+                break
+        paragraphs.close()
+        return budget.apply(SEPARATOR.join(collected))
+
+    # Для выборки из середины и конца нужен весь список абзацев (только строки)
+    collected = list(paragraphs)
+    return budget.apply_pages(lambda i: collected[i], len(collected))
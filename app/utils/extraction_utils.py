@@ -0,0 +1,243 @@
+"""Единый потоковый слой извлечения текста.
+
+extract_text принимает байты, путь к файлу или бинарный поток (в том числе
+streamlit UploadedFile), определяет формат по сигнатуре содержимого (имя и
+MIME-тип — только подсказка для текстовых файлов), декодирует текст кусками
+с определением кодировки и с бюджетом читает только нужные части файла.
+Все точки входа (страницы, архивы, API, пакетная классификация) используют его
+"""
+import codecs
+import io
+import os
+import tempfile
+import zipfile
+from .budget_utils import HEAD, MIDDLE_SAMPLES, SEPARATOR
+from .docx_utils import MAIN_PART, extract_docx
+
+
+# Форматы документов
+TXT = "txt"
+PDF = "pdf"
+DOCX = "docx"
+
+# MIME-тип загруженного файла -> формат (если сигнатура не распознана)
+MIME_FORMATS = {
+    "text/plain": TXT,
+    "application/pdf": PDF,
+    "application/vnd.openxmlformats-officedocument.wordprocessingml.document": DOCX,
+    "application/msword": DOCX,
+}
+
+CHUNK_SIZE = 64 * 1024
+
+# Сколько байт читать на символ бюджета из текстового файла (кириллица в UTF-8 — 2 байта)
+TXT_BYTES_PER_CHAR = 4
+
+# Объем начала файла, по которому определяется кодировка и отличается текст от двоичных данных
+SNIFF_BYTES = 64 * 1024
+
+# Однобайтовая кодировка, если текст не является корректным UTF-8
+FALLBACK_ENCODING = "cp1251"
+
+# Кодеки utf-16-le/be не убирают BOM сами, в отличие от utf-8-sig
+BOM_CHAR = "\ufeff"
+
+BOMS = [
+    (codecs.BOM_UTF8, "utf-8-sig"),
+    (codecs.BOM_UTF16_LE, "utf-16-le"),
+    (codecs.BOM_UTF16_BE, "utf-16-be"),
+]
+
+
+class ExtractionError(ValueError):
+    """Формат файла не поддерживается или файл поврежден"""
+
+
+class _Source:
+    """Seekable бинарный поток для любого источника; закрывает только то, что открыл сам"""
+
+    def __init__(self, source):
+        self._owned = None
+        if isinstance(source, (bytes, bytearray, memoryview)):
+            self.stream = self._owned = io.BytesIO(source)
+        elif isinstance(source, (str, os.PathLike)):
+            self.stream = self._owned = open(source, "rb")
+        elif getattr(source, "seekable", lambda: False)():
+            self.stream = source
+            self.stream.seek(0)
+        else:
+            # Несеекабельный поток (сокет, pipe) копируется во временный файл
+            self.stream = self._owned = tempfile.SpooledTemporaryFile(max_size=SNIFF_BYTES * 16)
+            while chunk := source.read(CHUNK_SIZE):
+                self.stream.write(chunk)
+            self.stream.seek(0)
+
+    def size(self):
+        position = self.stream.tell()
+        size = self.stream.seek(0, os.SEEK_END)
+        self.stream.seek(position)
+        return size
+
+    def close(self):
+        if self._owned is not None:
+            self._owned.close()
+
+
+def source_name(source, name=None):
+    if name:
+        return name
+    if isinstance(source, (str, os.PathLike)):
+        return os.path.basename(source)
+    return getattr(source, "name", "") or ""
+
+
+def source_size(source):
+    """Размер источника в байтах без чтения содержимого (None, если неизвестен)"""
+    size = getattr(source, "size", None)
+    if size is not None:
+        return size
+    if isinstance(source, (bytes, bytearray, memoryview)):
+        return len(source)
+    if isinstance(source, (str, os.PathLike)):
+        return os.path.getsize(source)
+    if hasattr(source, "getbuffer"):
+        return source.getbuffer().nbytes
+    return None
+
+
+def sniff_format(stream, name="", mime_type=None):
+    """Формат по сигнатуре: PDF, DOCX (ZIP с word/document.xml) или текст"""
+    head = stream.read(8)
+    stream.seek(0)
+    if head.startswith(b"%PDF"):
+        return PDF
+    if head.startswith(b"PK\x03\x04"):
+        try:
+            with zipfile.ZipFile(stream) as archive:
+                is_docx = MAIN_PART in archive.namelist()
+        except zipfile.BadZipFile:
+            is_docx = False
+        stream.seek(0)
+        if is_docx:
+            return DOCX
+        raise ExtractionError("ZIP-архив не является документом DOCX")
+    if head.startswith(b"\xd0\xcf\x11\xe0"):
+        raise ExtractionError("формат .doc (Word 97-2003) не поддерживается, сохраните файл как .docx")
+    if any(head.startswith(bom) for bom, _ in BOMS):
+        return TXT
+
+    sample = stream.read(SNIFF_BYTES)
+    stream.seek(0)
+    if b"\x00" not in sample:
+        return TXT
+    hinted = MIME_FORMATS.get(mime_type) or os.path.splitext(name)[1].lower().lstrip(".")
+    raise ExtractionError(f"файл не похож на текст{f' ({hinted})' if hinted else ''}")
+
+
+def detect_encoding(stream):
+    """Кодировка по BOM, иначе UTF-8, если начало файла корректно в UTF-8, иначе cp1251"""
+    head = stream.read(SNIFF_BYTES)
+    stream.seek(0)
+    for bom, encoding in BOMS:
+        if head.startswith(bom):
+            return encoding
+    try:
+        # final=False: обрезанный на границе куска многобайтовый символ не ошибка
+        codecs.getincrementaldecoder("utf-8")().decode(head, final=False)
+        return "utf-8"
+    except UnicodeDecodeError:
+        return FALLBACK_ENCODING
+
+
+def _decode_range(stream, encoding, start, length):
+    """Текст из length байт с позиции start; обрывки символов на краях отбрасываются"""
+    if encoding.startswith("utf-16"):
+        start -= start % 2
+    stream.seek(start)
+    decoder = codecs.getincrementaldecoder(encoding)(errors="ignore" if start else "strict")
+    text = decoder.decode(stream.read(length), final=False)
+    return text.removeprefix(BOM_CHAR) if not start else text
+
+
+def _decode_all(stream, encoding, limit=None):
+    """Текст кусками по CHUNK_SIZE; с limit чтение прекращается после limit символов"""
+    decoder = codecs.getincrementaldecoder(encoding)()
+    parts, size = [], 0
+    while chunk := stream.read(CHUNK_SIZE):
+        text = decoder.decode(chunk)
+        parts.append(text if parts else text.removeprefix(BOM_CHAR))
+        size += len(text)
+        if limit is not None and size >= limit:
+            return "".join(parts)
+    parts.append(decoder.decode(b"", final=True))
+    return "".join(parts)
+
+
+def _sample_ranges(stream, encoding, budget, size):
+    """Бюджет sampled для большого файла: начало, фрагменты середины и конец читаются по смещениям"""
+    head, middle, tail = budget.shares()
+    head_bytes, tail_bytes = head * TXT_BYTES_PER_CHAR, tail * TXT_BYTES_PER_CHAR
+    middle_start, middle_end = head_bytes, size - tail_bytes
+    sample_bytes = middle * TXT_BYTES_PER_CHAR // MIDDLE_SAMPLES
+    step = (middle_end - middle_start) / MIDDLE_SAMPLES
+    fragments = [
+        _decode_range(stream, encoding, int(middle_start + i * step), sample_bytes)
+        for i in range(MIDDLE_SAMPLES)
+    ]
+    return budget.compose(
+        _decode_range(stream, encoding, 0, head_bytes),
+        SEPARATOR.join(fragments),
+        _decode_range(stream, encoding, middle_end, tail_bytes),
+    )
+
+
+def decode_text(stream, budget=None, size=None, encoding=None):
+    """Текст файла с определением кодировки; с бюджетом читаются только нужные байты"""
+    encoding = encoding or detect_encoding(stream)
+    try:
+        if budget is None or not budget.enabled:
+            return _decode_all(stream, encoding)
+        if budget.mode == HEAD:
+            return budget.apply(_decode_all(stream, encoding, limit=budget.chars))
+        if size is None or size <= budget.chars * TXT_BYTES_PER_CHAR:
+            return budget.apply(_decode_all(stream, encoding))
+        return _sample_ranges(stream, encoding, budget, size)
+    except UnicodeDecodeError:
+        if encoding != "utf-8":
+            raise
+        # Начало файла корректно в UTF-8, а дальше нет: файл целиком в однобайтовой кодировке
+        stream.seek(0)
+        return decode_text(stream, budget, size, FALLBACK_ENCODING)
+
+
+def _pdf_text(stream, timer, budget):
+    from PyPDF2 import PdfReader
+
+    pages = PdfReader(stream).pages
+    if timer is not None:
+        timer.info["page_count"] = len(pages)
+    if budget is not None and budget.enabled:
+        return budget.apply_pages(lambda i: pages[i].extract_text(), len(pages))
+    return SEPARATOR.join(page.extract_text() for page in pages)
+
+
+def extract_text(source, name=None, mime_type=None, timer=None, budget=None):
+    """Текст документа из байтов, пути или потока.
+
+    Бросает ExtractionError, если формат не поддерживается
+    """
+    name = source_name(source, name)
+    mime_type = mime_type or getattr(source, "type", None)
+    opened = _Source(source)
+    try:
+        stream = opened.stream
+        fmt = sniff_format(stream, name, mime_type)
+        if timer is not None:
+            timer.info["file_type"] = fmt
+        if fmt == PDF:
+            return _pdf_text(stream, timer, budget)
+        if fmt == DOCX:
+            return extract_docx(stream, budget)
+        return decode_text(stream, budget, opened.size())
+    finally:
+        opened.close()
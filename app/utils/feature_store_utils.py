@@ -0,0 +1,124 @@
+"""Сохранение признаков классифицированных документов для переклассификации.
+
+При FEATURE_STORE=text в БД сохраняется извлеченный текст, при
+FEATURE_STORE=tfidf — разреженная строка TF-IDF векторизатора (индексы
+int32 и веса float32). Данные сжимаются zlib и хранятся по SHA-256 текста,
+поэтому одинаковые документы занимают одну запись. Текст подходит для любой
+версии набора моделей, TF-IDF — только для векторизатора с тем же отпечатком
+(словарь и веса idf), зато переклассификация по нему сводится к умножению
+матриц без векторизации
+"""
+import hashlib
+import struct
+import weakref
+import zlib
+from config import Config
+
+
+TEXT = "text"
+TFIDF = "tfidf"
+FEATURE_KINDS = (TEXT, TFIDF)
+
+# Уровень сжатия zlib: 6 — обычный компромисс скорости и размера
+COMPRESSION_LEVEL = 6
+
+# Отпечатки уже загруженных векторизаторов: словарь хешируется один раз
+_fingerprints = weakref.WeakKeyDictionary()
+
+
+def mode():
+    """Что сохранять для новых документов: text, tfidf или '' (ничего)"""
+    value = Config.FEATURE_STORE.strip().lower()
+    if value and value not in FEATURE_KINDS:
+        raise ValueError(f"Неизвестный режим FEATURE_STORE: {value}")
+    return value
+
+
+def content_hash(text):
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+
+def vectorizer_fingerprint(vectorizer):
+    """SHA-256 словаря и весов idf: строки TF-IDF совместимы только при равных отпечатках.
+
+    Версия набора для этого не годится: новая версия может переиспользовать
+    векторизатор, а пересобранный векторизатор — сохранить имя версии
+    """
+    fingerprint = _fingerprints.get(vectorizer)
+    if fingerprint is None:
+        import numpy as np
+
+        digest = hashlib.sha256()
+        for term, index in sorted(vectorizer.vocabulary_.items(), key=lambda item: item[1]):
+            digest.update(f"{index}\t{term}\n".encode("utf-8"))
+        idf = getattr(vectorizer, "idf_", None)
+        if idf is not None:
+            digest.update(np.asarray(idf, dtype=np.float64).tobytes())
+        fingerprint = digest.hexdigest()
+        _fingerprints[vectorizer] = fingerprint
+    return fingerprint
+
+
+def encode_text(text):
+    return zlib.compress(text.encode("utf-8"), COMPRESSION_LEVEL)
+
+
+def decode_text(payload):
+    return zlib.decompress(payload).decode("utf-8")
+
+
+def encode_vector(row):
+    """Сжатая строка разреженной матрицы 1×n: число ненулевых, индексы, веса"""
+    import numpy as np
+
+    row = row.tocsr()
+    indices = row.indices.astype(np.int32)
+    data = row.data.astype(np.float32)
+    return zlib.compress(struct.pack("<I", len(indices)) + indices.tobytes() + data.tobytes(), COMPRESSION_LEVEL)
+
+
+def decode_vector(payload):
+    """(индексы, веса) сохраненной строки"""
+    import numpy as np
+
+    raw = zlib.decompress(payload)
+    (nnz,) = struct.unpack_from("<I", raw)
+    indices = np.frombuffer(raw, dtype=np.int32, count=nnz, offset=4)
+    data = np.frombuffer(raw, dtype=np.float32, count=nnz, offset=4 + 4 * nnz)
+    return indices, data
+
+
+def stack_vectors(payloads, n_features):
+    """CSR-матрица из сохраненных строк TF-IDF без промежуточных векторов"""
+    import numpy as np
+    from scipy.sparse import csr_matrix
+
+    rows = [decode_vector(payload) for payload in payloads]
+    indptr = np.zeros(len(rows) + 1, dtype=np.int64)
+    np.cumsum([len(indices) for indices, _ in rows], out=indptr[1:])
+    indices = np.concatenate([indices for indices, _ in rows]) if rows else np.zeros(0, np.int32)
+    data = np.concatenate([data for _, data in rows]) if rows else np.zeros(0, np.float32)
+    return csr_matrix((data.astype(np.float64), indices, indptr), shape=(len(rows), n_features))
+
+
+def capture(text, vector=None, vectorizer=None):
+    """Признаки документа для сохранения вместе с классификацией или None.
+
+    vector — строка TF-IDF этого vectorizer, если документ уже векторизован
+    целиком; для документов, оцененных окнами, строка строится векторизатором
+    """
+    kind = mode()
+    if not kind or not text:
+        return None
+    features = {"content_hash": content_hash(text), "kind": kind, "vectorizer_hash": "", "n_features": None}
+    if kind == TEXT:
+        features["payload"] = encode_text(text)
+        return features
+    if vectorizer is None:
+        return None
+    if vector is None:
+        vector = vectorizer.transform([text])
+    features["payload"] = encode_vector(vector)
+    features["n_features"] = int(vector.shape[1])
+    features["vectorizer_hash"] = vectorizer_fingerprint(vectorizer)
+    return features
@@ -0,0 +1,90 @@
+import copy
+import random
+
+
+# Классы хранятся в БД по-русски, модели обучены на английских метках
+MODEL_LABELS = {
+    "Приказ": "Order",
+    "Постановление": "Ordinance",
+    "Письмо": "Letters",
+    "Общее": "Miscellaneous",
+}
+
+
+def supports_incremental(model) -> bool:
+    """Дообучение без полного переобучения: счетчики NB, SGD-модели (partial_fit)"""
+    return hasattr(model, "partial_fit") and hasattr(model, "classes_")
+
+
+def build_samples(rated, texts_by_hash, texts_by_filename):
+    """Подтвержденные оценками классификации -> [(текст, метка модели)].
+
+    rated — DataFrame из Database.get_rated_classifications. Текст документа
+    с известным content_hash берется только по хешу (сохраненный текст или
+    файл с тем же текстом). Без хеша — по имени файла, если под этим именем
+    сохранен один документ. Один документ, оцененный несколько раз, дает один
+    пример. Возвращает (примеры, пропущено без текста, пропущено из-за
+    неоднозначного имени)
+    """
+    documents_by_name = {}
+    for row in rated.itertuples(index=False):
+        documents_by_name.setdefault(row.filename, set()).add(row.id_document)
+
+    samples, missing, ambiguous, seen = [], 0, 0, set()
+    for row in rated.itertuples(index=False):
+        label = MODEL_LABELS.get(row.predicted_class)
+        if label is None or row.id_classification in seen:
+            continue
+        seen.add(row.id_classification)
+        if isinstance(row.content_hash, str) and row.content_hash:
+            text = texts_by_hash.get(row.content_hash)
+        elif len(documents_by_name[row.filename]) > 1:
+            ambiguous += 1
+            continue
+        else:
+            text = texts_by_filename.get(row.filename)
+        if not text:
+            missing += 1
+            continue
+        samples.append((text, label))
+    return samples, missing, ambiguous
+
+
+def split_holdout(samples, fraction, seed=42):
+    """Отложенная выборка для оценки «до/после» (перемешивание с фиксированным seed)"""
+    shuffled = list(samples)
+    random.Random(seed).shuffle(shuffled)
+    size = int(len(shuffled) * fraction)
+    return shuffled[size:], shuffled[:size]
+
+
+def update_models(models, vectorizer, samples):
+    """Дообучает копии моделей, поддерживающих partial_fit.
+
+    Возвращает ({имя: обновленная модель}, {имя: причина, по которой модель не обновлена})
+    """
+    texts = [text for text, _ in samples]
+    labels = [label for _, label in samples]
+    matrix = vectorizer.transform(texts)
+
+    updated, skipped = {}, {}
+    for name, model in models.items():
+        if not supports_incremental(model):
+            skipped[name] = "не поддерживает дообучение (partial_fit)"
+            continue
+        known = set(model.classes_)
+        rows = [i for i, label in enumerate(labels) if label in known]
+        if not rows:
+            skipped[name] = "нет примеров с классами модели"
+            continue
+        model = copy.deepcopy(model)
+        model.partial_fit(matrix[rows], [labels[i] for i in rows])
+        updated[name] = model
+    return updated, skipped
+
+
+def accuracy(model, vectorizer, samples):
+    if not samples:
+        return None
+    predictions = model.predict(vectorizer.transform([text for text, _ in samples]))
+    return sum(str(p) == label for p, (_, label) in zip(predictions, samples)) / len(samples)
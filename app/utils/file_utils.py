@@ -1,21 +1,16 @@
 import streamlit as st
-import pandas as pd
+from .extraction_utils import ExtractionError, extract_text
 
 
-# Обработка текстов документов, которые подаются в векторизатор
-def extract_text_from_file(uploaded_file):
+# Обработка текстов документов, которые подаются в векторизатор.
+# source — загруженный файл, путь, байты или поток; формат определяется по содержимому.
+# С бюджетом (TextBudget) читается только та часть документа, которая нужна модели
+def extract_text_from_file(source, timer=None, budget=None):
     try:
-        if uploaded_file.type == "text/plain":
-            return str(uploaded_file.read(), "utf-8")
-        elif uploaded_file.type == "application/pdf":
-            from PyPDF2 import PdfReader
-            return "\n".join([page.extract_text() for page in PdfReader(uploaded_file).pages])
-        elif uploaded_file.type in ["application/vnd.openxmlformats-officedocument.wordprocessingml.document", "application/msword"]:
-            from docx import Document
-            return "\n".join([para.text for para in Document(uploaded_file).paragraphs])
-        else:
-            st.error("Неподдерживаемый формат файла")
-            return None
+        return extract_text(source, timer=timer, budget=budget)
+    except ExtractionError as e:
+        st.error(f"Неподдерживаемый формат файла: {e}")
+        return None
     except Exception as e:
         st.error(f"Ошибка чтения файла: {e}")
         return None
@@ -23,6 +18,8 @@ def extract_text_from_file(uploaded_file):
     
 # Функция фильтрации истории классификаций
 def filter_history(df):
+    import pandas as pd
+
     model_filter = st.selectbox(
         "Фильтр по модели", 
         options=["Все"] + sorted(df['model_used'].unique().tolist())
@@ -0,0 +1,66 @@
+import time
+from contextlib import contextmanager
+
+
+# Этапы обработки документа в порядке выполнения
+STAGES = ["extract", "langdetect", "vectorize", "load_model", "predict", "db"]
+
+# Русские названия этапов для аналитики
+STAGE_LABELS = {
+    "extract": "Извлечение текста",
+    "langdetect": "Определение языка",
+    "vectorize": "Векторизация",
+    "load_model": "Загрузка модели",
+    "predict": "Предсказание",
+    "db": "Запись в БД",
+    "total": "Всего",
+}
+
+# MIME-тип -> короткое название формата
+FILE_TYPES = {
+    "text/plain": "txt",
+    "application/pdf": "pdf",
+    "application/vnd.openxmlformats-officedocument.wordprocessingml.document": "docx",
+    "application/msword": "doc",
+}
+
+
+class StageTimer:
+    """Накопитель длительностей этапов обработки одного документа (в мс)"""
+
+    def __init__(self):
+        self.stages = {}
+        self.info = {}
+        self._start = time.perf_counter()
+
+    @contextmanager
+    def stage(self, name):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.stages[name] = self.stages.get(name, 0.0) + (time.perf_counter() - start) * 1000
+
+    def total_ms(self):
+        return (time.perf_counter() - self._start) * 1000
+
+    def describe_file(self, uploaded_file):
+        """Запоминает размер и формат загруженного файла (уточняется при извлечении текста)"""
+        from .extraction_utils import source_size
+
+        self.info["file_size"] = source_size(uploaded_file)
+        self.info["file_type"] = FILE_TYPES.get(getattr(uploaded_file, "type", None), "other")
+
+    def as_row(self, model_name, source):
+        """Строка для таблицы classification_metrics"""
+        return {
+            "model_used": model_name,
+            "source": source,
+            "file_type": self.info.get("file_type"),
+            "file_size": self.info.get("file_size"),
+            "page_count": self.info.get("page_count"),
+            "word_count": self.info.get("word_count"),
+            **{f"{name}_ms": round(self.stages[name], 3) if name in self.stages else None for name in STAGES},
+            "total_ms": round(self.total_ms(), 3),
+            "model_version": self.info.get("model_version"),
+        }
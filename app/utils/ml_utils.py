@@ -1,29 +1,43 @@
 import streamlit as st
-import joblib
 import os
+import time
+from config import Config
 from .file_utils import extract_text_from_file
-from langdetect import detect
-import numpy as np
+from .metrics_utils import StageTimer
+from .budget_utils import TextBudget
+from . import batching_utils, feature_store_utils, monitoring_utils, search_utils, shadow_utils
 
 
 # Model configurations for single file classification
 MODELS = {
-    "Наивный Байес": "models/naive_bayes.pkl",
-    "Метод опорных векторов (SVC)": "models/svc.pkl",
-    "Логистическая регрессия": "models/logistic_regression.pkl",
-    "Случайный лес": "models/random_forest.pkl",
-    "Кластеризация": "models/clasterisation.pkl"
+    "Наивный Байес": f"{Config.MODELS_DIR}/naive_bayes.pkl",
+    "Метод опорных векторов (SVC)": f"{Config.MODELS_DIR}/svc.pkl",
+    "Логистическая регрессия": f"{Config.MODELS_DIR}/logistic_regression.pkl",
+    "Случайный лес": f"{Config.MODELS_DIR}/random_forest.pkl",
+    "Кластеризация": f"{Config.MODELS_DIR}/clasterisation.pkl"
 }
 
 # Model configurations for .zip archive classification
 MODELS_ZIP = {
-    "Наивный Байес": "models/naive_bayes.pkl",
-    "Метод опорных векторов (SVC)": "models/svc.pkl",
-    "Логистическая регрессия": "models/logistic_regression.pkl",
-    "Случайный лес": "models/random_forest.pkl",
-    "Кластеризация": "models/clasterisation.pkl",
+    "Наивный Байес": f"{Config.MODELS_DIR}/naive_bayes.pkl",
+    "Метод опорных векторов (SVC)": f"{Config.MODELS_DIR}/svc.pkl",
+    "Логистическая регрессия": f"{Config.MODELS_DIR}/logistic_regression.pkl",
+    "Случайный лес": f"{Config.MODELS_DIR}/random_forest.pkl",
+    "Кластеризация": f"{Config.MODELS_DIR}/clasterisation.pkl",
 }
 
+# Russian class names for predictions (clusters are numbered, other models return English labels)
+CLUSTER_NAMES = {0: "Приказ", 1: "Постановление", 2: "Письмо", 3: "Общее"}
+CLASS_NAMES = {"Order": "Приказ", "Ordinance": "Постановление", "Letters": "Письмо", "Miscellaneous": "Общее"}
+
+
+def translate_prediction(prediction, model_name):
+    """Russian class name for a model prediction, as shown on the pages"""
+    if model_name == "Кластеризация":
+        return CLUSTER_NAMES.get(prediction, f"Кластер {prediction}")
+    return CLASS_NAMES.get(prediction, prediction)
+
+
 class AnomalyAwareClassifier:
     """Classifier with integrated anomaly detection capability"""
     
@@ -54,20 +68,42 @@ class AnomalyAwareClassifier:
             return label, confidence
 
 def load_model(model_name):
-    """Load trained model from pickle file with validation checks"""
+    """Return a process-wide shared model from the model set pinned to the request (or the active one)"""
+    # Imported lazily: the registry depends on model_set_utils, which imports MODELS from here
+    from . import model_registry
+    return model_registry.current().model(model_name)
+
+
+def current_model_version():
+    """Version of the model set serving the current request (recorded with its metrics)"""
+    from . import model_registry
+    return model_registry.current().version
+
+
+def _load_model_from_disk(model_name, directory=None):
+    """Load trained model from pickle file with validation checks.
+
+    directory points to a versioned model set; by default models come from Config.MODELS_DIR
+    """
     try:
         if model_name not in MODELS:
             st.error(f"Неизвестная модель: {model_name}")
             return None
             
         model_path = MODELS[model_name]
+        if directory is not None:
+            model_path = os.path.join(directory, os.path.basename(model_path))
         if not os.path.exists(model_path):
             st.error(f"Файл модели {model_path} не найден")
             return None
             
+        # joblib pulls in sklearn/scipy, so it is imported only when a model is actually loaded
+        import joblib
+
         # Make sure AnomalyAwareClassifier is available when unpickling
         global AnomalyAwareClassifier
         model = joblib.load(model_path)
+        monitoring_utils.CACHE_REQUESTS.inc(cache="model", result="miss")
         
         # Special validation for anomaly detector
         if model_name == "Ансамбль моделей (детектор аномалий)":
@@ -78,6 +114,7 @@ def load_model(model_name):
             st.error(f"Модель {model_name} не поддерживает метод predict")
             return None
             
+        monitoring_utils.set_model_memory(model_name, model)
         return model
         
     except Exception as e:
@@ -85,55 +122,277 @@ def load_model(model_name):
         return None
     
 
-def classify_document(uploaded_file, model_name, vectorizer):
-    """Classify document using specified model and return results"""
+def predict_with_model(model, model_name, vector):
+    """Predict class and confidence for an already vectorized document"""
+    import numpy as np
+
+    if model_name == "Ансамбль моделей (детектор аномалий)":
+        label, conf_str = model.predict_vector(vector)
+        try:
+            confidence = float(conf_str) if conf_str != "-" else None
+        except (ValueError, TypeError):
+            confidence = None
+        return label, confidence
+    elif model_name == "Кластеризация":
+        # Clustering doesn't provide confidence scores
+        return model.predict(vector)[0], None
+
+    # Try different prediction methods
+    if hasattr(model, "predict_proba"):
+        proba = model.predict_proba(vector)[0]
+        return model.classes_[np.argmax(proba)], np.max(proba)
+    elif hasattr(model, "decision_function"):
+        scores = model.decision_function(vector)[0]
+        return model.classes_[np.argmax(scores)], (scores.max() - scores.min()) / 10
+    return model.predict(vector)[0], None
+
+
+def split_windows(text, window_words):
+    """Splits text into consecutive windows of window_words words: [(first word index, window text)]"""
+    words = text.split()
+    return [
+        (start, " ".join(words[start:start + window_words]))
+        for start in range(0, len(words), window_words)
+    ]
+
+
+def _weighted_vote(window_results, weights):
+    """Label with the largest total window weight and its share of the weight"""
+    votes = {}
+    for (label, _), weight in zip(window_results, weights):
+        votes[label] = votes.get(label, 0.0) + weight
+    prediction = max(votes, key=votes.get)
+    return prediction, votes[prediction]
+
+
+def predict_batch(model, model_name, matrix):
+    """Score every row of a matrix in one pass; [(label, confidence)] as predict_with_model returns per row"""
+    import numpy as np
+
+    if model_name == "Ансамбль моделей (детектор аномалий)":
+        # Anomaly check is per vector
+        return [predict_with_model(model, model_name, matrix[i]) for i in range(matrix.shape[0])]
+    elif model_name == "Кластеризация":
+        return [(label, None) for label in model.predict(matrix)]
+
+    if hasattr(model, "predict_proba"):
+        scores = model.predict_proba(matrix)
+        confidences = scores.max(axis=1)
+    elif hasattr(model, "decision_function"):
+        scores = model.decision_function(matrix)
+        confidences = (scores.max(axis=1) - scores.min(axis=1)) / 10
+    else:
+        return [(label, None) for label in model.predict(matrix)]
+    labels = model.classes_[np.argmax(scores, axis=1)]
+    return list(zip(labels, confidences))
+
+
+def predict_windows(model, model_name, matrix, weights):
+    """Score all windows in one pass and aggregate them into a document label.
+
+    Window probabilities (or decision scores) are averaged with weights
+    proportional to window length. Returns (prediction, confidence, per-window
+    [(label, confidence)])
+    """
+    import numpy as np
+
+    weights = np.asarray(weights, dtype=float)
+    weights = weights / weights.sum()
+
+    if model_name == "Ансамбль моделей (детектор аномалий)":
+        # Anomaly check is per vector, so windows are scored one by one and voted
+        window_results = [predict_with_model(model, model_name, matrix[i]) for i in range(matrix.shape[0])]
+        prediction, share = _weighted_vote(window_results, weights)
+        return prediction, share, window_results
+    elif model_name == "Кластеризация" or not hasattr(model, "predict_proba") and not hasattr(model, "decision_function"):
+        # No shared score space (clustering doesn't provide confidence scores)
+        window_results = [(label, None) for label in model.predict(matrix)]
+        prediction, _ = _weighted_vote(window_results, weights)
+        return prediction, None, window_results
+
+    if hasattr(model, "predict_proba"):
+        scores = model.predict_proba(matrix)
+        document = weights @ scores
+        confidence = np.max(document)
+        window_confidences = scores.max(axis=1)
+    else:
+        scores = model.decision_function(matrix)
+        document = weights @ scores
+        confidence = (document.max() - document.min()) / 10
+        window_confidences = (scores.max(axis=1) - scores.min(axis=1)) / 10
+
+    window_labels = model.classes_[np.argmax(scores, axis=1)]
+    window_results = list(zip(window_labels, (float(c) for c in window_confidences)))
+    return model.classes_[np.argmax(document)], confidence, window_results
+
+
+def classify_windows(text, model, model_name, vectorizer, window_words, timer):
+    """Windowed classification: one batched transform and one predict pass over all windows.
+
+    Returns (prediction, confidence, windows), where windows is a list of dicts
+    with the window position, size, label and confidence
+    """
+    windows = split_windows(text, window_words)
+    with timer.stage("vectorize"):
+        matrix = vectorizer.transform([window for _, window in windows])
+    weights = [len(window.split()) for _, window in windows]
+    with timer.stage("predict"):
+        prediction, confidence, window_results = predict_windows(model, model_name, matrix, weights)
+    shadow_utils.submit(model_name, matrix, prediction, confidence, timer.stages["predict"], weights=weights)
+    timer.info["window_count"] = len(windows)
+    return prediction, confidence, [
+        {"index": i, "start_word": start, "words": words, "label": label, "confidence": window_confidence}
+        for i, ((start, _), words, (label, window_confidence)) in enumerate(zip(windows, weights, window_results))
+    ]
+
+
+def classify_document(uploaded_file, model_name, vectorizer, timer=None, budget=None,
+                      window_words=None, windows=None):
+    """Classify document using specified model and return results
+
+    If a StageTimer is passed, per-stage durations and file stats are recorded into it.
+    The text budget (TextBudget, defaults to the configured one) limits how much
+    text is extracted and vectorized. Documents longer than window_words words
+    (defaults to Config.WINDOW_WORDS, 0 disables) are classified by windows;
+    per-window results are appended to the windows list if one is passed
+    """
+    from langdetect import detect
+
+    timer = timer if timer is not None else StageTimer()
+    budget = budget if budget is not None else TextBudget.from_config()
+    window_words = int(Config.WINDOW_WORDS) if window_words is None else window_words
+    status = "failed"
     try:
+        timer.describe_file(uploaded_file)
+
         # Extract and validate text
-        text = extract_text_from_file(uploaded_file)
+        with timer.stage("extract"):
+            text = extract_text_from_file(uploaded_file, timer, budget)
         if not text or len(text.strip()) < 10:
             return None, None, text[:500], 0, detect(text)
+        word_count = len(text.split())
+        timer.info["word_count"] = word_count
         
-        # Vectorize text and load model
-        vector = vectorizer.transform([text])
-        model = load_model(model_name)
+        windowed = window_words > 0 and word_count > window_words
+
+        # Vectorize text and load model; with micro-batching the text is vectorized
+        # by the dispatcher together with documents from other sessions
+        batched = not windowed and batching_utils.DISPATCHER.enabled
+        if not windowed and not batched:
+            with timer.stage("vectorize"):
+                vector = vectorizer.transform([text])
+        with timer.stage("load_model"):
+            model = load_model(model_name)
+        timer.info["model_version"] = current_model_version()
         
         if model is None:
-            return None, None, text[:500], len(text.split()), detect(text)
+            return None, None, text[:500], word_count, detect(text)
         
         # Detect language if enough text
-        lang = detect(text) if len(text) > 50 else "Неизвестно"
+        with timer.stage("langdetect"):
+            lang = detect(text) if len(text) > 50 else "Неизвестно"
         
         # Handle different model types
-        if model_name == "Ансамбль моделей (детектор аномалий)":
-            label, conf_str = model.predict_vector(vector)
-            prediction = label
-            try:
-                confidence = float(conf_str) if conf_str != "-" else None
-            except (ValueError, TypeError):
-                confidence = None
-        elif model_name == "Кластеризация":
-            prediction = model.predict(vector)[0]
-            confidence = None  # Clustering doesn't provide confidence scores
-        else:
-            try:
-                # Try different prediction methods
-                if hasattr(model, "predict_proba"):
-                    proba = model.predict_proba(vector)[0]
-                    prediction = model.classes_[np.argmax(proba)]
-                    confidence = np.max(proba)
-                elif hasattr(model, "decision_function"):
-                    scores = model.decision_function(vector)[0]
-                    prediction = model.classes_[np.argmax(scores)]
-                    confidence = (scores.max() - scores.min()) / 10
-                else:
-                    prediction = model.predict(vector)[0]
-                    confidence = None
-            except Exception as e:
-                st.error(f"Ошибка предсказания: {str(e)}")
-                return None, None, text[:500], len(text.split()), lang
+        try:
+            if windowed:
+                prediction, confidence, window_results = classify_windows(
+                    text, model, model_name, vectorizer, window_words, timer
+                )
+                if windows is not None:
+                    windows.extend(window_results)
+            elif batched:
+                prediction, confidence, vector = batching_utils.DISPATCHER.score(
+                    vectorizer, model, model_name, text, timer
+                )
+                # The batch is predicted in one pass; each document is charged its share
+                shadow_utils.submit(model_name, vector, prediction, confidence,
+                                    timer.stages["predict"] / timer.info["batch_size"])
+            else:
+                with timer.stage("predict"):
+                    prediction, confidence = predict_with_model(model, model_name, vector)
+                shadow_utils.submit(model_name, vector, prediction, confidence, timer.stages["predict"])
+        except Exception as e:
+            st.error(f"Ошибка предсказания: {str(e)}")
+            return None, None, text[:500], word_count, lang
+
+        # Features saved with the classification for later reclassification (FEATURE_STORE)
+        timer.info["features"] = feature_store_utils.capture(
+            text, None if windowed else vector, vectorizer
+        )
+        # Full text for the search index, added once the classification is saved
+        if search_utils.enabled():
+            timer.info["text"] = text
         
-        return prediction, confidence, text[:500], len(text.split()), lang
+        status = "ok"
+        return prediction, confidence, text[:500], word_count, lang
     
     except Exception as e:
         st.error(f"Ошибка обработки документа: {str(e)}")
-        return None, None, text[:500] if 'text' in locals() else "", 0, "Неизвестно"
\ No newline at end of file
+        return None, None, text[:500] if 'text' in locals() else "", 0, "Неизвестно"
+    finally:
+        monitoring_utils.observe_stages(model_name, "single", timer.stages, status)
+
+
+
+def compare_models(uploaded_file, model_names, vectorizer, timer=None, budget=None):
+    """Extract and vectorize the document once, then score the shared vector with every model concurrently
+
+    Returns (results, preview, word_count, lang); results holds one dict per model
+    in model_names order: model, prediction, confidence, latency_ms, error
+    """
+    from concurrent.futures import ThreadPoolExecutor
+    from langdetect import detect
+
+    timer = timer if timer is not None else StageTimer()
+    budget = budget if budget is not None else TextBudget.from_config()
+    timer.describe_file(uploaded_file)
+
+    with timer.stage("extract"):
+        text = extract_text_from_file(uploaded_file, timer, budget)
+    if not text or len(text.strip()) < 10:
+        return [], (text or "")[:500], 0, "Неизвестно"
+    word_count = len(text.split())
+    timer.info["word_count"] = word_count
+
+    with timer.stage("vectorize"):
+        vector = vectorizer.transform([text])
+    # Models are loaded in the script thread: load errors are reported via st.error
+    with timer.stage("load_model"):
+        models = {name: load_model(name) for name in model_names}
+    timer.info["model_version"] = current_model_version()
+    with timer.stage("langdetect"):
+        lang = detect(text) if len(text) > 50 else "Неизвестно"
+
+    def score(model_name):
+        model = models[model_name]
+        started = time.perf_counter()
+        prediction, confidence, error = None, None, None
+        if model is None:
+            error = "Модель не загружена"
+        else:
+            try:
+                prediction, confidence = predict_with_model(model, model_name, vector)
+            except Exception as e:
+                error = str(e)
+        return {
+            "model": model_name,
+            "prediction": prediction,
+            "confidence": confidence,
+            "latency_ms": (time.perf_counter() - started) * 1000,
+            "error": error,
+        }
+
+    # The CSR vector is read-only, so all models can share it
+    with timer.stage("predict"):
+        with ThreadPoolExecutor(max_workers=len(model_names)) as pool:
+            results = list(pool.map(score, model_names))
+
+    for result in results:
+        monitoring_utils.observe_stages(
+            result["model"], "compare", {"predict": result["latency_ms"]},
+            "ok" if result["error"] is None else "failed"
+        )
+    timer.info["features"] = feature_store_utils.capture(text, vector, vectorizer)
+    if search_utils.enabled():
+        timer.info["text"] = text
+    return results, text[:500], word_count, lang
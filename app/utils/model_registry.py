@@ -0,0 +1,239 @@
+import logging
+import os
+import threading
+import time
+from contextlib import contextmanager
+from config import Config
+from . import monitoring_utils
+from .model_set_utils import VECTORIZER_FILE, read_manifest
+
+
+logger = logging.getLogger(__name__)
+
+# Версия исходного набора из Config.MODELS_DIR (используется, пока нет других версий)
+BASE_VERSION = "base"
+
+# Текст для пробного предсказания каждой моделью при прогреве набора
+CANARY_TEXT = (
+    "Приказ об утверждении положения о порядке рассмотрения обращений граждан. "
+    "Контроль за исполнением настоящего приказа возложить на заместителя главы администрации."
+)
+
+
+class ModelSet:
+    """Одна версия набора: векторизатор и модели, загруженные из одного каталога"""
+
+    def __init__(self, version, directory):
+        self.version = version
+        self.directory = directory
+        self.vectorizer = None
+        self.in_flight = 0
+        self.activated_at = None
+        self.manifest = read_manifest(directory)
+        self._models = {}
+        self._lock = threading.Lock()
+
+    def load_vectorizer(self):
+        import joblib
+        self.vectorizer = joblib.load(os.path.join(self.directory, VECTORIZER_FILE))
+        return self.vectorizer
+
+    def model(self, model_name):
+        """Модель этой версии; загружается с диска при первом обращении"""
+        from .ml_utils import _load_model_from_disk
+
+        model = self._models.get(model_name)
+        if model is not None:
+            monitoring_utils.CACHE_REQUESTS.inc(cache="model", result="hit")
+            return model
+        # Загрузка под блокировкой, чтобы сессии не распаковывали один файл дважды
+        with self._lock:
+            model = self._models.get(model_name)
+            if model is None:
+                model = _load_model_from_disk(model_name, self.directory)
+                if model is not None:
+                    self._models[model_name] = model
+            return model
+
+    def warm(self):
+        """Загружает все модели и делает пробное предсказание; возвращает ({модель: с}, [ошибки])"""
+        from .ml_utils import MODELS, predict_with_model
+
+        timings, errors = {}, []
+        try:
+            canary = self.load_vectorizer().transform([CANARY_TEXT])
+        except Exception as e:
+            return timings, [f"Векторизатор версии {self.version}: {e}"]
+
+        for model_name in MODELS:
+            started = time.perf_counter()
+            model = self.model(model_name)
+            if model is None:
+                errors.append(f"Модель {model_name} версии {self.version} не загружена")
+                continue
+            try:
+                predict_with_model(model, model_name, canary)
+            except Exception as e:
+                errors.append(f"Пробное предсказание {model_name} версии {self.version}: {e}")
+                continue
+            timings[model_name] = round(time.perf_counter() - started, 3)
+        return timings, errors
+
+
+# Активная версия получает новые запросы; старые версии живут, пока их запросы не завершатся
+_active = None
+_sets = {}
+_lock = threading.Lock()
+_switch_lock = threading.Lock()
+_local = threading.local()
+_watcher_started = False
+# Версии, не прошедшие прогрев: наблюдатель не пробует их снова
+_rejected = set()
+
+
+def discover_versions() -> list:
+    """[(версия, каталог)] по возрастанию: исходный набор и готовые версии из MODEL_SETS_DIR"""
+    versions = [(BASE_VERSION, Config.MODELS_DIR)]
+    if os.path.isdir(Config.MODEL_SETS_DIR):
+        for name in sorted(os.listdir(Config.MODEL_SETS_DIR)):
+            directory = os.path.join(Config.MODEL_SETS_DIR, name)
+            # *.tmp — набор, который еще записывается
+            if not name.endswith(".tmp") and os.path.exists(os.path.join(directory, VECTORIZER_FILE)):
+                versions.append((name, directory))
+    return versions
+
+
+def target_version():
+    """Версия, которая должна быть активной: закрепленная в MODEL_VERSION или самая новая"""
+    versions = discover_versions()
+    if Config.MODEL_VERSION:
+        for version, directory in versions:
+            if version == Config.MODEL_VERSION:
+                return version, directory
+        logger.warning("Model set %s not found, using the latest one", Config.MODEL_VERSION)
+    return versions[-1]
+
+
+def _evict():
+    """Убирает неактивные версии без запросов в работе (вызывается под _lock)"""
+    for version, model_set in list(_sets.items()):
+        if model_set is not _active and model_set.in_flight == 0:
+            del _sets[version]
+            logger.info("Model set %s evicted", version)
+
+
+def switch_to(version, directory):
+    """Загружает и прогревает версию в текущем потоке, затем атомарно делает ее активной.
+
+    Возвращает (прогрев {модель: с}, ошибки); при ошибках активная версия не меняется
+    """
+    global _active
+    with _switch_lock:
+        if _active is not None and _active.version == version:
+            return {}, []
+        model_set = ModelSet(version, directory)
+        timings, errors = model_set.warm()
+        if errors and _active is not None:
+            _rejected.add(version)
+            for error in errors:
+                logger.warning("Model set %s rejected: %s", version, error)
+            return timings, errors
+        with _lock:
+            previous = _active
+            model_set.activated_at = time.time()
+            _sets[version] = model_set
+            _active = model_set
+            _evict()
+        monitoring_utils.MODEL_SET_SWITCHES.inc(version=version)
+        logger.info("Model set %s activated (previous: %s)", version, previous.version if previous else None)
+        return timings, errors
+
+
+def check_for_update():
+    """Переключается на целевую версию, если она отличается от активной"""
+    version, directory = target_version()
+    if _active is None or (_active.version != version and version not in _rejected):
+        return switch_to(version, directory)
+    return {}, []
+
+
+def active():
+    """Активный набор; при первом обращении загружается синхронно"""
+    if _active is None:
+        check_for_update()
+    return _active
+
+
+def current():
+    """Набор, закрепленный за текущим запросом, иначе активный"""
+    return getattr(_local, "pinned", None) or active()
+
+
+@contextmanager
+def pinned():
+    """Закрепляет набор за запросом: переключение версии не затронет начатую обработку"""
+    model_set = getattr(_local, "pinned", None)
+    if model_set is not None:
+        yield model_set
+        return
+    with _lock:
+        model_set = _active
+        if model_set is not None:
+            model_set.in_flight += 1
+    if model_set is None:
+        model_set = active()
+        with _lock:
+            model_set.in_flight += 1
+    _local.pinned = model_set
+    try:
+        yield model_set
+    finally:
+        _local.pinned = None
+        with _lock:
+            model_set.in_flight -= 1
+            _evict()
+
+
+def status() -> list:
+    """Загруженные версии для страницы аналитика"""
+    with _lock:
+        return [
+            {
+                "version": model_set.version,
+                "active": model_set is _active,
+                "in_flight": model_set.in_flight,
+                "activated_at": model_set.activated_at,
+                "kind": model_set.manifest.get("kind", "original"),
+            }
+            for model_set in _sets.values()
+        ] + [{"version": version, "active": False, "in_flight": 0, "activated_at": None, "kind": "rejected"}
+             for version in sorted(_rejected)]
+
+
+def _model_set_states():
+    return {
+        (row["version"], "active" if row["active"] else "draining"): row["in_flight"]
+        for row in status() if row["kind"] != "rejected"
+    }
+
+
+monitoring_utils.MODEL_SET_IN_FLIGHT.set_callback(_model_set_states)
+
+
+def _watch():
+    while True:
+        time.sleep(float(Config.MODEL_POLL_SECONDS))
+        try:
+            check_for_update()
+        except Exception:
+            logger.exception("Model set update failed")
+
+
+def start_watcher():
+    """Фоновая проверка новых версий в MODEL_SETS_DIR (один поток на процесс)"""
+    global _watcher_started
+    with _lock:
+        if _watcher_started or float(Config.MODEL_POLL_SECONDS) <= 0:
+            return
+        _watcher_started = True
+    threading.Thread(target=_watch, name="model-watcher", daemon=True).start()
@@ -0,0 +1,68 @@
+import json
+import os
+import shutil
+from datetime import datetime
+from config import Config
+from .ml_utils import MODELS
+
+
+# Файлы набора моделей: векторизатор, модели из MODELS и описание набора
+VECTORIZER_FILE = "vectorizer.pkl"
+MANIFEST_FILE = "manifest.json"
+
+
+def model_files() -> dict:
+    """Имя модели -> имя файла (одинаковые во всех наборах)"""
+    return {name: os.path.basename(path) for name, path in MODELS.items()}
+
+
+def new_version(suffix="") -> str:
+    """Имя новой версии набора: время создания сортируется как строка"""
+    version = f"{datetime.now():%Y%m%d_%H%M%S}"
+    return f"{version}_{suffix}" if suffix else version
+
+
+def read_manifest(directory) -> dict:
+    path = os.path.join(directory, MANIFEST_FILE)
+    if not os.path.exists(path):
+        return {}
+    with open(path, encoding="utf-8") as f:
+        return json.load(f)
+
+
+def load_model_set(directory):
+    """(векторизатор, {имя: модель}) из каталога набора; отсутствующие модели пропускаются"""
+    import joblib
+
+    vectorizer = joblib.load(os.path.join(directory, VECTORIZER_FILE))
+    models = {}
+    for name, fname in model_files().items():
+        path = os.path.join(directory, fname)
+        if os.path.exists(path):
+            models[name] = joblib.load(path)
+    return vectorizer, models
+
+
+def save_model_set(directory, vectorizer, models, manifest):
+    """Сохраняет набор; файлы пишутся во временный каталог и переименовываются целиком,
+    чтобы наблюдатель за каталогом наборов не увидел недописанную версию
+    """
+    import joblib
+
+    staging = f"{directory}.tmp"
+    shutil.rmtree(staging, ignore_errors=True)
+    os.makedirs(staging)
+    joblib.dump(vectorizer, os.path.join(staging, VECTORIZER_FILE))
+    for name, fname in model_files().items():
+        if name in models:
+            joblib.dump(models[name], os.path.join(staging, fname))
+    with open(os.path.join(staging, MANIFEST_FILE), "w", encoding="utf-8") as f:
+        json.dump({"created_at": datetime.now().isoformat(timespec="seconds"), **manifest}, f,
+                  ensure_ascii=False, indent=2)
+    if os.path.isdir(directory):
+        shutil.rmtree(directory)
+    os.replace(staging, directory)
+
+
+def version_dir(version) -> str:
+    return os.path.join(Config.MODEL_SETS_DIR, version)
@@ -0,0 +1,376 @@
+import logging
+import sys
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+
+logger = logging.getLogger(__name__)
+
+# Границы бакетов гистограмм длительностей, в секундах
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+
+# Сессия считается активной, если была активность за это время
+SESSION_TTL_SECONDS = 300
+
+
+def _escape(value) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_labels(labelnames, values, extra=None) -> str:
+    pairs = list(zip(labelnames, values)) + list(extra or [])
+    if not pairs:
+        return ""
+    return "{" + ",".join(f'{name}="{_escape(value)}"' for name, value in pairs) + "}"
+
+
+def _format_value(value) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value))
+
+
+class _Metric:
+    kind = "untyped"
+
+    def __init__(self, name, documentation, labelnames=()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._lock = threading.Lock()
+        self._values = {}
+
+    def _key(self, labels):
+        return tuple(str(labels.get(name, "")) for name in self.labelnames)
+
+    def render(self):
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.kind}"]
+        lines.extend(self._samples())
+        return lines
+
+
+class Counter(_Metric):
+    kind = "counter"
+
+    def inc(self, amount=1.0, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0.0) + amount
+
+    def value(self, **labels):
+        return self._values.get(self._key(labels), 0.0)
+
+    def _samples(self):
+        with self._lock:
+            items = list(self._values.items())
+        return [f"{self.name}{_format_labels(self.labelnames, key)} {_format_value(v)}" for key, v in items]
+
+
+class Gauge(_Metric):
+    """Gauge со значениями, заданными вручную, или вычисляемыми при каждом опросе"""
+    kind = "gauge"
+
+    def __init__(self, name, documentation, labelnames=(), callback=None):
+        super().__init__(name, documentation, labelnames)
+        self._callback = callback
+
+    def set_callback(self, callback):
+        """Значения будут вычисляться вызовом callback при каждом опросе"""
+        self._callback = callback
+
+    def set(self, value, **labels):
+        with self._lock:
+            self._values[self._key(labels)] = float(value)
+
+    def inc(self, amount=1.0, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0.0) + amount
+
+    def dec(self, amount=1.0, **labels):
+        self.inc(-amount, **labels)
+
+    def _samples(self):
+        if self._callback is not None:
+            try:
+                result = self._callback()
+            except Exception as e:
+                logger.warning("Gauge %s callback failed: %s", self.name, e)
+                return []
+            items = result.items() if isinstance(result, dict) else [((), result)]
+        else:
+            with self._lock:
+                items = list(self._values.items())
+        return [f"{self.name}{_format_labels(self.labelnames, key)} {_format_value(v)}" for key, v in items]
+
+
+class Histogram(_Metric):
+    kind = "histogram"
+
+    def __init__(self, name, documentation, labelnames=(), buckets=DEFAULT_BUCKETS):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(sorted(buckets)) + (float("inf"),)
+
+    def observe(self, value, **labels):
+        key = self._key(labels)
+        with self._lock:
+            counts, total = self._values.get(key, ([0] * len(self.buckets), 0.0))
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    counts[i] += 1
+                    break
+            self._values[key] = (counts, total + value)
+
+    def _samples(self):
+        with self._lock:
+            items = [(key, (list(counts), total)) for key, (counts, total) in self._values.items()]
+        lines = []
+        for key, (counts, total) in items:
+            cumulative = 0
+            for bound, count in zip(self.buckets, counts):
+                cumulative += count
+                labels = _format_labels(self.labelnames, key, [("le", _format_value(bound))])
+                lines.append(f"{self.name}_bucket{labels} {cumulative}")
+            labels = _format_labels(self.labelnames, key)
+            lines.append(f"{self.name}_sum{labels} {_format_value(total)}")
+            lines.append(f"{self.name}_count{labels} {cumulative}")
+        return lines
+
+
+class Registry:
+    def __init__(self):
+        self._metrics = []
+        self._lock = threading.Lock()
+
+    def register(self, metric):
+        with self._lock:
+            self._metrics.append(metric)
+        return metric
+
+    def render(self) -> str:
+        with self._lock:
+            metrics = list(self._metrics)
+        lines = []
+        for metric in metrics:
+            lines.extend(metric.render())
+        return "\n".join(lines) + "\n"
+
+
+REGISTRY = Registry()
+
+
+# --- Сессии Streamlit ---
+
+_sessions = {}
+_sessions_lock = threading.Lock()
+
+
+def touch_session(session_id):
+    """Отмечает активность сессии (вызывается при каждом перезапуске скрипта)"""
+    with _sessions_lock:
+        _sessions[session_id] = time.monotonic()
+
+
+def active_sessions() -> int:
+    cutoff = time.monotonic() - SESSION_TTL_SECONDS
+    with _sessions_lock:
+        for session_id in [s for s, seen in _sessions.items() if seen < cutoff]:
+            del _sessions[session_id]
+        return len(_sessions)
+
+
+# --- Память загруженных моделей ---
+
+_model_memory = {}
+
+
+def estimate_nbytes(obj, _seen=None) -> int:
+    """Грубая оценка памяти модели: сумма numpy/scipy массивов в атрибутах"""
+    _seen = _seen if _seen is not None else set()
+    if id(obj) in _seen:
+        return 0
+    _seen.add(id(obj))
+
+    if hasattr(obj, "nbytes") and isinstance(getattr(obj, "nbytes"), int):
+        return obj.nbytes
+    if hasattr(obj, "data") and hasattr(obj, "indices") and hasattr(obj, "indptr"):
+        return obj.data.nbytes + obj.indices.nbytes + obj.indptr.nbytes
+    if isinstance(obj, dict):
+        return sum(estimate_nbytes(k, _seen) + estimate_nbytes(v, _seen) for k, v in obj.items())
+    if isinstance(obj, (list, tuple, set)):
+        return sum(estimate_nbytes(item, _seen) for item in obj)
+    if isinstance(obj, (str, bytes, int, float)):
+        return sys.getsizeof(obj)
+
+    # Cython-объекты (например, деревья sklearn) отдают массивы только через __getstate__
+    state = getattr(obj, "__dict__", None)
+    if state is None and hasattr(obj, "__getstate__"):
+        try:
+            state = obj.__getstate__()
+        except Exception:
+            state = None
+    return estimate_nbytes(state, _seen) if isinstance(state, dict) else 0
+
+
+def set_model_memory(model_name, model):
+    _model_memory[model_name] = estimate_nbytes(model)
+
+
+# --- Метрики приложения ---
+
+CLASSIFICATIONS = REGISTRY.register(Counter(
+    "classify_documents_total", "Classified documents", ["model", "source", "status"]
+))
+STAGE_SECONDS = REGISTRY.register(Histogram(
+    "classify_stage_seconds", "Duration of classification pipeline stages", ["stage", "model", "source"]
+))
+ARCHIVE_FILES = REGISTRY.register(Counter(
+    "classify_archive_files_total", "Files classified from archives", ["model"]
+))
+ARCHIVE_SECONDS = REGISTRY.register(Histogram(
+    "classify_archive_seconds", "Wall time of whole archive runs", ["model"]
+))
+ARCHIVE_DUPLICATES = REGISTRY.register(Counter(
+    "classify_archive_duplicates_total", "Archive files labelled from a near-duplicate representative", ["model"]
+))
+ARCHIVE_FILES_PER_SECOND = REGISTRY.register(Gauge(
+    "classify_archive_files_per_second", "Throughput of the last archive run", ["model"]
+))
+CACHE_REQUESTS = REGISTRY.register(Counter(
+    "classify_cache_requests_total", "Cache lookups by result", ["cache", "result"]
+))
+DB_QUERIES = REGISTRY.register(Counter(
+    "classify_db_queries_total", "Executed SQL statements", ["operation", "status"]
+))
+DB_QUERY_SECONDS = REGISTRY.register(Histogram(
+    "classify_db_query_seconds", "Duration of SQL statements", ["operation"]
+))
+DB_CONNECTIONS = REGISTRY.register(Gauge(
+    "classify_db_connections", "Database connections by state", ["state"]
+))
+ACTIVE_SESSIONS = REGISTRY.register(Gauge(
+    "classify_active_sessions", "Streamlit sessions active in the last 5 minutes", callback=active_sessions
+))
+ADMISSION_TASKS = REGISTRY.register(Gauge(
+    "classify_admission_tasks", "Admission controller slots by work type and state", ["kind", "state"]
+))
+ADMISSION_WAIT_SECONDS = REGISTRY.register(Histogram(
+    "classify_admission_wait_seconds", "Time spent waiting for an admission slot", ["kind"]
+))
+ADMISSION_REJECTED = REGISTRY.register(Counter(
+    "classify_admission_rejected_total", "Tasks rejected by the admission controller", ["kind", "reason"]
+))
+MODEL_SET_IN_FLIGHT = REGISTRY.register(Gauge(
+    "classify_model_set_in_flight", "Requests in progress by model set version", ["version", "state"]
+))
+MODEL_SET_SWITCHES = REGISTRY.register(Counter(
+    "classify_model_set_switches_total", "Activations of model set versions", ["version"]
+))
+SHADOW_RESULTS = REGISTRY.register(Counter(
+    "classify_shadow_results_total", "Shadow scoring of the candidate model by result", ["model", "source", "result"]
+))
+SHADOW_SECONDS = REGISTRY.register(Histogram(
+    "classify_shadow_predict_seconds", "Candidate model prediction time", ["model"]
+))
+SHADOW_QUEUE = REGISTRY.register(Gauge(
+    "classify_shadow_queue", "Vectors waiting for shadow scoring"
+))
+BATCH_SIZE = REGISTRY.register(Histogram(
+    "classify_micro_batch_size", "Requests scored together by the micro-batching dispatcher", ["model"],
+    buckets=(1, 2, 4, 8, 16, 32, 64, 128)
+))
+SEARCH_SECONDS = REGISTRY.register(Histogram(
+    "classify_search_seconds", "Full-text search query duration"
+))
+SEARCH_INDEXED = REGISTRY.register(Counter(
+    "classify_search_indexed_total", "Documents sent to the full-text index by result", ["result"]
+))
+SEARCH_QUEUE = REGISTRY.register(Gauge(
+    "classify_search_queue", "Documents waiting for full-text indexing"
+))
+API_REQUESTS = REGISTRY.register(Counter(
+    "classify_api_requests_total", "HTTP API requests by endpoint and status", ["endpoint", "status"]
+))
+API_SECONDS = REGISTRY.register(Histogram(
+    "classify_api_request_seconds", "HTTP API request duration including upload", ["endpoint"]
+))
+MODEL_MEMORY = REGISTRY.register(Gauge(
+    "classify_model_memory_bytes", "Estimated memory of loaded models", ["model"],
+    callback=lambda: {(name,): size for name, size in _model_memory.items()}
+))
+
+
+def observe_stages(model_name, source, stages, status="ok"):
+    """Учитывает одну классификацию и длительности ее этапов (в мс, как в StageTimer)"""
+    CLASSIFICATIONS.inc(model=model_name, source=source, status=status)
+    for stage, ms in stages.items():
+        STAGE_SECONDS.observe(ms / 1000, stage=stage, model=model_name, source=source)
+
+
+def observe_archive(model_name, files, seconds):
+    ARCHIVE_FILES.inc(files, model=model_name)
+    ARCHIVE_SECONDS.observe(seconds, model=model_name)
+    if seconds > 0:
+        ARCHIVE_FILES_PER_SECOND.set(files / seconds, model=model_name)
+
+
+# --- HTTP-эндпоинт ---
+
+# Проверка готовности процесса для /ready (задается приложением)
+_readiness_check = lambda: True
+
+
+def set_readiness_check(check):
+    global _readiness_check
+    _readiness_check = check
+
+
+class _MetricsHandler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        path = self.path.split("?")[0]
+        if path == "/ready":
+            ready = _readiness_check()
+            body = b"ready\n" if ready else b"warming up\n"
+            self.send_response(200 if ready else 503)
+            self.send_header("Content-Type", "text/plain; charset=utf-8")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+            return
+        if path not in ("/metrics", "/"):
+            self.send_error(404)
+            return
+        body = REGISTRY.render().encode("utf-8")
+        self.send_response(200)
+        self.send_header("Content-Type", "text/plain; version=0.0.4; charset=utf-8")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+_server = None
+_server_started = False
+_server_lock = threading.Lock()
+
+
+def start_metrics_server(host, port):
+    """Запускает HTTP-эндпоинт /metrics один раз на процесс"""
+    global _server, _server_started
+    if not port:
+        return None
+    with _server_lock:
+        if _server_started:
+            return _server
+        _server_started = True
+        try:
+            _server = ThreadingHTTPServer((host, int(port)), _MetricsHandler)
+        except OSError as e:
+            logger.warning("Metrics endpoint on %s:%s is not available: %s", host, port, e)
+            return None
+        _server.daemon_threads = True
+        threading.Thread(target=_server.serve_forever, name="metrics-server", daemon=True).start()
+        return _server
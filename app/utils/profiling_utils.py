@@ -0,0 +1,151 @@
+import cProfile
+import io
+import json
+import os
+import threading
+import time
+import uuid
+from contextlib import contextmanager
+from datetime import datetime
+from config import Config
+
+
+# Типы профилируемых операций
+PROFILE_KINDS = {
+    "all": "Любые",
+    "classify": "Классификация документа",
+    "archive": "Классификация архива",
+}
+
+# Состояние переключателя общее для всего процесса (все сессии Streamlit)
+_lock = threading.Lock()
+# cProfile не допускает два активных профилировщика одновременно
+_active = threading.Lock()
+_state = {
+    "remaining": 0,
+    "id_user": None,
+    "kind": "all",
+}
+
+
+def arm(count: int, id_user=None, kind: str = "all"):
+    """Включает профилирование следующих count запусков (для пользователя или для всех)"""
+    with _lock:
+        _state.update(remaining=max(0, int(count)), id_user=id_user, kind=kind)
+
+
+def disarm():
+    with _lock:
+        _state.update(remaining=0, id_user=None, kind="all")
+
+
+def status() -> dict:
+    with _lock:
+        return dict(_state)
+
+
+def _claim(kind, id_user) -> bool:
+    """Забирает один слот профилирования, если запуск подходит под условия"""
+    with _lock:
+        if _state["remaining"] <= 0:
+            return False
+        if _state["id_user"] is not None and _state["id_user"] != id_user:
+            return False
+        if _state["kind"] not in ("all", kind):
+            return False
+        _state["remaining"] -= 1
+        return True
+
+
+def _describe_input(uploaded_file) -> dict:
+    from .extraction_utils import source_name, source_size
+
+    return {
+        "file_name": source_name(uploaded_file) or None,
+        "file_type": getattr(uploaded_file, "type", None),
+        "file_size": source_size(uploaded_file),
+    }
+
+
+@contextmanager
+def profile_run(kind: str, id_user, uploaded_file, model_name=None):
+    """Профилирует блок кода, если аналитик включил захват профилей.
+
+    При выключенном переключателе стоимость — одно сравнение без блокировок
+    """
+    if _state["remaining"] <= 0 or not _claim(kind, id_user):
+        yield
+        return
+    if not _active.acquire(blocking=False):
+        # Другой профиль уже снимается — возвращаем слот и работаем без профилирования
+        with _lock:
+            _state["remaining"] += 1
+        yield
+        return
+
+    profiler = cProfile.Profile()
+    started = time.perf_counter()
+    try:
+        profiler.enable()
+        try:
+            yield
+        finally:
+            profiler.disable()
+            _save_profile(profiler, kind, id_user, uploaded_file, model_name, time.perf_counter() - started)
+    finally:
+        _active.release()
+
+
+def _save_profile(profiler, kind, id_user, uploaded_file, model_name, duration):
+    os.makedirs(Config.PROFILE_DIR, exist_ok=True)
+    profile_id = f"{datetime.now():%Y%m%d_%H%M%S}_{kind}_{uuid.uuid4().hex[:8]}"
+    profiler.dump_stats(os.path.join(Config.PROFILE_DIR, f"{profile_id}.prof"))
+
+    meta = {
+        "id": profile_id,
+        "kind": kind,
+        "id_user": id_user,
+        "model": model_name,
+        "duration_s": round(duration, 3),
+        "created_at": datetime.now().isoformat(timespec="seconds"),
+        **_describe_input(uploaded_file),
+    }
+    with open(os.path.join(Config.PROFILE_DIR, f"{profile_id}.json"), "w", encoding="utf-8") as f:
+        json.dump(meta, f, ensure_ascii=False, indent=2)
+
+
+def list_profiles() -> list:
+    """Метаданные сохраненных профилей, новые сверху"""
+    if not os.path.isdir(Config.PROFILE_DIR):
+        return []
+    profiles = []
+    for fname in os.listdir(Config.PROFILE_DIR):
+        if not fname.endswith(".json"):
+            continue
+        try:
+            with open(os.path.join(Config.PROFILE_DIR, fname), encoding="utf-8") as f:
+                profiles.append(json.load(f))
+        except (OSError, ValueError):
+            continue
+    return sorted(profiles, key=lambda p: p.get("created_at", ""), reverse=True)
+
+
+def profile_path(profile_id: str) -> str:
+    return os.path.join(Config.PROFILE_DIR, f"{os.path.basename(profile_id)}.prof")
+
+
+def profile_summary(profile_id: str, limit: int = 30, sort_by: str = "cumulative") -> str:
+    """Текстовый отчет pstats по сохраненному профилю"""
+    import pstats
+
+    stream = io.StringIO()
+    stats = pstats.Stats(profile_path(profile_id), stream=stream)
+    stats.strip_dirs().sort_stats(sort_by).print_stats(limit)
+    return stream.getvalue()
+
+
+def delete_profile(profile_id: str):
+    for ext in (".prof", ".json"):
+        path = os.path.join(Config.PROFILE_DIR, f"{os.path.basename(profile_id)}{ext}")
+        if os.path.exists(path):
+            os.remove(path)
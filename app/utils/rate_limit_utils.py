@@ -0,0 +1,180 @@
+import math
+import os
+import sqlite3
+import threading
+import time
+import streamlit as st
+from config import Config
+
+
+# Роли для лимитов
+ANONYMOUS = "anonymous"
+EMPLOYEE = "employee"
+ANALYST = "analyst"
+API = "api"
+
+# Общий бакет всех анонимных клиентов: анонимный трафик в сумме не может
+# занять больше этой доли мощности, сколько бы IP-адресов он ни использовал
+ANONYMOUS_GLOBAL_KEY = "anonymous:*"
+
+# Одно соединение на процесс: Streamlit выполняет каждый перезапуск скрипта
+# в новом потоке, и соединение на поток открывалось бы заново при каждом запросе
+_conn = None
+_conn_lock = threading.Lock()
+
+
+def parse_limit(value):
+    """'3/86400' -> (емкость 3, пополнение 3 токена за 86400 с)"""
+    count, period = value.split("/")
+    return float(count), float(count) / float(period)
+
+
+def limits():
+    return {
+        ANONYMOUS: parse_limit(Config.RATE_LIMIT_ANONYMOUS),
+        ANONYMOUS_GLOBAL_KEY: parse_limit(Config.RATE_LIMIT_ANONYMOUS_GLOBAL),
+        EMPLOYEE: parse_limit(Config.RATE_LIMIT_EMPLOYEE),
+        ANALYST: parse_limit(Config.RATE_LIMIT_ANALYST),
+        API: parse_limit(Config.RATE_LIMIT_API),
+    }
+
+
+def _connection():
+    """Соединение SQLite процесса; вызывается под _conn_lock.
+
+    Файл общий для процессов одного узла; у каждого узла свои лимиты —
+    SQLite на сетевом томе блокировки не гарантирует
+    """
+    global _conn
+    if _conn is None:
+        directory = os.path.dirname(Config.RATE_LIMIT_DB)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        conn = sqlite3.connect(Config.RATE_LIMIT_DB, timeout=5, isolation_level=None, check_same_thread=False)
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("""
+            CREATE TABLE IF NOT EXISTS buckets (
+                key TEXT PRIMARY KEY,
+                tokens REAL NOT NULL,
+                updated REAL NOT NULL
+            )
+        """)
+        # Бакет, не менявшийся дольше полного пополнения, заполнен — строку можно удалить
+        full_refill = max((capacity / rate for capacity, rate in limits().values() if rate), default=0)
+        if full_refill:
+            conn.execute("DELETE FROM buckets WHERE updated < ?", (time.time() - full_refill,))
+        _conn = conn
+    return _conn
+
+
+def role_for(user) -> str:
+    if not user:
+        return ANONYMOUS
+    return ANALYST if user.get("id_role") == 2 else EMPLOYEE
+
+
+def forwarded_client(headers, trusted_hops):
+    """IP клиента из заголовков, добавленных trusted_hops доверенными прокси, или None.
+
+    Левые записи X-Forwarded-For клиент может подставить сам, поэтому берется
+    запись, которую добавил первый доверенный прокси: trusted_hops-я справа.
+    Если цепочка короче, используется X-Real-Ip, который прокси перезаписывает
+    """
+    if trusted_hops <= 0:
+        return None
+    chain = [part.strip() for part in headers.get("X-Forwarded-For", "").split(",") if part.strip()]
+    if len(chain) >= trusted_hops:
+        return chain[-trusted_hops]
+    return headers.get("X-Real-Ip") or None
+
+
+def client_identity(user=None) -> str:
+    """Ключ клиента: пользователь после входа, иначе IP (новая вкладка квоту не сбрасывает).
+
+    Без доверенных прокси берется адрес соединения, заголовки игнорируются;
+    если IP не определен, квота считается на сессию
+    """
+    if user:
+        return f"user:{user['id']}"
+    trusted_hops = int(Config.RATE_LIMIT_TRUSTED_PROXIES)
+    if trusted_hops > 0:
+        ip = forwarded_client(st.context.headers, trusted_hops)
+    else:
+        ip = getattr(st.context, "ip_address", None)
+    if ip:
+        return f"ip:{ip}"
+    return f"session:{st.session_state.get('session_id', 'unknown')}"
+
+
+def _refilled(conn, key, capacity, rate, now):
+    row = conn.execute("SELECT tokens, updated FROM buckets WHERE key = ?", (key,)).fetchone()
+    if row is None:
+        return capacity
+    tokens, updated = row
+    return min(capacity, tokens + max(0.0, now - updated) * rate)
+
+
+def try_acquire(identity, role, cost=1.0):
+    """Списывает cost токенов у клиента (и из общего анонимного бакета).
+
+    Возвращает (разрешено, через сколько секунд повторить, осталось токенов)
+    """
+    all_limits = limits()
+    buckets = [(f"{role}:{identity}", *all_limits[role])]
+    if role == ANONYMOUS:
+        buckets.append((ANONYMOUS_GLOBAL_KEY, *all_limits[ANONYMOUS_GLOBAL_KEY]))
+
+    with _conn_lock:
+        conn = _connection()
+        now = time.time()
+        # BEGIN IMMEDIATE блокирует запись для других процессов на время проверки
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            levels = [
+                (key, capacity, rate, _refilled(conn, key, capacity, rate, now)) for key, capacity, rate in buckets
+            ]
+            # Время до пополнения каждого бакета, которому не хватает токенов
+            waits = [(cost - tokens) / rate if rate else math.inf for _, _, rate, tokens in levels if tokens < cost]
+            allowed = not waits
+            retry_after = max(waits) if waits else 0.0
+            for key, _, _, tokens in levels:
+                conn.execute(
+                    "INSERT OR REPLACE INTO buckets (key, tokens, updated) VALUES (?, ?, ?)",
+                    (key, tokens - cost if allowed else tokens, now)
+                )
+            conn.execute("COMMIT")
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+    remaining = levels[0][3] - cost if allowed else levels[0][3]
+    return allowed, retry_after, remaining
+
+
+def peek(identity, role):
+    """Сколько токенов сейчас доступно клиенту (без списания)"""
+    capacity, rate = limits()[role]
+    with _conn_lock:
+        return _refilled(_connection(), f"{role}:{identity}", capacity, rate, time.time())
+
+
+def limit_capacity(role):
+    return limits()[role][0]
+
+
+def format_retry(seconds) -> str:
+    if seconds == math.inf:
+        return "недоступно"
+    seconds = int(math.ceil(seconds))
+    if seconds >= 3600:
+        return f"{seconds // 3600} ч {seconds % 3600 // 60} мин"
+    if seconds >= 60:
+        return f"{seconds // 60} мин {seconds % 60} с"
+    return f"{seconds} с"
+
+
+def check_rate_limit(user, cost=1.0) -> bool:
+    """Списывает попытку пользователя; при отказе показывает, когда повторить"""
+    allowed, retry_after, _ = try_acquire(client_identity(user), role_for(user), cost)
+    if not allowed:
+        st.error(f"⏳ Слишком много запросов. Повторите через {format_retry(retry_after)}")
+    return allowed
@@ -0,0 +1,76 @@
+import logging
+import threading
+import time
+from config import Config
+from . import model_registry
+
+
+logger = logging.getLogger(__name__)
+
+# Сколько соединений с БД открыть заранее
+WARMUP_DB_CONNECTIONS = 2
+
+# Флаг готовности процесса: выставляется после прогрева (даже неудачного)
+READY = threading.Event()
+
+_warmup_lock = threading.Lock()
+_warmup_started = False
+_warmup_report = {"errors": [], "models": {}, "model_version": None, "duration_s": None}
+
+_database = None
+_database_lock = threading.Lock()
+
+
+def get_database():
+    """Общий для процесса экземпляр Database с пулом соединений"""
+    global _database
+    if _database is None:
+        with _database_lock:
+            if _database is None:
+                # pymysql и pandas импортируются только при первом обращении к БД
+                from database.db_operations import Database
+                _database = Database()
+    return _database
+
+
+def _warmup():
+    started = time.perf_counter()
+    try:
+        # Загрузка, пробные предсказания и активация набора моделей
+        timings, errors = model_registry.check_for_update()
+        _warmup_report["models"].update(timings)
+        _warmup_report["errors"].extend(errors)
+        _warmup_report["model_version"] = model_registry.active().version
+        model_registry.start_watcher()
+
+        try:
+            get_database().pool.prefill(WARMUP_DB_CONNECTIONS)
+        except Exception as e:
+            _warmup_report["errors"].append(f"Соединение с БД: {e}")
+    except Exception as e:
+        _warmup_report["errors"].append(str(e))
+    finally:
+        _warmup_report["duration_s"] = round(time.perf_counter() - started, 3)
+        for error in _warmup_report["errors"]:
+            logger.warning("Warmup: %s", error)
+        READY.set()
+
+
+def start_warmup():
+    """Запускает прогрев в фоне один раз на процесс"""
+    global _warmup_started
+    with _warmup_lock:
+        if _warmup_started:
+            return
+        _warmup_started = True
+    threading.Thread(target=_warmup, name="warmup", daemon=True).start()
+
+
+def wait_until_ready(timeout=None) -> bool:
+    """Ждет завершения прогрева; True, если процесс готов"""
+    timeout = float(Config.WARMUP_TIMEOUT) if timeout is None else timeout
+    return READY.wait(timeout)
+
+
+def warmup_report() -> dict:
+    return dict(_warmup_report)
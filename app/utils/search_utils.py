@@ -0,0 +1,420 @@
+"""Полнотекстовый поиск по классифицированным документам.
+
+Локальный инвертированный индекс в SEARCH_INDEX_DIR состоит из неизменяемых
+сегментов. Сегмент — файл постингов <имя>.post и словарь <имя>.json. Для
+каждого термина в постингах подряд лежат номера документов с частотами
+(разности номеров в varint), а за ними позиции слов (тоже разностями),
+поэтому запрос без фраз позиции не читает. Новые документы копятся в
+очереди, и фоновый поток пишет их отдельным сегментом. Когда сегментов
+становится больше SEARCH_MAX_SEGMENTS, мелкие сливаются в один. Список
+сегментов в segments.json заменяется атомарно, а запись сериализуется
+файловой блокировкой, поэтому индекс могут пополнять несколько процессов.
+
+Запрос — слова и фразы в кавычках. Документ должен содержать все слова,
+а слова фразы должны идти подряд. Результаты ранжируются по BM25
+"""
+import fcntl
+import json
+import logging
+import math
+import mmap
+import os
+import queue
+import re
+import threading
+import time
+from config import Config
+from . import monitoring_utils
+
+
+logger = logging.getLogger(__name__)
+
+MANIFEST = "segments.json"
+LOCK_FILE = ".lock"
+
+# Параметры BM25
+BM25_K1 = 1.2
+BM25_B = 0.75
+
+# Сколько документов из очереди пишется одним сегментом
+COMMIT_DOCUMENTS = 500
+# Сколько ждать следующих документов, прежде чем записать сегмент, с
+COMMIT_WAIT = 1.0
+
+_TOKEN = re.compile(r"\w+")
+_PHRASE = re.compile(r'"([^"]*)"')
+
+
+def tokenize(text):
+    return _TOKEN.findall(text.lower())
+
+
+def _write_varint(out, value):
+    while value >= 0x80:
+        out.append((value & 0x7F) | 0x80)
+        value >>= 7
+    out.append(value)
+
+
+def _read_varints(data):
+    value = shift = 0
+    for byte in data:
+        value |= (byte & 0x7F) << shift
+        if byte & 0x80:
+            shift += 7
+        else:
+            yield value
+            value = shift = 0
+
+
+class Segment:
+    """Неизменяемый сегмент индекса: словарь терминов в памяти, постинги отображаются с диска (mmap)"""
+
+    def __init__(self, directory, name):
+        self.name = name
+        with open(os.path.join(directory, f"{name}.json"), encoding="utf-8") as f:
+            meta = json.load(f)
+        # термин -> [смещение, байт документов, байт позиций, число документов]
+        self.terms = meta["terms"]
+        self.lengths = {int(doc_id): length for doc_id, length in meta["docs"]}
+        with open(os.path.join(directory, f"{name}.post"), "rb") as f:
+            # Отображение остается действительным, даже если слияние удалит файл
+            self.data = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) if os.fstat(f.fileno()).st_size else b""
+
+    def postings(self, term):
+        """{документ: частота} для термина"""
+        entry = self.terms.get(term)
+        if entry is None:
+            return {}
+        offset, docs_bytes, _, _ = entry
+        values = _read_varints(self.data[offset:offset + docs_bytes])
+        result, doc_id = {}, 0
+        for delta, tf in zip(values, values):
+            doc_id += delta
+            result[doc_id] = tf
+        return result
+
+    def positions(self, term, wanted):
+        """{документ: [позиции]} для документов из wanted"""
+        entry = self.terms.get(term)
+        if entry is None:
+            return {}
+        offset, docs_bytes, positions_bytes, _ = entry
+        postings = self.postings(term)
+        values = _read_varints(self.data[offset + docs_bytes:offset + docs_bytes + positions_bytes])
+        result = {}
+        for doc_id, tf in postings.items():
+            positions, position = [], 0
+            for _ in range(tf):
+                position += next(values)
+                positions.append(position)
+            if doc_id in wanted:
+                result[doc_id] = positions
+        return result
+
+    def documents(self):
+        """{термин: {документ: [позиции]}} — для слияния сегментов"""
+        return {term: self.positions(term, self.lengths) for term in self.terms}
+
+
+def write_segment(directory, name, documents):
+    """Пишет сегмент из {документ: {термин: [позиции]}} и {документ: число слов}"""
+    postings, lengths = {}, {}
+    for doc_id, (terms, length) in documents.items():
+        lengths[doc_id] = length
+        for term, positions in terms.items():
+            postings.setdefault(term, {})[doc_id] = positions
+
+    data, terms = bytearray(), {}
+    for term in sorted(postings):
+        docs = postings[term]
+        order = sorted(docs)
+        start = len(data)
+        previous = 0
+        for doc_id in order:
+            _write_varint(data, doc_id - previous)
+            _write_varint(data, len(docs[doc_id]))
+            previous = doc_id
+        docs_end = len(data)
+        for doc_id in order:
+            previous = 0
+            for position in docs[doc_id]:
+                _write_varint(data, position - previous)
+                previous = position
+        terms[term] = [start, docs_end - start, len(data) - docs_end, len(order)]
+
+    # Сначала постинги, затем словарь: сегмент без словаря не попадет в индекс
+    with open(os.path.join(directory, f"{name}.post"), "wb") as f:
+        f.write(data)
+    with open(os.path.join(directory, f"{name}.json"), "w", encoding="utf-8") as f:
+        json.dump({"terms": terms, "docs": sorted(lengths.items())}, f, ensure_ascii=False, separators=(",", ":"))
+    return len(data)
+
+
+def _analyze(text):
+    """({термин: [позиции]}, число слов)"""
+    terms = {}
+    tokens = tokenize(text)
+    for position, token in enumerate(tokens):
+        terms.setdefault(token, []).append(position)
+    return terms, len(tokens)
+
+
+def parse_query(query):
+    """(слова, фразы): фразы — списки слов в кавычках, слова — все слова запроса"""
+    phrases = [tokenize(phrase) for phrase in _PHRASE.findall(query)]
+    phrases = [phrase for phrase in phrases if len(phrase) > 1]
+    return list(dict.fromkeys(tokenize(query))), phrases
+
+
+class SearchIndex:
+    """Индекс в каталоге: поиск по сегментам из segments.json и добавление новых"""
+
+    def __init__(self, directory, max_segments=10):
+        self.directory = directory
+        self.max_segments = max(int(max_segments), 2)
+        # Сколько соседних сегментов сливается за раз: сегменты растут уровнями, как в LSM-дереве
+        self.merge_factor = max(self.max_segments // 2, 2)
+        self._view = ([], 0, 0.0)
+        self._version = None
+        self._lock = threading.Lock()
+
+    def _path(self, name):
+        return os.path.join(self.directory, name)
+
+    def _read_manifest(self):
+        try:
+            with open(self._path(MANIFEST), encoding="utf-8") as f:
+                return json.load(f)["segments"]
+        except FileNotFoundError:
+            return []
+
+    def _write_manifest(self, names):
+        tmp = self._path(f"{MANIFEST}.{os.getpid()}.tmp")
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump({"segments": names}, f)
+        os.replace(tmp, self._path(MANIFEST))
+
+    def view(self):
+        """([(сегмент, действующие документы)], всего документов, средняя длина).
+
+        Перечитывается, только если индекс изменился (в том числе другим процессом)
+        """
+        for attempt in range(3):
+            try:
+                stat = os.stat(self._path(MANIFEST))
+            except FileNotFoundError:
+                return [], 0, 0.0
+            # os.replace создает новый файл, поэтому inode меняется при каждой записи списка
+            version = (stat.st_ino, stat.st_mtime_ns)
+            with self._lock:
+                if version == self._version:
+                    return self._view
+                try:
+                    self._load(version)
+                    return self._view
+                except FileNotFoundError:
+                    # Сегмент удален слиянием между чтением списка и открытием: список уже новый
+                    if attempt == 2:
+                        raise
+
+    def _load(self, version):
+        loaded = {segment.name: segment for segment, _ in self._view[0]}
+        segments = [loaded.get(name) or Segment(self.directory, name) for name in self._read_manifest()]
+        # Документ из более позднего сегмента заменяет тот же документ из ранних
+        live, seen, total_length = [], set(), 0
+        for segment in reversed(segments):
+            docs = set(segment.lengths) - seen
+            seen |= docs
+            total_length += sum(segment.lengths[doc_id] for doc_id in docs)
+            live.append((segment, docs))
+        self._view = (live[::-1], len(seen), total_length / max(len(seen), 1))
+        self._version = version
+
+    def _file_lock(self):
+        os.makedirs(self.directory, exist_ok=True)
+        lock = open(self._path(LOCK_FILE), "w")
+        fcntl.flock(lock, fcntl.LOCK_EX)
+        return lock
+
+    def add(self, documents):
+        """Индексирует [(id документа, текст)] новым сегментом; повторно добавленный документ заменяется"""
+        analyzed = {int(doc_id): _analyze(text) for doc_id, text in documents if text}
+        if not analyzed:
+            return
+        lock = self._file_lock()
+        try:
+            name = f"{time.time_ns()}_{os.getpid()}"
+            write_segment(self.directory, name, analyzed)
+            names = self._read_manifest() + [name]
+            self._write_manifest(names)
+            if len(names) > self.max_segments:
+                self._merge(names)
+        finally:
+            lock.close()
+
+    def _merge(self, names):
+        """Сливает merge_factor соседних сегментов с наименьшим объемом (под файловой блокировкой).
+
+        Соседство сохраняет порядок записи: более поздний сегмент по-прежнему заменяет документ из раннего
+        """
+        sizes = [os.path.getsize(self._path(f"{name}.post")) for name in names]
+        width = self.merge_factor
+        start = min(range(len(names) - width + 1), key=lambda i: sum(sizes[i:i + width]))
+        merged = names[start:start + width]
+        documents = {}
+        for old in merged:
+            segment = Segment(self.directory, old)
+            terms = {}
+            for term, docs in segment.documents().items():
+                for doc_id, positions in docs.items():
+                    terms.setdefault(doc_id, {})[term] = positions
+            for doc_id, length in segment.lengths.items():
+                documents[doc_id] = (terms.get(doc_id, {}), length)
+        name = f"{time.time_ns()}_{os.getpid()}_merged"
+        write_segment(self.directory, name, documents)
+        self._write_manifest(names[:start] + [name] + names[start + width:])
+        for old in merged:
+            for ext in (".post", ".json"):
+                try:
+                    os.remove(self._path(old + ext))
+                except FileNotFoundError:
+                    pass
+
+    def search(self, query):
+        """[(id документа, оценка)] по убыванию оценки"""
+        words, phrases = parse_query(query)
+        live, total_docs, average_length = self.view()
+        if not words or not live:
+            return []
+        document_frequency = {
+            word: sum(segment.terms[word][3] for segment, _ in live if word in segment.terms) for word in words
+        }
+        if not all(document_frequency.values()):
+            return []
+
+        scores = {}
+        # Сначала редкие слова: пересечение быстро сужается
+        words = sorted(words, key=document_frequency.get)
+        for segment, docs in live:
+            candidates = None
+            frequencies = {}
+            for word in words:
+                postings = segment.postings(word)
+                frequencies[word] = postings
+                candidates = (set(postings) if candidates is None else candidates & postings.keys()) & docs
+                if not candidates:
+                    break
+            if not candidates:
+                continue
+            for phrase in phrases:
+                candidates = self._match_phrase(segment, phrase, candidates)
+                if not candidates:
+                    break
+            for doc_id in candidates:
+                length = segment.lengths[doc_id]
+                score = 0.0
+                for word in words:
+                    tf = frequencies[word][doc_id]
+                    df = document_frequency[word]
+                    idf = math.log(1 + (total_docs - df + 0.5) / (df + 0.5))
+                    score += idf * tf * (BM25_K1 + 1) / (
+                        tf + BM25_K1 * (1 - BM25_B + BM25_B * length / average_length)
+                    )
+                scores[doc_id] = score
+        return sorted(scores.items(), key=lambda item: item[1], reverse=True)
+
+    @staticmethod
+    def _match_phrase(segment, phrase, candidates):
+        """Документы из candidates, где слова phrase идут подряд"""
+        positions = [segment.positions(word, candidates) for word in phrase]
+        matched = set()
+        for doc_id in candidates:
+            starts = set(positions[0].get(doc_id, ()))
+            for offset, word_positions in enumerate(positions[1:], start=1):
+                starts &= {position - offset for position in word_positions.get(doc_id, ())}
+                if not starts:
+                    break
+            if starts:
+                matched.add(doc_id)
+        return matched
+
+    def stats(self):
+        live, total_docs, _ = self.view()
+        return {
+            "segments": len(live),
+            "documents": total_docs,
+            "terms": sum(len(segment.terms) for segment, _ in live),
+            "bytes": sum(len(segment.data) for segment, _ in live),
+        }
+
+
+def enabled() -> bool:
+    return bool(Config.SEARCH_INDEX_DIR)
+
+
+_index = None
+_index_lock = threading.Lock()
+_queue = queue.Queue(maxsize=max(int(Config.SEARCH_QUEUE_SIZE), 1))
+_worker_started = False
+
+
+def get_index():
+    global _index
+    with _index_lock:
+        if _index is None:
+            _index = SearchIndex(Config.SEARCH_INDEX_DIR, int(Config.SEARCH_MAX_SEGMENTS))
+        return _index
+
+
+def search(query):
+    """[(id документа, оценка)] и время поиска в мс"""
+    started = time.perf_counter()
+    hits = get_index().search(query)
+    seconds = time.perf_counter() - started
+    monitoring_utils.SEARCH_SECONDS.observe(seconds)
+    return hits, seconds * 1000
+
+
+def _work():
+    while True:
+        batch = [_queue.get()]
+        deadline = time.perf_counter() + COMMIT_WAIT
+        while len(batch) < COMMIT_DOCUMENTS:
+            remaining = deadline - time.perf_counter()
+            try:
+                batch.append(_queue.get(timeout=remaining) if remaining > 0 else _queue.get_nowait())
+            except queue.Empty:
+                break
+        try:
+            get_index().add(batch)
+            monitoring_utils.SEARCH_INDEXED.inc(len(batch), result="ok")
+        except Exception as e:
+            monitoring_utils.SEARCH_INDEXED.inc(len(batch), result="error")
+            logger.warning("Search indexing failed: %s", e)
+        finally:
+            for _ in batch:
+                _queue.task_done()
+
+
+def _start_worker():
+    global _worker_started
+    with _index_lock:
+        if _worker_started:
+            return
+        _worker_started = True
+    threading.Thread(target=_work, name="search-indexer", daemon=True).start()
+
+
+def submit(doc_id, text):
+    """Ставит документ в очередь на индексацию; не блокирует запрос"""
+    if not enabled() or doc_id is None or not text:
+        return
+    _start_worker()
+    try:
+        _queue.put_nowait((doc_id, text))
+    except queue.Full:
+        monitoring_utils.SEARCH_INDEXED.inc(result="dropped")
+
+
+monitoring_utils.SEARCH_QUEUE.set_callback(_queue.qsize)
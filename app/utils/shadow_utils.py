@@ -0,0 +1,169 @@
+"""Теневая оценка модели-кандидата на реальном трафике.
+
+Векторы, уже посчитанные для основной модели, ставятся в ограниченную очередь;
+фоновый поток оценивает их кандидатом и копит согласие классов, сдвиг
+уверенности и задержку. Пользователь ответа кандидата не ждет: при заполненной
+очереди новые задания отбрасываются
+"""
+import logging
+import queue
+import statistics
+import threading
+import time
+from collections import deque
+from config import Config
+from . import monitoring_utils
+
+
+logger = logging.getLogger(__name__)
+
+# Сколько последних замеров задержки хранится для перцентилей
+LATENCY_SAMPLES = 1000
+
+
+class ShadowStats:
+    """Накопленные результаты теневой оценки по основной модели"""
+
+    def __init__(self):
+        self.samples = 0
+        self.agree = 0
+        self.confidence_shifts = 0
+        self.confidence_shift_sum = 0.0
+        self.errors = 0
+        self.primary_ms = deque(maxlen=LATENCY_SAMPLES)
+        self.candidate_ms = deque(maxlen=LATENCY_SAMPLES)
+
+    def add(self, agree, confidence_shift, primary_ms, candidate_ms):
+        self.samples += 1
+        self.agree += int(agree)
+        if confidence_shift is not None:
+            self.confidence_shifts += 1
+            self.confidence_shift_sum += confidence_shift
+        if primary_ms is not None:
+            self.primary_ms.append(primary_ms)
+        self.candidate_ms.append(candidate_ms)
+
+
+def _percentile(samples, q):
+    if not samples:
+        return None
+    if len(samples) == 1:
+        return samples[0]
+    return statistics.quantiles(samples, n=100, method="inclusive")[q - 1]
+
+
+_queue = queue.Queue(maxsize=max(int(Config.SHADOW_QUEUE_SIZE), 1))
+_stats = {}
+_dropped = 0
+_lock = threading.Lock()
+_worker_started = False
+_candidate_set = None
+
+
+def enabled() -> bool:
+    return bool(Config.SHADOW_MODEL)
+
+
+def _candidate_model():
+    """Модель-кандидат: из версии SHADOW_VERSION или из активного набора"""
+    global _candidate_set
+    from . import model_registry
+    from .model_set_utils import version_dir
+
+    if not Config.SHADOW_VERSION:
+        return model_registry.active().model(Config.SHADOW_MODEL)
+    if _candidate_set is None:
+        _candidate_set = model_registry.ModelSet(Config.SHADOW_VERSION, version_dir(Config.SHADOW_VERSION))
+    return _candidate_set.model(Config.SHADOW_MODEL)
+
+
+def _score(primary_model, vector, prediction, confidence, primary_ms, source, weights=None):
+    from .ml_utils import predict_with_model, predict_windows
+
+    candidate = _candidate_model()
+    if candidate is None:
+        raise RuntimeError(f"Модель-кандидат {Config.SHADOW_MODEL} не загружена")
+    # Кандидат с другим словарем нельзя оценивать на векторах основной модели
+    n_features = getattr(candidate, "n_features_in_", vector.shape[1])
+    if n_features != vector.shape[1]:
+        raise RuntimeError(f"Кандидат ожидает {n_features} признаков, вектор содержит {vector.shape[1]}")
+
+    started = time.perf_counter()
+    if weights is None:
+        candidate_prediction, candidate_confidence = predict_with_model(candidate, Config.SHADOW_MODEL, vector)
+    else:
+        # Документ, оцененный окнами, кандидат оценивает по тем же окнам с теми же весами
+        candidate_prediction, candidate_confidence, _ = predict_windows(candidate, Config.SHADOW_MODEL, vector, weights)
+    candidate_ms = (time.perf_counter() - started) * 1000
+
+    agree = str(candidate_prediction) == str(prediction)
+    shift = None
+    if confidence is not None and candidate_confidence is not None:
+        shift = float(candidate_confidence) - float(confidence)
+    with _lock:
+        _stats.setdefault(primary_model, ShadowStats()).add(agree, shift, primary_ms, candidate_ms)
+    monitoring_utils.SHADOW_RESULTS.inc(model=primary_model, source=source, result="agree" if agree else "differ")
+    monitoring_utils.SHADOW_SECONDS.observe(candidate_ms / 1000, model=primary_model)
+
+
+def _work():
+    while True:
+        task = _queue.get()
+        try:
+            _score(*task)
+        except Exception as e:
+            with _lock:
+                _stats.setdefault(task[0], ShadowStats()).errors += 1
+            monitoring_utils.SHADOW_RESULTS.inc(model=task[0], source=task[5], result="error")
+            logger.warning("Shadow scoring failed: %s", e)
+        finally:
+            _queue.task_done()
+
+
+def _start_worker():
+    global _worker_started
+    with _lock:
+        if _worker_started:
+            return
+        _worker_started = True
+    threading.Thread(target=_work, name="shadow-scoring", daemon=True).start()
+
+
+def submit(primary_model, vector, prediction, confidence, primary_ms=None, source="single", weights=None):
+    """Ставит уже посчитанный вектор в очередь на теневую оценку; не блокирует запрос.
+
+    Для документа, оцененного окнами, vector — матрица окон, weights — их веса
+    """
+    global _dropped
+    if not enabled() or (primary_model == Config.SHADOW_MODEL and not Config.SHADOW_VERSION):
+        return
+    _start_worker()
+    try:
+        _queue.put_nowait((primary_model, vector, prediction, confidence, primary_ms, source, weights))
+    except queue.Full:
+        with _lock:
+            _dropped += 1
+        monitoring_utils.SHADOW_RESULTS.inc(model=primary_model, source=source, result="dropped")
+
+
+def report() -> dict:
+    """Сводка для страницы аналитика: {основная модель: показатели} и число отброшенных заданий"""
+    with _lock:
+        rows = {}
+        for model, stats in _stats.items():
+            rows[model] = {
+                "samples": stats.samples,
+                "agreement": stats.agree / stats.samples if stats.samples else None,
+                "confidence_shift": (
+                    stats.confidence_shift_sum / stats.confidence_shifts if stats.confidence_shifts else None
+                ),
+                "primary_p50_ms": _percentile(list(stats.primary_ms), 50),
+                "candidate_p50_ms": _percentile(list(stats.candidate_ms), 50),
+                "primary_p95_ms": _percentile(list(stats.primary_ms), 95),
+                "candidate_p95_ms": _percentile(list(stats.candidate_ms), 95),
+                "errors": stats.errors,
+            }
+        return {"models": rows, "dropped": _dropped, "queued": _queue.qsize()}
+
+
+monitoring_utils.SHADOW_QUEUE.set_callback(_queue.qsize)
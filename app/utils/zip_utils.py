@@ -0,0 +1,185 @@
+import contextlib
+import os
+import zipfile
+from config import Config
+
+
+# Размер блока при потоковой распаковке: в памяти не бывает больше одного блока
+CHUNK_SIZE = 64 * 1024
+
+# Степень сжатия проверяется только для файлов крупнее этого размера:
+# короткие однообразные тексты законно сжимаются в сотни раз
+RATIO_MIN_BYTES = 1024 * 1024
+
+
+class ArchiveRejected(ValueError):
+    """Архив целиком отклонен до распаковки"""
+
+
+class MemberRejected(ValueError):
+    """Отдельный файл архива отклонен; текст исключения — причина для пользователя"""
+
+
+def archive_limits() -> dict:
+    return {
+        "max_members": int(Config.ARCHIVE_MAX_MEMBERS),
+        "max_total_bytes": int(Config.ARCHIVE_MAX_TOTAL_MB) * 1024 * 1024,
+        "max_file_bytes": int(Config.ARCHIVE_MAX_FILE_MB) * 1024 * 1024,
+        "max_ratio": float(Config.ARCHIVE_MAX_RATIO),
+        "max_depth": int(Config.ARCHIVE_MAX_DEPTH),
+    }
+
+
+def _format_mb(size) -> str:
+    return f"{size / 1024 / 1024:.1f} МБ"
+
+
+def _safe_parts(name):
+    """Части пути внутри архива; None, если путь выходит за каталог распаковки"""
+    normalized = name.replace("\\", "/")
+    if normalized.startswith("/") or (len(normalized) > 1 and normalized[1] == ":"):
+        return None
+    parts = [part for part in normalized.split("/") if part not in ("", ".")]
+    if not parts or ".." in parts:
+        return None
+    return parts
+
+
+def _check_member(info, limits):
+    """Проверка по центральному каталогу, до чтения данных файла"""
+    parts = _safe_parts(info.filename)
+    if parts is None:
+        raise MemberRejected("небезопасный путь внутри архива")
+    if len(parts) - 1 > limits["max_depth"]:
+        raise MemberRejected(f"вложенность папок больше {limits['max_depth']}")
+    if info.flag_bits & 0x1:
+        raise MemberRejected("файл зашифрован")
+    if info.file_size > limits["max_file_bytes"]:
+        raise MemberRejected(
+            f"размер {_format_mb(info.file_size)} больше допустимых {_format_mb(limits['max_file_bytes'])}"
+        )
+    if info.file_size > max(info.compress_size * limits["max_ratio"], RATIO_MIN_BYTES):
+        raise MemberRejected(f"степень сжатия больше {limits['max_ratio']:g}:1")
+    return parts
+
+
+def _allowed_bytes(info, limits):
+    """Сколько байт можно фактически прочитать из файла архива"""
+    return min(limits["max_file_bytes"], max(info.compress_size * limits["max_ratio"], RATIO_MIN_BYTES))
+
+
+class LimitedMember:
+    """Поток файла архива, который бросает MemberRejected, если прочитано больше допустимого"""
+
+    def __init__(self, stream, allowed):
+        self._stream = stream
+        self._allowed = allowed
+        self.read_bytes = 0
+
+    def read(self, size=-1):
+        if size is None or size < 0:
+            size = self._allowed - self.read_bytes + 1
+        data = self._stream.read(size)
+        self.read_bytes += len(data)
+        if self.read_bytes > self._allowed:
+            raise MemberRejected("фактический размер больше заявленного или допустимого")
+        return data
+
+    def close(self):
+        self._stream.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+def open_member(zip_ref, name, limits=None):
+    """Открывает файл архива на чтение с теми же лимитами размера и степени сжатия,
+    что и при распаковке; MemberRejected — если файл им не соответствует
+    """
+    limits = limits or archive_limits()
+    info = zip_ref.getinfo(name)
+    if info.file_size > limits["max_file_bytes"]:
+        raise MemberRejected(
+            f"размер {_format_mb(info.file_size)} больше допустимых {_format_mb(limits['max_file_bytes'])}"
+        )
+    if info.file_size > max(info.compress_size * limits["max_ratio"], RATIO_MIN_BYTES):
+        raise MemberRejected(f"степень сжатия больше {limits['max_ratio']:g}:1")
+    return LimitedMember(zip_ref.open(info), _allowed_bytes(info, limits))
+
+
+def _stream_member(zip_ref, info, target, limits, budget):
+    """Распаковывает файл блоками, повторно проверяя лимиты по фактически прочитанным байтам"""
+    allowed = min(_allowed_bytes(info, limits), budget["remaining"])
+    written = 0
+    try:
+        with zip_ref.open(info) as src, open(target, "wb") as dst:
+            while chunk := src.read(CHUNK_SIZE):
+                written += len(chunk)
+                if written > allowed:
+                    if written > budget["remaining"]:
+                        raise MemberRejected("превышен общий объем распакованных данных архива")
+                    raise MemberRejected("фактический размер больше заявленного или допустимого")
+                dst.write(chunk)
+    except (zipfile.BadZipFile, zipfile.LargeZipFile, NotImplementedError, RuntimeError, EOFError) as e:
+        # Если не открылся сам файл архива, target еще не создан
+        with contextlib.suppress(FileNotFoundError):
+            os.remove(target)
+        raise MemberRejected(f"файл поврежден или не поддерживается: {e}")
+    except MemberRejected:
+        os.remove(target)
+        raise
+    budget["remaining"] -= written
+
+
+def safe_extract(zip_file, dest_dir, extensions=None, limits=None):
+    """Распаковывает архив с лимитами на число файлов, размер, степень сжатия и вложенность.
+
+    Возвращает (список (имя в архиве, путь на диске), список (имя в архиве, причина отказа)).
+    Файлы с расширениями не из extensions пропускаются молча.
+    Бросает ArchiveRejected, если архив нельзя обрабатывать целиком
+    """
+    limits = limits or archive_limits()
+    try:
+        zip_ref = zipfile.ZipFile(zip_file, "r")
+    except zipfile.BadZipFile as e:
+        raise ArchiveRejected(f"файл не является корректным ZIP-архивом: {e}")
+
+    extracted, rejected = [], []
+    with zip_ref:
+        members = [info for info in zip_ref.infolist() if not info.is_dir()]
+        if len(members) > limits["max_members"]:
+            raise ArchiveRejected(f"в архиве {len(members)} файлов, допустимо не больше {limits['max_members']}")
+
+        # Сначала проверяем весь центральный каталог, ничего не распаковывая
+        planned = []
+        declared_total = 0
+        for info in members:
+            if extensions and os.path.splitext(info.filename)[1].lower() not in extensions:
+                continue
+            try:
+                parts = _check_member(info, limits)
+                if declared_total + info.file_size > limits["max_total_bytes"]:
+                    raise MemberRejected(
+                        f"превышен общий объем распакованных данных архива ({_format_mb(limits['max_total_bytes'])})"
+                    )
+            except MemberRejected as e:
+                rejected.append((info.filename, str(e)))
+                continue
+            declared_total += info.file_size
+            planned.append((info, parts))
+
+        budget = {"remaining": limits["max_total_bytes"]}
+        for info, parts in planned:
+            target = os.path.join(dest_dir, *parts)
+            os.makedirs(os.path.dirname(target), exist_ok=True)
+            try:
+                _stream_member(zip_ref, info, target, limits, budget)
+            except MemberRejected as e:
+                rejected.append((info.filename, str(e)))
+                continue
+            extracted.append((info.filename, target))
+
+    return extracted, rejected
@@ -0,0 +1,143 @@
+import threading
+
+import pytest
+
+from utils import admission_utils
+from utils.admission_utils import SINGLE, AdmissionController, AdmissionRejected
+
+
+@pytest.fixture(autouse=True)
+def fast_poll(monkeypatch):
+    monkeypatch.setattr(admission_utils, "WAIT_POLL_SECONDS", 0.01)
+
+
+def controller(limit, max_queue=10, queue_timeout=None):
+    return AdmissionController({SINGLE: limit}, max_queue=max_queue, queue_timeout=queue_timeout)
+
+
+def test_grants_up_to_limit():
+    admission = controller(2)
+
+    first, second, third = (admission.enqueue(SINGLE, owner) for owner in ("a", "b", "c"))
+
+    assert first.granted and second.granted
+    assert not third.granted
+    assert admission.position(third) == 1
+    assert admission.stats()[SINGLE] == {"running": 2, "waiting": 1, "limit": 2}
+
+
+def test_free_slot_goes_to_owner_with_fewest_running_tasks():
+    admission = controller(2)
+    a1 = admission.enqueue(SINGLE, "a")
+    admission.enqueue(SINGLE, "a")
+    a3 = admission.enqueue(SINGLE, "a")
+    b1 = admission.enqueue(SINGLE, "b")
+
+    assert admission.position(b1) == 1
+    assert admission.position(a3) == 2
+
+    admission.release(a1)
+
+    assert b1.granted
+    assert not a3.granted
+
+
+def test_equal_share_is_first_come_first_served():
+    admission = controller(1)
+    running = admission.enqueue(SINGLE, "x")
+    first = admission.enqueue(SINGLE, "a")
+    second = admission.enqueue(SINGLE, "b")
+
+    admission.release(running)
+
+    assert first.granted
+    assert not second.granted
+
+
+def test_queue_full():
+    admission = controller(1, max_queue=1)
+    admission.enqueue(SINGLE, "a")
+    admission.enqueue(SINGLE, "b")
+
+    with pytest.raises(AdmissionRejected):
+        admission.enqueue(SINGLE, "c")
+
+
+def test_wait_timeout_and_release_leaves_queue():
+    admission = controller(1)
+    running = admission.enqueue(SINGLE, "a")
+    waiting = admission.enqueue(SINGLE, "b")
+    positions = []
+
+    with pytest.raises(AdmissionRejected):
+        admission.wait(waiting, positions.append, timeout=0.05)
+    admission.release(waiting)
+
+    assert positions and set(positions) == {1}
+    assert admission.stats()[SINGLE]["waiting"] == 0
+    admission.release(running)
+    assert admission.stats()[SINGLE]["running"] == 0
+
+
+def test_wait_returns_when_slot_is_released():
+    admission = controller(1)
+    running = admission.enqueue(SINGLE, "a")
+    waiting = admission.enqueue(SINGLE, "b")
+    positions = []
+
+    threading.Timer(0.05, admission.release, args=(running,)).start()
+    admission.wait(waiting, positions.append, timeout=5)
+
+    assert waiting.granted
+    assert positions[-1] == 0
+
+
+def test_checkpoint_yields_slot_to_other_owner():
+    admission = controller(1)
+    long_task = admission.enqueue(SINGLE, "a")
+    other = admission.enqueue(SINGLE, "b")
+
+    resumed = threading.Thread(target=admission.checkpoint, args=(long_task,))
+    resumed.start()
+    assert other.event.wait(5)
+    assert not long_task.granted
+
+    admission.release(other)
+    resumed.join(5)
+
+    assert not resumed.is_alive()
+    assert long_task.granted
+
+
+def test_checkpoint_keeps_slot_without_contention():
+    admission = controller(1)
+    task = admission.enqueue(SINGLE, "a")
+    admission.enqueue(SINGLE, "a")
+
+    admission.checkpoint(task)
+
+    assert task.granted
+
+
+def test_checkpoint_wait_times_out():
+    admission = controller(1, queue_timeout=0.05)
+    long_task = admission.enqueue(SINGLE, "a")
+    admission.enqueue(SINGLE, "b")
+
+    with pytest.raises(AdmissionRejected):
+        admission.checkpoint(long_task)
+    admission.release(long_task)
+
+    assert admission.stats()[SINGLE] == {"running": 1, "waiting": 0, "limit": 1}
+
+
+def test_checkpoint_keeps_slot_when_queue_is_full():
+    admission = controller(1, max_queue=1)
+    long_task = admission.enqueue(SINGLE, "a")
+    other = admission.enqueue(SINGLE, "b")
+
+    admission.checkpoint(long_task)
+
+    assert long_task.granted
+    assert not other.granted
+    assert admission.stats()[SINGLE] == {"running": 1, "waiting": 1, "limit": 1}
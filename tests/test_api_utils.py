@@ -0,0 +1,111 @@
+import io
+
+import pytest
+
+from utils import api_utils
+from utils.api_utils import BodyReader, MultipartError, boundary_from, iter_parts
+
+
+BOUNDARY = b"----boundary42"
+
+
+def part(name, filename, content, content_type="application/octet-stream"):
+    return (
+        b"--" + BOUNDARY + b"\r\n"
+        + f'Content-Disposition: form-data; name="{name}"; filename="{filename}"\r\n'.encode()
+        + f"Content-Type: {content_type}\r\n\r\n".encode()
+        + content + b"\r\n"
+    )
+
+
+def body(*parts, preamble=b"", epilogue=b""):
+    return preamble + b"".join(parts) + b"--" + BOUNDARY + b"--\r\n" + epilogue
+
+
+def read_all(raw, max_part_bytes=1024 * 1024):
+    result = []
+    for field, uploaded in iter_parts(BodyReader(io.BytesIO(raw), len(raw)), BOUNDARY, max_part_bytes):
+        result.append((field, uploaded.name, uploaded.type, uploaded.size, uploaded.read()))
+        uploaded.close()
+    return result
+
+
+@pytest.mark.parametrize("chunk_size", [1, 2, 5, 17, 64 * 1024])
+def test_boundary_split_across_chunks(monkeypatch, chunk_size):
+    monkeypatch.setattr(api_utils, "CHUNK_SIZE", chunk_size)
+    # Содержимое похоже на начало разделителя, но им не является
+    tricky = b"\r\n--" + BOUNDARY[:-1] + b"x\r\n-"
+    raw = body(part("file", "a.txt", b"first"), part("file", "b.pdf", tricky))
+
+    parts = read_all(raw)
+
+    assert parts == [
+        ("file", "a.txt", "text/plain", 5, b"first"),
+        ("file", "b.pdf", "application/pdf", len(tricky), tricky),
+    ]
+
+
+def test_preamble_and_epilogue_are_skipped():
+    raw = body(part("file", "a.txt", b"text"), preamble=b"This is a preamble\r\n", epilogue=b"trailing")
+
+    assert read_all(raw) == [("file", "a.txt", "text/plain", 4, b"text")]
+
+
+def test_empty_part():
+    assert read_all(body(part("file", "empty.txt", b""))) == [("file", "empty.txt", "text/plain", 0, b"")]
+
+
+def test_filename_is_stripped_to_basename():
+    parts = read_all(body(part("file", "../../etc/order.docx", b"x")))
+
+    assert parts[0][1] == "order.docx"
+
+
+@pytest.mark.parametrize("cut", [10, 60, -len(BOUNDARY) - 5, -3])
+def test_truncated_body(monkeypatch, cut):
+    monkeypatch.setattr(api_utils, "CHUNK_SIZE", 8)
+    raw = body(part("file", "a.txt", b"some content here"))
+
+    with pytest.raises(MultipartError):
+        read_all(raw[:cut])
+
+
+def test_missing_boundary():
+    with pytest.raises(MultipartError):
+        read_all(b"no multipart here at all")
+
+
+@pytest.mark.parametrize("chunk_size", [3, 64 * 1024])
+def test_oversize_part(monkeypatch, chunk_size):
+    monkeypatch.setattr(api_utils, "CHUNK_SIZE", chunk_size)
+    raw = body(part("file", "small.txt", b"ok"), part("file", "big.txt", b"x" * 200))
+
+    parts = iter_parts(BodyReader(io.BytesIO(raw), len(raw)), BOUNDARY, max_part_bytes=100)
+    field, first = next(parts)
+    assert first.read() == b"ok"
+    first.close()
+    with pytest.raises(MultipartError, match="big|file"):
+        next(parts)
+
+
+def test_part_at_limit_is_accepted():
+    assert read_all(body(part("file", "a.txt", b"x" * 100)), max_part_bytes=100)[0][3] == 100
+
+
+def test_body_reader_stops_at_content_length():
+    raw = body(part("file", "a.txt", b"data"))
+    # Следующий запрос keep-alive в том же потоке не читается
+    stream = io.BytesIO(raw + b"POST /classify HTTP/1.1\r\n")
+
+    parts = list(iter_parts(BodyReader(stream, len(raw)), BOUNDARY, 1024))
+
+    assert len(parts) == 1
+    assert stream.read() == b"POST /classify HTTP/1.1\r\n"
+
+
+def test_boundary_from():
+    assert boundary_from('multipart/form-data; boundary="abc def"') == b"abc def"
+    with pytest.raises(MultipartError):
+        boundary_from("application/json")
+    with pytest.raises(MultipartError):
+        boundary_from("multipart/form-data")
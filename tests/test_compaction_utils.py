@@ -0,0 +1,48 @@
+from pathlib import Path
+
+import numpy as np
+import pytest
+from sklearn.preprocessing import normalize
+
+from utils.compaction_utils import compact_model_set
+from utils.model_set_utils import load_model_set
+
+
+MODELS_DIR = Path(__file__).resolve().parent.parent / "app" / "models"
+
+TEXTS = [
+    "Приказ о приеме на работу и назначении на должность",
+    "Постановление администрации об утверждении порядка",
+    "Уважаемый Иван Иванович, направляем вам письмо с ответом на запрос",
+    "",
+]
+
+
+@pytest.fixture(scope="module")
+def model_set():
+    return load_model_set(str(MODELS_DIR))
+
+
+@pytest.mark.parametrize("threshold", [0.05, 0.2])
+def test_compacted_set_transforms_and_predicts(model_set, threshold):
+    vectorizer, models = model_set
+
+    compact_vectorizer, compact_models, keep = compact_model_set(vectorizer, models, threshold)
+
+    assert 0 < len(keep) < len(vectorizer.vocabulary_)
+    X = compact_vectorizer.transform(TEXTS)
+    assert X.shape == (len(TEXTS), len(keep))
+    # Сохраненные столбцы совпадают с исходными с точностью до нормировки строки
+    original = normalize(vectorizer.transform(TEXTS)[:, keep], norm=vectorizer.norm)
+    assert np.allclose(X.toarray(), original.toarray(), atol=1e-5)
+    for name, model in compact_models.items():
+        predictions = model.predict(X)
+        assert len(predictions) == len(TEXTS), name
+        assert model.n_features_in_ == len(keep), name
+
+
+def test_threshold_without_features(model_set):
+    vectorizer, models = model_set
+
+    with pytest.raises(ValueError):
+        compact_model_set(vectorizer, models, 1.5)
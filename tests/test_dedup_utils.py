@@ -0,0 +1,98 @@
+import random
+
+import pytest
+
+from config import Config
+from utils import dedup_utils
+from utils.dedup_utils import NearDuplicateIndex, shingles
+
+
+def letter(seed, words=400):
+    rng = random.Random(seed)
+    return " ".join(f"слово{rng.randrange(5000)}" for _ in range(words))
+
+
+def group(index, texts):
+    """Ключ представителя для каждого текста, как в classify_archive"""
+    result = {}
+    for key, text in texts.items():
+        signature = index.signature(text)
+        representative, _ = index.find(signature)
+        if representative is None:
+            index.add(key, signature)
+            representative = key
+        result[key] = representative
+    return result
+
+
+def test_near_duplicates_share_representative():
+    base = letter(1)
+    changed_date = base.replace(base.split()[10], "12.03.2024", 1)
+    changed_addressee = base + " Иванову И. И."
+
+    groups = group(NearDuplicateIndex(0.8), {
+        "a": base, "b": changed_date, "c": changed_addressee, "d": letter(2), "e": letter(3),
+    })
+
+    assert groups == {"a": "a", "b": "a", "c": "a", "d": "d", "e": "e"}
+
+
+def test_identical_texts_have_similarity_one():
+    index = NearDuplicateIndex(0.9)
+    index.add("a", index.signature(letter(1)))
+
+    assert index.find(index.signature(letter(1))) == ("a", 1.0)
+
+
+def test_below_threshold_reports_best_similarity():
+    index = NearDuplicateIndex(0.99)
+    base = letter(1)
+    index.add("a", index.signature(base))
+    words = base.split()
+    # Меняем каждое шестидесятое слово: кандидат по LSH, но сходство ниже 0.99
+    edited = " ".join("правка" if i % 60 == 0 else word for i, word in enumerate(words))
+
+    key, similarity = index.find(index.signature(edited))
+
+    assert key is None
+    assert 0.0 < similarity < 0.99
+
+
+def test_signature_is_deterministic():
+    text = letter(4)
+
+    assert (NearDuplicateIndex(0.8).signature(text) == NearDuplicateIndex(0.8).signature(text)).all()
+
+
+def test_signature_spans_several_chunks(monkeypatch):
+    text = letter(5, words=3000)
+    full = NearDuplicateIndex(0.8).signature(text)
+    monkeypatch.setattr(dedup_utils, "_CHUNK", 7)
+
+    assert (NearDuplicateIndex(0.8).signature(text) == full).all()
+
+
+def test_short_and_empty_texts():
+    assert len(shingles("два слова")) == 1
+    assert shingles("") == shingles("   ")
+    index = NearDuplicateIndex(0.8)
+    index.add("empty", index.signature(""))
+
+    assert index.find(index.signature(""))[0] == "empty"
+
+
+def test_bands_must_divide_num_perm():
+    with pytest.raises(ValueError):
+        NearDuplicateIndex(0.8, num_perm=100, bands=16)
+
+
+def test_from_config(monkeypatch):
+    monkeypatch.setattr(Config, "DEDUP_THRESHOLD", "0")
+    assert dedup_utils.from_config() is None
+
+    monkeypatch.setattr(Config, "DEDUP_THRESHOLD", "0.85")
+    monkeypatch.setattr(Config, "DEDUP_NUM_PERM", "64")
+    monkeypatch.setattr(Config, "DEDUP_BANDS", "8")
+    index = dedup_utils.from_config()
+
+    assert (index.threshold, index.num_perm, index.bands, index.rows) == (0.85, 64, 8, 8)
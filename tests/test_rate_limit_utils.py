@@ -0,0 +1,121 @@
+import math
+import threading
+import types
+
+import pytest
+
+from config import Config
+from utils import rate_limit_utils
+from utils.rate_limit_utils import ANONYMOUS, EMPLOYEE, forwarded_client, peek, try_acquire
+
+
+@pytest.fixture
+def clock(monkeypatch, tmp_path):
+    """Отдельная база бакетов и управляемые часы"""
+    now = types.SimpleNamespace(value=1_000_000.0)
+    monkeypatch.setattr(rate_limit_utils, "time", types.SimpleNamespace(time=lambda: now.value))
+    monkeypatch.setattr(Config, "RATE_LIMIT_DB", str(tmp_path / "limits" / "rate_limits.db"))
+    monkeypatch.setattr(Config, "RATE_LIMIT_ANONYMOUS", "3/60")
+    monkeypatch.setattr(Config, "RATE_LIMIT_ANONYMOUS_GLOBAL", "5/10")
+    monkeypatch.setattr(Config, "RATE_LIMIT_EMPLOYEE", "2/10")
+    monkeypatch.setattr(Config, "RATE_LIMIT_ANALYST", "10/10")
+    monkeypatch.setattr(Config, "RATE_LIMIT_API", "10/10")
+    monkeypatch.setattr(rate_limit_utils, "_conn", None)
+    yield now
+    if rate_limit_utils._conn is not None:
+        rate_limit_utils._conn.close()
+
+
+def test_denies_when_bucket_is_empty(clock):
+    assert try_acquire("user:1", EMPLOYEE) == (True, 0.0, 1.0)
+    assert try_acquire("user:1", EMPLOYEE) == (True, 0.0, 0.0)
+
+    allowed, retry_after, remaining = try_acquire("user:1", EMPLOYEE)
+
+    assert not allowed
+    assert retry_after == pytest.approx(5.0)
+    assert remaining == 0.0
+
+
+def test_refill_is_proportional_to_elapsed_time(clock):
+    try_acquire("user:1", EMPLOYEE, cost=2)
+
+    clock.value += 2.5
+    assert peek("user:1", EMPLOYEE) == pytest.approx(0.5)
+    assert not try_acquire("user:1", EMPLOYEE)[0]
+
+    clock.value += 2.5
+    assert try_acquire("user:1", EMPLOYEE)[0]
+
+
+def test_refill_is_capped_at_capacity(clock):
+    try_acquire("user:1", EMPLOYEE)
+
+    clock.value += 3600
+
+    assert peek("user:1", EMPLOYEE) == 2.0
+
+
+def test_denied_request_does_not_spend_tokens(clock):
+    try_acquire("user:1", EMPLOYEE, cost=2)
+    clock.value += 4
+    assert not try_acquire("user:1", EMPLOYEE, cost=1)[0]
+
+    clock.value += 1
+
+    assert peek("user:1", EMPLOYEE) == pytest.approx(1.0)
+
+
+def test_clients_have_separate_buckets(clock):
+    try_acquire("user:1", EMPLOYEE, cost=2)
+
+    assert try_acquire("user:2", EMPLOYEE)[0]
+
+
+def test_anonymous_clients_share_global_bucket(clock):
+    for i in range(5):
+        assert try_acquire(f"ip:10.0.0.{i}", ANONYMOUS)[0]
+
+    allowed, retry_after, _ = try_acquire("ip:10.0.0.99", ANONYMOUS)
+
+    assert not allowed
+    assert retry_after == pytest.approx(2.0)
+    # Отказ по общему бакету не списывает токен клиента
+    assert peek("ip:10.0.0.99", ANONYMOUS) == 3.0
+
+    clock.value += 2
+    assert try_acquire("ip:10.0.0.99", ANONYMOUS)[0]
+
+
+def test_zero_rate_never_refills(clock, monkeypatch):
+    # Все лимиты с нулевым пополнением: очистка старых бакетов при открытии базы не падает
+    for name in ("ANONYMOUS", "ANONYMOUS_GLOBAL", "EMPLOYEE", "ANALYST", "API"):
+        monkeypatch.setattr(Config, f"RATE_LIMIT_{name}", "0/10")
+
+    allowed, retry_after, _ = try_acquire("user:1", EMPLOYEE)
+
+    assert not allowed
+    assert retry_after == math.inf
+
+
+@pytest.mark.parametrize("headers, hops, expected", [
+    ({"X-Forwarded-For": "1.1.1.1"}, 0, None),
+    ({"X-Forwarded-For": "6.6.6.6, 1.1.1.1"}, 1, "1.1.1.1"),
+    ({"X-Forwarded-For": "6.6.6.6, 1.1.1.1, 10.0.0.2"}, 2, "1.1.1.1"),
+    ({"X-Forwarded-For": "1.1.1.1", "X-Real-Ip": "2.2.2.2"}, 2, "2.2.2.2"),
+    ({"X-Real-Ip": "2.2.2.2"}, 1, "2.2.2.2"),
+    ({}, 1, None),
+])
+def test_forwarded_client(headers, hops, expected):
+    assert forwarded_client(headers, hops) == expected
+
+
+def test_connection_is_shared_across_threads(clock):
+    try_acquire("user:1", EMPLOYEE)
+    conn = rate_limit_utils._conn
+    worker = threading.Thread(target=try_acquire, args=("user:1", EMPLOYEE))
+    worker.start()
+    worker.join()
+
+    assert rate_limit_utils._conn is conn
+    assert peek("user:1", EMPLOYEE) == 0.0
@@ -0,0 +1,100 @@
+import pytest
+
+from utils.search_utils import MANIFEST, SearchIndex, Segment, _read_varints, _write_varint, parse_query, write_segment
+
+
+@pytest.mark.parametrize("values", [[0], [1, 127, 128, 255, 300], [2 ** 14 - 1, 2 ** 14, 2 ** 32 + 5, 2 ** 63]])
+def test_varint_roundtrip(values):
+    data = bytearray()
+    for value in values:
+        _write_varint(data, value)
+
+    assert list(_read_varints(bytes(data))) == values
+
+
+def test_varint_encoding():
+    data = bytearray()
+    _write_varint(data, 300)
+    _write_varint(data, 5)
+
+    assert bytes(data) == b"\xac\x02\x05"
+
+
+def test_segment_roundtrip(tmp_path):
+    documents = {
+        7: ({"приказ": [0, 4], "о": [1]}, 5),
+        300: ({"приказ": [2]}, 3),
+        2: ({"письмо": [0]}, 1),
+    }
+    write_segment(str(tmp_path), "s1", documents)
+
+    segment = Segment(str(tmp_path), "s1")
+
+    assert segment.lengths == {2: 1, 7: 5, 300: 3}
+    assert segment.postings("приказ") == {7: 2, 300: 1}
+    assert segment.postings("нет") == {}
+    assert segment.positions("приказ", {7}) == {7: [0, 4]}
+    assert segment.documents()["приказ"] == {7: [0, 4], 300: [2]}
+
+
+def test_parse_query():
+    assert parse_query('Приказ "о приеме" приказ "один"') == (["приказ", "о", "приеме", "один"], [["о", "приеме"]])
+
+
+def test_search_requires_all_words_and_phrases(tmp_path):
+    index = SearchIndex(str(tmp_path))
+    index.add([
+        (1, "Приказ о приеме на работу"),
+        (2, "Приказ о работе и приеме"),
+        (3, "Письмо о приеме"),
+        (4, ""),
+    ])
+
+    assert {doc_id for doc_id, _ in index.search("приказ приеме")} == {1, 2}
+    assert [doc_id for doc_id, _ in index.search('"о приеме" приказ')] == [1]
+    assert index.search("отсутствует приказ") == []
+    assert index.stats()["documents"] == 3
+
+
+def test_search_ranks_by_bm25(tmp_path):
+    index = SearchIndex(str(tmp_path))
+    index.add([(1, "договор аренды " + "текст " * 50), (2, "договор договор договор аренды"), (3, "письмо")])
+
+    assert [doc_id for doc_id, _ in index.search("договор")] == [2, 1]
+
+
+def test_later_segment_replaces_document(tmp_path):
+    index = SearchIndex(str(tmp_path), max_segments=10)
+    index.add([(1, "старый текст"), (2, "другой текст")])
+    index.add([(1, "новый текст")])
+
+    assert index.search("старый") == []
+    assert [doc_id for doc_id, _ in index.search("новый")] == [1]
+    assert {doc_id for doc_id, _ in index.search("текст")} == {1, 2}
+    assert index.stats()["documents"] == 2
+
+
+def test_merge_keeps_latest_version(tmp_path):
+    index = SearchIndex(str(tmp_path), max_segments=3)
+    for version in range(8):
+        index.add([(1, f"документ версия{version}"), (100 + version, f"документ номер{version}")])
+
+    stats = index.stats()
+    assert stats["segments"] <= 3
+    assert stats["documents"] == 9
+    assert [doc_id for doc_id, _ in index.search("версия7")] == [1]
+    for version in range(7):
+        assert index.search(f"версия{version}") == []
+        assert [doc_id for doc_id, _ in index.search(f"номер{version}")] == [100 + version]
+    # Файлы слитых сегментов удалены
+    files = [path.suffix for path in tmp_path.iterdir() if path.name != MANIFEST and path.suffix in (".post", ".json")]
+    assert sorted(files) == [".json"] * stats["segments"] + [".post"] * stats["segments"]
+
+
+def test_other_instance_sees_new_segments(tmp_path):
+    writer, reader = SearchIndex(str(tmp_path)), SearchIndex(str(tmp_path))
+    assert reader.search("приказ") == []
+
+    writer.add([(1, "приказ")])
+
+    assert [doc_id for doc_id, _ in reader.search("приказ")] == [1]
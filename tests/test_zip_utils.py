@@ -0,0 +1,188 @@
+import io
+import os
+import zipfile
+
+import pytest
+
+from utils import zip_utils
+from utils.zip_utils import ArchiveRejected, MemberRejected, open_member, safe_extract
+
+
+LIMITS = {
+    "max_members": 10,
+    "max_total_bytes": 10 * 1024 * 1024,
+    "max_file_bytes": 4 * 1024 * 1024,
+    "max_ratio": 100.0,
+    "max_depth": 2,
+}
+
+
+def make_zip(files, compression=zipfile.ZIP_DEFLATED):
+    buffer = io.BytesIO()
+    with zipfile.ZipFile(buffer, "w", compression) as zf:
+        for name, data in files:
+            zf.writestr(name, data)
+    buffer.seek(0)
+    return buffer
+
+
+def extract(tmp_path, files, limits=None, extensions=None):
+    return safe_extract(make_zip(files), str(tmp_path), extensions, {**LIMITS, **(limits or {})})
+
+
+def test_extracts_nested_files(tmp_path):
+    extracted, rejected = extract(tmp_path, [("a.txt", b"first"), ("dir/sub/b.txt", b"second")])
+
+    assert rejected == []
+    assert [name for name, _ in extracted] == ["a.txt", "dir/sub/b.txt"]
+    assert open(extracted[1][1], "rb").read() == b"second"
+    assert extracted[1][1] == os.path.join(str(tmp_path), "dir", "sub", "b.txt")
+
+
+@pytest.mark.parametrize("name", ["../evil.txt", "dir/../../evil.txt", "/etc/evil.txt", "C:/evil.txt", "..\\evil.txt"])
+def test_path_traversal_is_rejected(tmp_path, name):
+    extracted, rejected = extract(tmp_path / "out", [(name, b"x"), ("ok.txt", b"y")])
+
+    assert [name for name, _ in extracted] == ["ok.txt"]
+    assert rejected == [(name, "небезопасный путь внутри архива")]
+    assert not (tmp_path / "evil.txt").exists()
+
+
+def test_depth_limit(tmp_path):
+    extracted, rejected = extract(tmp_path, [("a/b/ok.txt", b"x"), ("a/b/c/deep.txt", b"y")])
+
+    assert [name for name, _ in extracted] == ["a/b/ok.txt"]
+    assert rejected[0][0] == "a/b/c/deep.txt"
+
+
+def test_too_many_members_rejects_archive(tmp_path):
+    files = [(f"{i}.txt", b"x") for i in range(LIMITS["max_members"] + 1)]
+
+    with pytest.raises(ArchiveRejected):
+        extract(tmp_path, files)
+
+
+def test_directories_do_not_count_as_members(tmp_path):
+    files = [(f"dir{i}/", b"") for i in range(LIMITS["max_members"])] + [("a.txt", b"x")]
+
+    extracted, rejected = extract(tmp_path, files)
+
+    assert [name for name, _ in extracted] == ["a.txt"]
+
+
+def test_not_a_zip(tmp_path):
+    with pytest.raises(ArchiveRejected):
+        safe_extract(io.BytesIO(b"not a zip"), str(tmp_path), None, LIMITS)
+
+
+def test_file_size_limit(tmp_path):
+    big = os.urandom(1024) * 6
+    extracted, rejected = extract(tmp_path, [("big.txt", big), ("small.txt", b"x")], {"max_file_bytes": 5 * 1024})
+
+    assert [name for name, _ in extracted] == ["small.txt"]
+    assert rejected[0][0] == "big.txt"
+    assert not (tmp_path / "big.txt").exists()
+
+
+def test_compression_ratio_limit(tmp_path):
+    bomb = b"\0" * (2 * zip_utils.RATIO_MIN_BYTES)
+
+    extracted, rejected = extract(tmp_path, [("bomb.txt", bomb)])
+
+    assert extracted == []
+    assert rejected == [("bomb.txt", "степень сжатия больше 100:1")]
+
+
+def test_small_files_skip_ratio_check(tmp_path):
+    extracted, rejected = extract(tmp_path, [("zeros.txt", b"\0" * 100_000)])
+
+    assert rejected == []
+    assert len(extracted) == 1
+
+
+def test_total_size_limit(tmp_path):
+    chunk = os.urandom(3 * 1024)
+    files = [("a.txt", chunk), ("b.txt", chunk), ("c.txt", chunk)]
+
+    extracted, rejected = extract(tmp_path, files, {"max_total_bytes": 7 * 1024})
+
+    assert [name for name, _ in extracted] == ["a.txt", "b.txt"]
+    assert [name for name, _ in rejected] == ["c.txt"]
+
+
+def test_other_extensions_are_skipped_silently(tmp_path):
+    extracted, rejected = extract(tmp_path, [("a.TXT", b"x"), ("b.exe", b"y")], extensions={".txt"})
+
+    assert [name for name, _ in extracted] == ["a.TXT"]
+    assert rejected == []
+
+
+def test_encrypted_member_is_rejected(tmp_path):
+    buffer = make_zip([("secret.txt", b"x"), ("ok.txt", b"y")])
+    raw = bytearray(buffer.getvalue())
+    # Выставляем бит шифрования в записи центрального каталога первого файла
+    offset = raw.index(zipfile.stringCentralDir)
+    raw[offset + 8] |= 0x1
+
+    extracted, rejected = safe_extract(io.BytesIO(bytes(raw)), str(tmp_path), None, LIMITS)
+
+    assert [name for name, _ in extracted] == ["ok.txt"]
+    assert rejected == [("secret.txt", "файл зашифрован")]
+
+
+def test_corrupt_local_header_rejects_only_that_member(tmp_path):
+    raw = bytearray(make_zip([("broken.txt", b"x" * 100), ("ok.txt", b"y")]).getvalue())
+    # Первый файл архива начинается с нулевого байта: портим сигнатуру его локального заголовка
+    raw[0] ^= 0xFF
+
+    extracted, rejected = safe_extract(io.BytesIO(bytes(raw)), str(tmp_path), None, LIMITS)
+
+    assert [name for name, _ in extracted] == ["ok.txt"]
+    assert [name for name, _ in rejected] == ["broken.txt"]
+    assert rejected[0][1].startswith("файл поврежден или не поддерживается")
+    assert not (tmp_path / "broken.txt").exists()
+
+
+def test_unsupported_compression_is_rejected(tmp_path):
+    raw = bytearray(make_zip([("odd.txt", b"x" * 100), ("ok.txt", b"y")]).getvalue())
+    # Неизвестный метод сжатия в записи центрального каталога первого файла
+    offset = raw.index(zipfile.stringCentralDir)
+    raw[offset + 10:offset + 12] = (99).to_bytes(2, "little")
+
+    extracted, rejected = safe_extract(io.BytesIO(bytes(raw)), str(tmp_path), None, LIMITS)
+
+    assert [name for name, _ in extracted] == ["ok.txt"]
+    assert [name for name, _ in rejected] == ["odd.txt"]
+
+
+def test_corrupt_data_removes_partial_file(tmp_path):
+    content = os.urandom(1000)
+    raw = bytearray(make_zip([("crc.txt", content)], zipfile.ZIP_STORED).getvalue())
+    raw[raw.index(content) + 500] ^= 0xFF
+
+    extracted, rejected = safe_extract(io.BytesIO(bytes(raw)), str(tmp_path), None, LIMITS)
+
+    assert extracted == []
+    assert [name for name, _ in rejected] == ["crc.txt"]
+    assert not (tmp_path / "crc.txt").exists()
+
+
+def test_open_member_reads_within_limits():
+    with zipfile.ZipFile(make_zip([("word/document.xml", b"<xml/>")])) as zf:
+        with open_member(zf, "word/document.xml", LIMITS) as member:
+            assert member.read() == b"<xml/>"
+
+
+def test_open_member_rejects_bomb():
+    bomb = b"\0" * (2 * zip_utils.RATIO_MIN_BYTES)
+    with zipfile.ZipFile(make_zip([("word/document.xml", bomb)])) as zf:
+        with pytest.raises(MemberRejected):
+            open_member(zf, "word/document.xml", LIMITS)
+
+
+def test_limited_member_stops_at_allowed_bytes():
+    member = zip_utils.LimitedMember(io.BytesIO(b"x" * 10), allowed=5)
+
+    assert member.read(5) == b"xxxxx"
+    with pytest.raises(MemberRejected):
+        member.read(1)